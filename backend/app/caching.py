@@ -0,0 +1,119 @@
+"""
+HTTP caching for API responses
+Strong ETags derived from the request and the dataset version, so
+conditional requests are answered with 304 before the endpoint runs
+"""
+import hashlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import config
+from app.code_version import CODE_VERSION
+from app.services.climate_service import get_dataset_version, pinned_snapshot
+
+# Responses under these prefixes depend only on the dataset version
+CACHEABLE_PREFIXES = ("/api/districts", "/api/climate", "/api/tiles")
+
+# Versioned URLs (?v=<dataset version>) never change and can be cached for a year
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def compute_etag(path: str, query_string: bytes, version: str) -> str:
+    """Strong ETag for an endpoint, its parameters, the dataset version and the code version"""
+    params = b"&".join(sorted(query_string.split(b"&"))) if query_string else b""
+    digest = hashlib.sha1(f"{CODE_VERSION}|{version}|{path}|".encode() + params)
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def encoded_etag(etag: str, content_encoding: Optional[str]) -> str:
+    """Strong ETags differ per content coding, e.g. "abc" and "abc-gzip" (RFC 9110 8.8.3)"""
+    if not content_encoding or content_encoding == "identity":
+        return etag
+    return f'{etag[:-1]}-{content_encoding}"'
+
+
+def matching_etag(if_none_match: str, etag: str) -> Optional[str]:
+    """
+    Weak comparison of If-None-Match against an ETag and its encoded
+    variants (RFC 9110 13.1.2); returns the tag that matched
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    for tag in (tag.strip() for tag in if_none_match.split(",")):
+        tag = tag[2:] if tag.startswith("W/") else tag
+        if tag == etag or tag.startswith(f"{etag[:-1]}-"):
+            return tag
+    return None
+
+
+def cache_control(query_string: bytes, version: str) -> str:
+    if f"v={version}".encode() in query_string.split(b"&"):
+        return IMMUTABLE_CACHE_CONTROL
+    return f"public, max-age={config.CACHE_MAX_AGE}, s-maxage={config.CDN_MAX_AGE}, stale-while-revalidate=60"
+
+
+class ConditionalGetMiddleware:
+    """
+    Adds ETag, Cache-Control and X-Dataset-Version to successful GET
+    responses, and answers a matching If-None-Match with 304 Not Modified
+    without calling the endpoint.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("GET", "HEAD")
+            or not scope["path"].startswith(CACHEABLE_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        version = get_dataset_version()
+        etag = compute_etag(scope["path"], scope["query_string"], version)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": cache_control(scope["query_string"], version),
+            "X-Dataset-Version": version,
+        }
+
+        matched = matching_etag(Headers(scope=scope).get("if-none-match", ""), etag)
+        if matched is not None:
+            headers["ETag"] = matched
+            await Response(status_code=304, headers=headers)(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                response_headers = MutableHeaders(scope=message)
+                for name, value in headers.items():
+                    response_headers[name] = value
+                response_headers["ETag"] = encoded_etag(etag, response_headers.get("content-encoding"))
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class DatasetSnapshotMiddleware:
+    """
+    Serves each request from the dataset snapshot that was active when it
+    arrived, so a reload part-way through cannot mix data of two versions
+    (or send an ETag of one version with the body of another).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with pinned_snapshot():
+            await self.app(scope, receive, send)
@@ -0,0 +1,35 @@
+"""
+Code version
+A hash of the application source and of the libraries that shape response
+bytes. It is part of the dataset version (and so of every ETag, versioned
+URL, cache key and data plane name), so a deploy that changes how
+responses are built never has clients or workers reuse bytes made by the
+previous code. Computed at import; nothing needs to be bumped by hand.
+"""
+import hashlib
+from importlib import metadata
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent
+# Serialization (pydantic), array formatting (numpy) and compression (brotli)
+RESPONSE_LIBRARIES = ("pydantic", "pydantic-core", "numpy", "brotli")
+
+
+def _library_version(name: str) -> str:
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return "-"
+
+
+def compute_code_version(app_dir: Path = APP_DIR) -> str:
+    digest = hashlib.sha1()
+    for path in sorted(app_dir.rglob("*.py")):
+        digest.update(path.relative_to(app_dir).as_posix().encode() + b"\0")
+        digest.update(path.read_bytes())
+    for name in RESPONSE_LIBRARIES:
+        digest.update(f"{name}={_library_version(name)}\0".encode())
+    return digest.hexdigest()[:16]
+
+
+CODE_VERSION = compute_code_version()
@@ -0,0 +1,67 @@
+"""
+Application settings
+Read from environment variables (optionally via a .env file)
+"""
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DATA_DIR = Path(__file__).parent / "data"
+
+# Real district boundaries; placeholder polygons are generated when the file does not exist
+DISTRICTS_GEOJSON_PATH = Path(os.getenv("DISTRICTS_GEOJSON_PATH", str(DATA_DIR / "ghana_districts.geojson")))
+
+# Derived data cached between runs (zonal weight matrices, ...)
+CACHE_DIR = Path(os.getenv("CACHE_DIR", str(DATA_DIR / "cache")))
+
+# SQLite climate store; mock data is served when the file does not exist
+CLIMATE_DB_PATH = Path(os.getenv("CLIMATE_DB_PATH", str(DATA_DIR / "climate_projections.db")))
+
+# Maximum number of concurrent read-only connections to the climate store
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4"))
+
+# Bytes of the database file to memory-map on each connection
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# Cache-Control lifetimes (seconds) for API responses; they are revalidated with ETags
+CACHE_MAX_AGE = int(os.getenv("CACHE_MAX_AGE", "300"))
+CDN_MAX_AGE = int(os.getenv("CDN_MAX_AGE", "3600"))
+
+# Maximum number of serialized (and pre-compressed) responses kept in memory
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+
+# Maximum number of encoded vector tiles kept in memory
+TILE_CACHE_SIZE = int(os.getenv("TILE_CACHE_SIZE", "4096"))
+
+# Maximum number of single-year projections kept in memory
+PROJECTION_CACHE_SIZE = int(os.getenv("PROJECTION_CACHE_SIZE", "32"))
+
+# Maximum bytes (all encodings) of interpolated surface grids and overlays kept in memory
+SURFACE_CACHE_BYTES = int(os.getenv("SURFACE_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+# Background jobs (reports, large exports): job table, result files and worker processes
+JOBS_DB_PATH = Path(os.getenv("JOBS_DB_PATH", str(CACHE_DIR / "jobs.db")))
+JOBS_DIR = Path(os.getenv("JOBS_DIR", str(CACHE_DIR / "jobs")))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Seconds finished jobs and their result files are kept; 0 keeps them forever
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+
+# Memory-mapped files of precomputed data, written once and shared by every worker process
+DATA_PLANE_DIR = Path(os.getenv("DATA_PLANE_DIR", str(CACHE_DIR / "dataplane")))
+
+# Shared secret for the admin endpoints (dataset reload); they are disabled when unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Seconds between checks of the climate store for a new dataset; 0 disables the watcher
+DATASET_POLL_INTERVAL = float(os.getenv("DATASET_POLL_INTERVAL", "5"))
+
+# Requests slower than this many seconds are logged with their parameters; 0 disables
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "1.0"))
+
+# Sampling profiler: requests slower than this many seconds get a collapsed-stack profile; 0 disables
+PROFILE_SLOW_REQUESTS = float(os.getenv("PROFILE_SLOW_REQUESTS", "0"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", str(CACHE_DIR / "profiles")))
@@ -0,0 +1,159 @@
+"""
+District registry
+Built once at import time so every district lookup is a dict access
+"""
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from app import config
+from app.data.geometry import calculate_centroid, generate_district_geometry, open_ring, polygon_parts, ring_area
+from app.data.mock_data import REGIONAL_POPULATION, REGIONS, generate_district_id
+
+
+class DistrictRecord(NamedTuple):
+    """A district with its precomputed geometry"""
+    id: str
+    name: str
+    region: str
+    index: int  # Position within its region
+    geometry: dict
+    centroid: list
+    population: Optional[int] = None
+
+    @property
+    def feature(self) -> dict:
+        """GeoJSON Feature for this district"""
+        return self.to_feature(self.geometry)
+
+    def to_feature(self, geometry: dict) -> dict:
+        """GeoJSON Feature for this district with another geometry, e.g. a simplified one"""
+        return {
+            "type": "Feature",
+            "properties": {
+                "id": self.id,
+                "name": self.name,
+                "region": self.region,
+                "centroid": self.centroid,
+            },
+            "geometry": geometry,
+        }
+
+
+class DistrictRegistry:
+    """Ordered districts with constant-time lookups by ID and region"""
+
+    def __init__(self, records: List[DistrictRecord]):
+        self.records: Tuple[DistrictRecord, ...] = tuple(records)
+        self.positions: Dict[str, int] = {}
+        by_region: Dict[str, List[DistrictRecord]] = {}
+
+        digest = hashlib.sha1()
+        for position, record in enumerate(self.records):
+            # District IDs are truncated codes, so the first district wins
+            self.positions.setdefault(record.id, position)
+            by_region.setdefault(record.region.lower(), []).append(record)
+            digest.update(json.dumps([record.id, record.name, record.region, record.geometry, record.population]).encode())
+
+        # Tuples, so callers cannot change the registry through what it returns
+        self._by_region: Dict[str, Tuple[DistrictRecord, ...]] = {
+            region: tuple(members) for region, members in by_region.items()
+        }
+        # Changes whenever districts, their boundaries or their populations change
+        self.signature = digest.hexdigest()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get(self, district_id: str) -> Optional[DistrictRecord]:
+        """Look up a district by ID"""
+        position = self.positions.get(district_id)
+        return self.records[position] if position is not None else None
+
+    def in_region(self, region: Optional[str]) -> Tuple[DistrictRecord, ...]:
+        """Districts in a region (case-insensitive), or all districts if region is None"""
+        if region is None:
+            return self.records
+        return self._by_region.get(region.lower(), ())
+
+
+# Property names used for district names and regions in boundary files
+NAME_PROPERTIES = ("name", "NAME", "DISTRICT", "district", "District")
+REGION_PROPERTIES = ("region", "REGION", "Region")
+POPULATION_PROPERTIES = ("population", "POPULATION", "Population", "pop", "POP")
+
+
+def _first_property(properties: dict, names: Tuple[str, ...]) -> Optional[str]:
+    for name in names:
+        if properties.get(name):
+            return str(properties[name])
+    return None
+
+
+def _population(properties: dict) -> Optional[int]:
+    value = _first_property(properties, POPULATION_PROPERTIES)
+    try:
+        return int(float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def load_district_boundaries(path: Path) -> DistrictRegistry:
+    """Build the registry from a GeoJSON FeatureCollection of real district boundaries"""
+    with open(path) as f:
+        collection = json.load(f)
+
+    records = []
+    region_counts: Dict[str, int] = {}
+    for position, feature in enumerate(collection["features"]):
+        properties = feature.get("properties") or {}
+        name = _first_property(properties, NAME_PROPERTIES)
+        if name is None:
+            label = f"{position}" + (f" (id {properties['id']})" if properties.get("id") else "")
+            raise ValueError(
+                f"District feature {label} in {path} has no name; "
+                f"set one of the properties {', '.join(NAME_PROPERTIES)}"
+            )
+        region = _first_property(properties, REGION_PROPERTIES) or ""
+        geometry = feature["geometry"]
+
+        # The centroid of a MultiPolygon is taken from its largest part
+        largest = max(polygon_parts(geometry), key=lambda part: ring_area(*open_ring(part[0])))
+        index = region_counts.get(region, 0)
+        region_counts[region] = index + 1
+
+        records.append(DistrictRecord(
+            id=str(properties.get("id") or generate_district_id(region, name)),
+            name=name,
+            region=region,
+            index=index,
+            geometry=geometry,
+            centroid=calculate_centroid(largest),
+            population=_population(properties),
+        ))
+    return DistrictRegistry(records)
+
+
+def build_district_registry() -> DistrictRegistry:
+    """Build the registry from real boundaries if available, else from the mock region/district lists"""
+    if config.DISTRICTS_GEOJSON_PATH.exists():
+        return load_district_boundaries(config.DISTRICTS_GEOJSON_PATH)
+
+    records = []
+    for region_name, district_list in REGIONS.items():
+        for idx, district_name in enumerate(district_list):
+            geometry = generate_district_geometry(region_name, idx, len(district_list))
+            records.append(DistrictRecord(
+                id=generate_district_id(region_name, district_name),
+                name=district_name,
+                region=region_name,
+                index=idx,
+                geometry=geometry,
+                centroid=calculate_centroid(geometry["coordinates"]),
+                population=REGIONAL_POPULATION[region_name] // len(district_list),
+            ))
+    return DistrictRegistry(records)
+
+
+DISTRICT_REGISTRY = build_district_registry()
@@ -0,0 +1,176 @@
+"""
+Geometry helpers for district boundaries
+"""
+import numpy as np
+
+# Approximate region centres (lat, lng) used for placeholder district polygons
+REGION_CENTERS = {
+    "Greater Accra": (5.6, -0.2),
+    "Ashanti": (6.7, -1.6),
+    "Western": (5.0, -2.0),
+    "Central": (5.5, -1.2),
+    "Eastern": (6.3, -0.5),
+    "Volta": (6.5, 0.5),
+    "Northern": (9.5, -1.0),
+    "Upper East": (10.8, -0.8),
+    "Upper West": (10.3, -2.3),
+    "Bono": (7.5, -2.3),
+    "Bono East": (7.8, -1.5),
+    "Ahafo": (7.0, -2.5),
+    "Western North": (6.2, -2.5),
+    "Oti": (7.8, 0.3),
+    "North East": (10.2, -0.2),
+    "Savannah": (9.0, -1.8),
+}
+
+# Length of a degree of latitude (and of longitude at the equator)
+KM_PER_DEGREE = 111.32
+
+
+def calculate_centroid(coordinates: list) -> list:
+    """Area-weighted centroid of a polygon (outer ring minus holes) from its coordinates."""
+    # coordinates[0] is the outer ring, the rest are holes
+    total_area = 0.0
+    centroid_lon = 0.0
+    centroid_lat = 0.0
+    for i, ring in enumerate(coordinates):
+        if len(ring) < 3:
+            continue
+        x, y = open_ring(ring)
+        x_next, y_next = np.roll(x, -1), np.roll(y, -1)
+        cross = x * y_next - x_next * y
+        signed_area = float(cross.sum()) / 2
+        if signed_area == 0:
+            continue
+        # Holes subtract their area (and moment) from the outer ring
+        area = abs(signed_area) if i == 0 else -abs(signed_area)
+        total_area += area
+        centroid_lon += area * float(((x + x_next) * cross).sum()) / (6 * signed_area)
+        centroid_lat += area * float(((y + y_next) * cross).sum()) / (6 * signed_area)
+
+    # Rounded to about 10 cm, which also drops floating-point noise from the payload
+    if total_area > 0:
+        return [round(centroid_lon / total_area, 6), round(centroid_lat / total_area, 6)]
+
+    # Degenerate polygon: fall back to the average of its vertices
+    ring = coordinates[0] if coordinates else []
+    # Exclude the closing point (which duplicates the first)
+    points = ring[:-1] if ring and ring[0] == ring[-1] else ring
+
+    if not points:
+        return [0, 0]
+
+    return [sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points)]
+
+
+def generate_district_geometry(region: str, district_index: int, total_in_region: int):
+    """Generate a simple rectangular geometry for a district (placeholder)"""
+    # This creates mock geometries - replace with real GeoJSON boundaries
+    center = REGION_CENTERS.get(region, (7.5, -1.0))
+    lat, lng = center
+
+    # Create small offset based on district index
+    row = district_index // 4
+    col = district_index % 4
+    offset_lat = row * 0.3 - 0.3
+    offset_lng = col * 0.3 - 0.3
+
+    # Create a small polygon
+    size = 0.12
+    base_lat = lat + offset_lat
+    base_lng = lng + offset_lng
+
+    return {
+        "type": "Polygon",
+        "coordinates": [[
+            [base_lng - size, base_lat - size],
+            [base_lng + size, base_lat - size],
+            [base_lng + size, base_lat + size],
+            [base_lng - size, base_lat + size],
+            [base_lng - size, base_lat - size],
+        ]]
+    }
+
+
+def clip_ring(x, y, axis: int, value: float, keep_greater: bool):
+    """
+    Clip an open ring (no closing point) against the half-plane
+    coord >= value (keep_greater) or coord <= value, one
+    Sutherland-Hodgman pass vectorised over all edges.
+    """
+    if len(x) == 0:
+        return x, y
+    coord = x if axis == 0 else y
+    inside = coord >= value if keep_greater else coord <= value
+    if inside.all():
+        return x, y
+    if not inside.any():
+        return x[:0], y[:0]
+
+    x_next, y_next = np.roll(x, -1), np.roll(y, -1)
+    coord_next = np.roll(coord, -1)
+    inside_next = np.roll(inside, -1)
+    crossing = inside != inside_next
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(crossing, (value - coord) / (coord_next - coord), 0.0)
+    cross_x = x + t * (x_next - x)
+    cross_y = y + t * (y_next - y)
+
+    # Each edge emits its crossing point (if any) followed by its end point (if inside)
+    out_x = np.column_stack([cross_x, x_next]).ravel()
+    out_y = np.column_stack([cross_y, y_next]).ravel()
+    keep = np.column_stack([crossing, inside_next]).ravel()
+    return out_x[keep], out_y[keep]
+
+
+def clip_ring_to_rect(x, y, xmin: float, ymin: float, xmax: float, ymax: float):
+    """Clip an open ring to an axis-aligned rectangle"""
+    x, y = clip_ring(x, y, 0, xmin, True)
+    x, y = clip_ring(x, y, 0, xmax, False)
+    x, y = clip_ring(x, y, 1, ymin, True)
+    return clip_ring(x, y, 1, ymax, False)
+
+
+def ring_area(x, y) -> float:
+    """Unsigned shoelace area of an open ring"""
+    if len(x) < 3:
+        return 0.0
+    return abs(float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))) / 2
+
+
+def geometry_area_km2(geometry: dict) -> float:
+    """
+    Approximate area of a Polygon or MultiPolygon in km², from its area in
+    degrees scaled at each part's mean latitude (accurate to well under 1%
+    at Ghana's size and latitude)
+    """
+    total = 0.0
+    for part in polygon_parts(geometry):
+        x, y = open_ring(part[0])
+        area = ring_area(x, y) - sum(ring_area(*open_ring(hole)) for hole in part[1:])
+        total += area * KM_PER_DEGREE ** 2 * np.cos(np.radians(y.mean()))
+    return float(total)
+
+
+def open_ring(ring: list):
+    """Coordinate arrays of a GeoJSON ring without its closing point"""
+    coords = np.asarray(ring, dtype=float)
+    if len(coords) > 1 and np.array_equal(coords[0], coords[-1]):
+        coords = coords[:-1]
+    return coords[:, 0], coords[:, 1]
+
+
+def polygon_parts(geometry: dict) -> list:
+    """Polygon coordinate lists of a Polygon or MultiPolygon geometry"""
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return list(geometry["coordinates"])
+    raise ValueError(f"Unsupported geometry type {geometry['type']}")
+
+
+def geometry_bounds(geometry: dict):
+    """(xmin, ymin, xmax, ymax) of a Polygon or MultiPolygon"""
+    coords = np.concatenate([np.asarray(part[0], dtype=float) for part in polygon_parts(geometry)])
+    return (*coords.min(axis=0).tolist(), *coords.max(axis=0).tolist())
@@ -23,6 +23,26 @@ REGIONS = {
     "Savannah": ["Damongo", "West Gonja", "Central Gonja", "East Gonja", "North Gonja", "Sawla-Tuna-Kalba", "Bole"],
 }
 
+# Population by region (2021 Population and Housing Census); mock districts share their region's evenly
+REGIONAL_POPULATION = {
+    "Greater Accra": 5455692,
+    "Ashanti": 5440463,
+    "Western": 2060585,
+    "Central": 2859821,
+    "Eastern": 2925653,
+    "Volta": 1659040,
+    "Northern": 2310939,
+    "Upper East": 1301226,
+    "Upper West": 901502,
+    "Bono": 1208649,
+    "Bono East": 1203400,
+    "Ahafo": 564668,
+    "Western North": 880921,
+    "Oti": 747248,
+    "North East": 658946,
+    "Savannah": 653266,
+}
+
 # Climate variable definitions
 CLIMATE_VARIABLES = [
     {
@@ -112,6 +132,14 @@ CLIMATE_CHANGE_FACTORS = {
 }
 
 
+# Half-width of the 10th-90th percentile range across the model ensemble,
+# as a fraction of the baseline plus a fraction of the projected change
+ENSEMBLE_SPREAD = {
+    "baseline_fraction": 0.03,
+    "change_fraction": 0.35,
+}
+
+
 def generate_district_id(region: str, district: str) -> str:
     """Generate a unique district ID"""
     region_code = region.upper().replace(" ", "_")[:3]
@@ -140,31 +168,18 @@ def get_climate_value(baseline: float, variable: str, scenario: str, period: str
 
 def generate_all_districts():
     """Generate list of all districts with IDs"""
-    districts = []
-    for region, district_list in REGIONS.items():
-        for district in district_list:
-            districts.append({
-                "id": generate_district_id(region, district),
-                "name": district,
-                "region": region,
-            })
-    return districts
-
-
-def get_district_climate_data(district_id: str, region: str):
-    """Get full climate data for a district"""
-    baseline = REGIONAL_BASELINES.get(region, REGIONAL_BASELINES["Greater Accra"])
-
-    climate_data = {}
-    for var in CLIMATE_VARIABLES:
-        var_id = var["id"]
-        var_data = {
-            "baseline": get_climate_value(baseline[var_id], var_id, "baseline", "baseline"),
-        }
-        for scenario in ["rcp45", "rcp85"]:
-            for period in ["2030", "2050", "2080"]:
-                key = f"{period}_{scenario}"
-                var_data[key] = get_climate_value(baseline[var_id], var_id, scenario, period)
-        climate_data[var_id] = var_data
-
-    return climate_data
+    from app.data.district_registry import DISTRICT_REGISTRY
+
+    return [
+        {"id": record.id, "name": record.name, "region": record.region}
+        for record in DISTRICT_REGISTRY.records
+    ]
+
+
+def get_ensemble_percentiles(baseline: float, value: float) -> tuple:
+    """Estimate the (p10, p50, p90) ensemble spread around a projected value"""
+    half_width = (
+        abs(baseline) * ENSEMBLE_SPREAD["baseline_fraction"]
+        + abs(value - baseline) * ENSEMBLE_SPREAD["change_fraction"]
+    )
+    return round(value - half_width, 1), round(value, 1), round(value + half_width, 1)
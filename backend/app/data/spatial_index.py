@@ -0,0 +1,141 @@
+"""
+Spatial index of district boundaries
+District bounding boxes are bucketed into a regular grid; only the
+districts in a point's bucket are tested exactly with even-odd ray casting
+"""
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.data.district_registry import DISTRICT_REGISTRY, DistrictRegistry
+from app.data.geometry import geometry_bounds, open_ring, polygon_parts
+
+# Target number of districts per grid bucket
+DISTRICTS_PER_BUCKET = 2
+# Points tested against one district at a time, to bound the (points x edges) matrix
+POINT_CHUNK = 4096
+
+
+class DistrictEdges:
+    """Every edge of a district's rings (outer rings and holes alike)"""
+
+    def __init__(self, geometry: dict):
+        starts = []
+        for polygon in polygon_parts(geometry):
+            for ring in polygon:
+                x, y = open_ring(ring)
+                if len(x):
+                    starts.append(np.column_stack([x, y, np.roll(x, -1), np.roll(y, -1)]))
+        edges = np.concatenate(starts) if starts else np.zeros((0, 4))
+        self.x1, self.y1, self.x2, self.y2 = edges.T
+
+    def contains(self, lng: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        """
+        Even-odd test of many points at once: a point is inside when a ray
+        towards +x crosses an odd number of edges. Holes and the parts of a
+        MultiPolygon need no special handling.
+        """
+        inside = np.zeros(len(lng), dtype=bool)
+        for start in range(0, len(lng), POINT_CHUNK):
+            px = lng[start:start + POINT_CHUNK, None]
+            py = lat[start:start + POINT_CHUNK, None]
+            straddles = (self.y1 > py) != (self.y2 > py)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                crossing_x = self.x1 + (py - self.y1) * (self.x2 - self.x1) / (self.y2 - self.y1)
+            crossings = np.count_nonzero(straddles & (px < crossing_x), axis=1)
+            inside[start:start + POINT_CHUNK] = crossings % 2 == 1
+        return inside
+
+
+class DistrictIndex:
+    """Grid-bucket index over district bounding boxes"""
+
+    def __init__(self, registry: DistrictRegistry):
+        self.registry = registry
+        self.edges = [DistrictEdges(record.geometry) for record in registry.records]
+        bounds = np.array([geometry_bounds(record.geometry) for record in registry.records])
+        self.bounds = bounds
+
+        self.xmin, self.ymin = bounds[:, 0].min(), bounds[:, 1].min()
+        self.xmax, self.ymax = bounds[:, 2].max(), bounds[:, 3].max()
+        width = max(self.xmax - self.xmin, 1e-9)
+        height = max(self.ymax - self.ymin, 1e-9)
+        # Roughly square cells, about DISTRICTS_PER_BUCKET districts per cell
+        cells = max(1, len(registry) // DISTRICTS_PER_BUCKET)
+        self.cell_size = math.sqrt(width * height / cells)
+        self.cols = max(1, math.ceil(width / self.cell_size))
+        self.rows = max(1, math.ceil(height / self.cell_size))
+
+        buckets: Dict[int, List[int]] = {}
+        for position, (x0, y0, x1, y1) in enumerate(bounds):
+            col0, row0 = self._cell(x0, y0)
+            col1, row1 = self._cell(x1, y1)
+            for row in range(row0, row1 + 1):
+                for col in range(col0, col1 + 1):
+                    buckets.setdefault(row * self.cols + col, []).append(position)
+
+        # CSR layout: districts of bucket b are items[pointers[b]:pointers[b + 1]], in registry order
+        counts = np.zeros(self.rows * self.cols + 1, dtype=np.int64)
+        for bucket, positions in buckets.items():
+            counts[bucket + 1] = len(positions)
+        self.pointers = np.cumsum(counts)
+        self.items = np.zeros(self.pointers[-1], dtype=np.int64)
+        for bucket, positions in buckets.items():
+            self.items[self.pointers[bucket]:self.pointers[bucket + 1]] = positions
+
+    def _cell(self, x: float, y: float):
+        col = min(max(int((x - self.xmin) / self.cell_size), 0), self.cols - 1)
+        row = min(max(int((y - self.ymin) / self.cell_size), 0), self.rows - 1)
+        return col, row
+
+    def _buckets(self, lng: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        """Bucket of every point, or -1 outside the indexed area"""
+        inside = (lng >= self.xmin) & (lng <= self.xmax) & (lat >= self.ymin) & (lat <= self.ymax)
+        # Clipping keeps points on the far edges in the last cell, as _cell does
+        col = np.clip(np.floor((lng - self.xmin) / self.cell_size), 0, self.cols - 1).astype(np.int64)
+        row = np.clip(np.floor((lat - self.ymin) / self.cell_size), 0, self.rows - 1).astype(np.int64)
+        return np.where(inside, row * self.cols + col, -1)
+
+    def locate_many(self, lat, lng) -> np.ndarray:
+        """
+        Registry position of the district containing each point, or -1.
+        Where districts overlap, the first in registry order wins.
+        """
+        lat = np.asarray(lat, dtype=float)
+        lng = np.asarray(lng, dtype=float)
+        result = np.full(len(lat), -1, dtype=np.int64)
+        buckets = self._buckets(lng, lat)
+
+        for bucket in np.unique(buckets[buckets >= 0]):
+            points = np.flatnonzero(buckets == bucket)
+            for position in self.items[self.pointers[bucket]:self.pointers[bucket + 1]]:
+                x0, y0, x1, y1 = self.bounds[position]
+                px, py = lng[points], lat[points]
+                # Cheap bounding box test before the exact one
+                candidates = (px >= x0) & (px <= x1) & (py >= y0) & (py <= y1)
+                if not candidates.any():
+                    continue
+                hits = np.zeros(len(points), dtype=bool)
+                hits[candidates] = self.edges[position].contains(px[candidates], py[candidates])
+                result[points[hits]] = position
+                points = points[~hits]
+                if not len(points):
+                    break
+        return result
+
+    def locate(self, lat: float, lng: float) -> Optional[int]:
+        """Registry position of the district containing a point, or None"""
+        position = int(self.locate_many([lat], [lng])[0])
+        return position if position >= 0 else None
+
+
+_indexes: Dict[str, DistrictIndex] = {}
+
+
+def get_district_index(registry: DistrictRegistry = DISTRICT_REGISTRY) -> DistrictIndex:
+    """Spatial index for a registry, built on first use"""
+    index = _indexes.get(registry.signature)
+    if index is None:
+        index = _indexes[registry.signature] = DistrictIndex(registry)
+    return index
@@ -0,0 +1,270 @@
+"""
+District boundary topology
+Rings are split into arcs at junctions so that a border shared by two
+districts is stored, simplified and quantized once, and stays aligned
+at every simplification level
+"""
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.data.district_registry import DISTRICT_REGISTRY, DistrictRegistry
+from app.data.geometry import polygon_parts, ring_area
+
+# Zoom levels with precomputed simplified geometry; higher zooms get full resolution
+SIMPLIFY_ZOOMS = tuple(range(4, 13))
+# Simplification tolerance as a fraction of one 256px tile pixel at the equator
+TOLERANCE_PIXELS = 0.5
+
+Point = Tuple[float, float]
+# Arc references follow TopoJSON: i is arc i, ~i is arc i reversed
+Ring = List[int]
+
+
+def tolerance_for_zoom(zoom: int) -> float:
+    """Simplification tolerance in degrees for a web map zoom level"""
+    return TOLERANCE_PIXELS * 360 / (256 * 2 ** zoom)
+
+
+def quantization_digits(tolerance: float) -> int:
+    """Decimal places that keep quantization error at a tenth of the tolerance"""
+    return max(0, math.ceil(-math.log10(tolerance / 10)))
+
+
+def douglas_peucker(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """Boolean mask of the points kept by Douglas-Peucker; both ends are always kept"""
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    if len(points) < 3:
+        return keep
+
+    stack = [(0, len(points) - 1)]
+    # A closed arc is first split at the point farthest from its start
+    if np.array_equal(points[0], points[-1]):
+        far = int(np.argmax(np.hypot(*(points - points[0]).T)))
+        if far == 0:
+            return keep
+        keep[far] = True
+        stack = [(0, far), (far, len(points) - 1)]
+
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        offsets = points[start + 1:end] - points[start]
+        length = np.hypot(*segment)
+        if length == 0:
+            distances = np.hypot(*offsets.T)
+        else:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            index = start + 1 + farthest
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+    return keep
+
+
+def _open_points(ring: list) -> List[Point]:
+    points = [(float(x), float(y)) for x, y, *_ in ring]
+    if len(points) > 1 and points[0] == points[-1]:
+        points.pop()
+    return points
+
+
+def _edge(a: Point, b: Point) -> Tuple[Point, Point]:
+    return (a, b) if a <= b else (b, a)
+
+
+class Topology:
+    """
+    Shared arcs and, per district, polygons as lists of rings of arc
+    references. Arcs are (n, 2) arrays of lon/lat; consecutive arcs of a
+    ring share their end points.
+    """
+
+    def __init__(self, arcs: List[np.ndarray], geometries: List[List[List[Ring]]], digits: Optional[int] = None):
+        self.arcs = arcs
+        self.geometries = geometries
+        # Decimal places the arcs are quantized to, None at full resolution
+        self.digits = digits
+
+    @classmethod
+    def build(cls, registry: DistrictRegistry) -> "Topology":
+        rings: List[List[Point]] = []
+        ring_ids: List[List[List[int]]] = []
+        for record in registry.records:
+            polygons = []
+            for polygon in polygon_parts(record.geometry):
+                ids = []
+                for ring in polygon:
+                    ids.append(len(rings))
+                    rings.append(_open_points(ring))
+                polygons.append(ids)
+            ring_ids.append(polygons)
+
+        # Which rings use each edge; a ring's arcs break wherever that set changes
+        edge_rings: Dict[Tuple[Point, Point], set] = {}
+        for r, points in enumerate(rings):
+            for a, b in zip(points, points[1:] + points[:1]):
+                edge_rings.setdefault(_edge(a, b), set()).add(r)
+
+        arcs: List[np.ndarray] = []
+        arc_index: Dict[Tuple[Point, ...], int] = {}
+        ring_arcs: List[Ring] = []
+        for points in rings:
+            n = len(points)
+            owners = [frozenset(edge_rings[_edge(points[i], points[(i + 1) % n])]) for i in range(n)]
+            junctions = [i for i in range(n) if owners[i] != owners[i - 1]]
+            if not junctions:
+                # A ring with a single neighbour set starts at its smallest point,
+                # so the other side of a shared closed border gives the same arc reversed
+                start = min(range(n), key=points.__getitem__)
+                pieces = [points[start:] + points[:start] + [points[start]]]
+            else:
+                pieces = []
+                for j, begin in enumerate(junctions):
+                    end = junctions[(j + 1) % len(junctions)]
+                    if end > begin:
+                        pieces.append(points[begin:end + 1])
+                    else:
+                        pieces.append(points[begin:] + points[:end + 1])
+
+            refs = []
+            for piece in pieces:
+                key = tuple(piece)
+                if key in arc_index:
+                    refs.append(arc_index[key])
+                elif key[::-1] in arc_index:
+                    refs.append(~arc_index[key[::-1]])
+                else:
+                    arc_index[key] = len(arcs)
+                    refs.append(len(arcs))
+                    arcs.append(np.asarray(piece, dtype=float))
+            ring_arcs.append(refs)
+
+        geometries = [
+            [[ring_arcs[r] for r in polygon] for polygon in polygons]
+            for polygons in ring_ids
+        ]
+        return cls(arcs, geometries)
+
+    def simplified(self, tolerance: float) -> "Topology":
+        """
+        Copy with every arc simplified and quantized once, so shared borders
+        stay aligned. Holes and parts that collapse are dropped; a district
+        whose parts all collapse keeps its largest part at full resolution.
+        """
+        digits = quantization_digits(tolerance)
+        arcs = []
+        for arc in self.arcs:
+            points = np.round(arc[douglas_peucker(arc, tolerance)], digits)
+            # Quantization can merge neighbouring points
+            keep = np.ones(len(points), dtype=bool)
+            keep[1:] = np.any(points[1:] != points[:-1], axis=1)
+            keep[-1] = True
+            arcs.append(points[keep])
+        simplified = Topology(arcs, [], digits)
+
+        for polygons in self.geometries:
+            kept = []
+            for polygon in polygons:
+                if not _valid_ring(simplified.ring_coordinates(polygon[0])):
+                    continue
+                kept.append([polygon[0]] + [
+                    ring for ring in polygon[1:] if _valid_ring(simplified.ring_coordinates(ring))
+                ])
+            if not kept:
+                largest = max(polygons, key=lambda polygon: ring_area(*self.ring_coordinates(polygon[0]).T))
+                kept = [[simplified._add_ring(self.ring_coordinates(ring)) for ring in largest]]
+            simplified.geometries.append(kept)
+        return simplified
+
+    def _add_ring(self, coordinates: np.ndarray) -> Ring:
+        """Store a closed ring as a new arc of its own"""
+        self.arcs.append(coordinates)
+        return [len(self.arcs) - 1]
+
+    def ring_coordinates(self, ring: Ring) -> np.ndarray:
+        """Closed ring of points assembled from its arcs"""
+        parts = []
+        for i, ref in enumerate(ring):
+            arc = self.arcs[ref] if ref >= 0 else self.arcs[~ref][::-1]
+            parts.append(arc if i == 0 else arc[1:])
+        return np.concatenate(parts)
+
+    def geometry(self, index: int) -> dict:
+        """GeoJSON geometry of a district"""
+        polygons = [
+            [self.ring_coordinates(ring).tolist() for ring in polygon]
+            for polygon in self.geometries[index]
+        ]
+        if len(polygons) == 1:
+            return {"type": "Polygon", "coordinates": polygons[0]}
+        return {"type": "MultiPolygon", "coordinates": polygons}
+
+
+def _valid_ring(ring: np.ndarray) -> bool:
+    return len(ring) >= 4 and len(np.unique(ring[:-1], axis=0)) >= 3 and ring_area(*ring[:-1].T) > 0
+
+
+class SimplificationLevels:
+    """District geometries at full resolution and at each simplification level"""
+
+    def __init__(self, registry: DistrictRegistry):
+        self.registry = registry
+        self.topology = Topology.build(registry)
+        self.tolerances = tuple(tolerance_for_zoom(zoom) for zoom in SIMPLIFY_ZOOMS)
+        self._topologies: Dict[float, Topology] = {}
+        self._geometries: Dict[float, List[dict]] = {}
+
+    def level_for(self, zoom: Optional[int] = None, tolerance: Optional[float] = None) -> Optional[float]:
+        """
+        Tolerance of the coarsest level that is no coarser than requested,
+        or None for full resolution. An explicit tolerance wins over zoom.
+        """
+        if tolerance is None:
+            if zoom is None or zoom > SIMPLIFY_ZOOMS[-1]:
+                return None
+            tolerance = tolerance_for_zoom(max(zoom, SIMPLIFY_ZOOMS[0]))
+        candidates = [level for level in self.tolerances if level <= tolerance * (1 + 1e-9)]
+        return max(candidates) if candidates else None
+
+    def topology_at(self, level: Optional[float]) -> Topology:
+        """Arcs and rings at a level, computed on first use"""
+        if level is None:
+            return self.topology
+        topology = self._topologies.get(level)
+        if topology is None:
+            topology = self._topologies[level] = self.topology.simplified(level)
+        return topology
+
+    def geometries(self, level: Optional[float]) -> List[dict]:
+        """Geometry of every registry record at a level, computed on first use"""
+        if level is None:
+            return [record.geometry for record in self.registry.records]
+        geometries = self._geometries.get(level)
+        if geometries is None:
+            topology = self.topology_at(level)
+            geometries = [topology.geometry(i) for i in range(len(self.registry.records))]
+            self._geometries[level] = geometries
+        return geometries
+
+    def build_all(self):
+        """Precompute every level"""
+        for level in self.tolerances:
+            self.geometries(level)
+
+
+_levels: Dict[str, SimplificationLevels] = {}
+
+
+def get_simplification_levels(registry: DistrictRegistry = DISTRICT_REGISTRY) -> SimplificationLevels:
+    """Simplification levels for a registry, built on first use"""
+    levels = _levels.get(registry.signature)
+    if levels is None:
+        levels = _levels[registry.signature] = SimplificationLevels(registry)
+    return levels
@@ -0,0 +1,188 @@
+"""
+SQLite climate store
+Schema creation for writers and a bounded pool of read-only connections
+"""
+import asyncio
+import sqlite3
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, List, Optional
+
+import aiosqlite
+
+from app import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS districts (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    region TEXT NOT NULL,
+    area_km2 REAL,
+    population INTEGER,
+    centroid_lat REAL,
+    centroid_lng REAL,
+    geometry TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS climate_data (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    district_id TEXT NOT NULL,
+    variable TEXT NOT NULL,
+    period TEXT NOT NULL,
+    scenario TEXT NOT NULL,
+    value REAL NOT NULL,
+    p10 REAL,  -- Ensemble percentiles across models
+    p50 REAL,
+    p90 REAL,
+    unit TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (district_id) REFERENCES districts(id),
+    UNIQUE(district_id, variable, period, scenario)
+);
+
+CREATE TABLE IF NOT EXISTS variables (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    unit TEXT NOT NULL,
+    category TEXT,
+    color_scale TEXT,
+    min_value REAL,
+    max_value REAL
+);
+
+CREATE INDEX IF NOT EXISTS idx_climate_district ON climate_data(district_id);
+CREATE INDEX IF NOT EXISTS idx_climate_variable ON climate_data(variable);
+CREATE INDEX IF NOT EXISTS idx_climate_lookup ON climate_data(variable, period, scenario);
+"""
+
+# Statements are kept in each connection's prepared statement cache
+SELECT_VARIABLES = "SELECT id, name, description, unit, category, color_scale FROM variables ORDER BY rowid"
+SELECT_CLIMATE_COLUMN = (
+    "SELECT district_id, value, p10, p50, p90 FROM climate_data "
+    "WHERE variable = ? AND period = ? AND scenario = ?"
+)
+# Stores created before the percentile columns existed
+SELECT_CLIMATE_COLUMN_WITHOUT_BANDS = (
+    "SELECT district_id, value, NULL, NULL, NULL FROM climate_data "
+    "WHERE variable = ? AND period = ? AND scenario = ?"
+)
+SELECT_CLIMATE_COLUMNS_INFO = "SELECT name FROM pragma_table_info('climate_data')"
+SELECT_JOBS_COLUMNS_INFO = "SELECT name FROM pragma_table_info('jobs')"
+UPSERT_CLIMATE_VALUE = (
+    "INSERT INTO climate_data (district_id, variable, period, scenario, value, p10, p50, p90, unit) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(district_id, variable, period, scenario) DO UPDATE SET "
+    "value = excluded.value, p10 = excluded.p10, p50 = excluded.p50, p90 = excluded.p90, "
+    "unit = excluded.unit"
+)
+UPSERT_VARIABLE = (
+    "INSERT OR REPLACE INTO variables (id, name, description, unit, category, color_scale) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+UPSERT_DISTRICT = (
+    "INSERT OR IGNORE INTO districts (id, name, region, area_km2, population, centroid_lat, centroid_lng, geometry) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+JOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    params TEXT NOT NULL,  -- JSON
+    cache_key TEXT NOT NULL,  -- Job type, parameters and dataset version
+    status TEXT NOT NULL,  -- queued, running, succeeded or failed
+    owner TEXT,  -- "<pid>:<instance id>" of the API process running the job
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_cache_key ON jobs(cache_key, status);
+"""
+
+
+def create_database(path: Path) -> sqlite3.Connection:
+    """Open (or create) the store for writing, with the schema in place and WAL enabled"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+
+    # Add columns introduced after the store was first created
+    columns = {row[0] for row in conn.execute(SELECT_CLIMATE_COLUMNS_INFO)}
+    for column in ("p10", "p50", "p90"):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE climate_data ADD COLUMN {column} REAL")
+    return conn
+
+
+def create_jobs_database(path: Path) -> sqlite3.Connection:
+    """Open (or create) the background job table; rows come back as sqlite3.Row"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(JOBS_SCHEMA)
+
+    # Add columns introduced after the table was first created
+    columns = {row[0] for row in conn.execute(SELECT_JOBS_COLUMNS_INFO)}
+    if "owner" not in columns:
+        conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+    return conn
+
+
+class ConnectionPool:
+    """
+    Fixed-size pool of read-only aiosqlite connections.
+
+    Callers wait for a free connection instead of opening new ones, so the
+    number of open file handles and SQLite page caches stays bounded.
+    """
+
+    def __init__(self, path: Path, size: int = config.DB_POOL_SIZE, mmap_size: int = config.DB_MMAP_SIZE):
+        self.path = path
+        self.size = size
+        self.mmap_size = mmap_size
+        self._connections: List[aiosqlite.Connection] = []
+        self._idle: Optional[asyncio.Queue] = None
+
+    async def open(self):
+        self._idle = asyncio.Queue(maxsize=self.size)
+        for _ in range(self.size):
+            conn = await aiosqlite.connect(
+                f"file:{self.path}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+                cached_statements=64,
+            )
+            # The writer enables WAL; readers memory-map the file and refuse writes
+            await conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            await conn.execute("PRAGMA query_only=ON")
+            self._connections.append(conn)
+            self._idle.put_nowait(conn)
+
+    async def close(self):
+        for conn in self._connections:
+            await conn.close()
+        self._connections = []
+        self._idle = None
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiosqlite.Connection]:
+        if self._idle is None:
+            raise RuntimeError("Connection pool is not open")
+        conn = await self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put_nowait(conn)
+
+    async def fetch_all(self, query: str, params: tuple = ()) -> List[tuple]:
+        async with self.acquire() as conn:
+            async with conn.execute(query, params) as cursor:
+                return await cursor.fetchall()
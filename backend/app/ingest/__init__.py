@@ -0,0 +1 @@
+# Climate data ingestion
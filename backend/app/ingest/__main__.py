@@ -0,0 +1,132 @@
+"""
+Ingestion CLI
+Builds the climate store from CORDEX daily NetCDF files or district Excel tables
+
+    python -m app.ingest netcdf raw/ --workers 4
+    python -m app.ingest excel ghana_atlas.xlsx
+"""
+import argparse
+import logging
+import os
+import tempfile
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Set
+
+from app import config
+from app.data.district_registry import DISTRICT_REGISTRY
+from app.database import UPSERT_CLIMATE_VALUE, UPSERT_VARIABLE, create_database
+from app.ingest.excel import ensemble_statistics
+from app.ingest.indices import INDEX_VARIABLES
+from app.ingest.netcdf import discover_runs
+from app.ingest.pipeline import EXPERIMENT_PERIODS, run_pipeline
+from app.services.climate_service import write_districts
+
+logger = logging.getLogger(__name__)
+
+# (period, scenario) columns the store holds for every variable
+STORED_COLUMNS = {(period, scenario) for scenario, periods in EXPERIMENT_PERIODS.items() for period in periods}
+# Unknown ids listed in an error before the rest are counted
+MAX_LISTED_IDS = 10
+
+
+def _listed(ids: Iterable) -> str:
+    ids = sorted(map(str, ids))
+    more = f" and {len(ids) - MAX_LISTED_IDS} more" if len(ids) > MAX_LISTED_IDS else ""
+    return ", ".join(ids[:MAX_LISTED_IDS]) + more
+
+
+def ingest_netcdf(args):
+    runs = discover_runs(args.input)
+    if not runs:
+        raise SystemExit(f"No tas/tasmax/pr NetCDF files found in {args.input}")
+
+    with tempfile.TemporaryDirectory(dir=args.work_dir) as work_dir:
+        run_pipeline(runs, args.db, Path(work_dir), args.workers, args.chunk_days)
+    print(f"Ingested {len(runs)} model runs into {args.db}")
+
+
+def _complete_variables(statistics: dict, district_ids: Set[str]) -> Set[str]:
+    """
+    Variables with a value for every district in every stored column; the
+    server cannot load the others, so they are written but not registered
+    """
+    unknown_districts = {district_id for district_id, _, _, _ in statistics} - district_ids
+    unknown_columns = {(period, scenario) for _, _, period, scenario in statistics} - STORED_COLUMNS
+    if unknown_districts or unknown_columns:
+        problems = []
+        if unknown_districts:
+            problems.append(f"unknown district ids: {_listed(unknown_districts)}")
+        if unknown_columns:
+            problems.append(
+                f"unknown period/scenario pairs: {_listed(f'{p}/{s}' for p, s in unknown_columns)} "
+                f"(expected {_listed(f'{p}/{s}' for p, s in STORED_COLUMNS)})"
+            )
+        raise SystemExit("Nothing ingested; the workbook has " + "; ".join(problems))
+
+    expected = len(district_ids) * len(STORED_COLUMNS)
+    counts = Counter(variable for _, variable, _, _ in statistics)
+    known = {var["id"] for var in INDEX_VARIABLES}
+    for variable, count in sorted(counts.items()):
+        if variable not in known:
+            logger.warning("Variable %s is not a known climate index and will not be served", variable)
+        elif count < expected:
+            logger.warning(
+                "Variable %s is missing %d of %d district values and will not be served",
+                variable, expected - count, expected,
+            )
+    complete = {variable for variable, count in counts.items() if variable in known and count == expected}
+    if not complete:
+        raise SystemExit("Nothing ingested; no climate index has a value for every district, period and scenario")
+    return complete
+
+
+def ingest_excel(args):
+    statistics = ensemble_statistics(args.input)
+    complete = _complete_variables(statistics, {record.id for record in DISTRICT_REGISTRY.records})
+    units = {var["id"]: var["unit"] for var in INDEX_VARIABLES}
+
+    conn = create_database(args.db)
+    with conn:
+        write_districts(conn)
+        conn.executemany(UPSERT_CLIMATE_VALUE, (
+            (district_id, variable, period, scenario, *values, units.get(variable))
+            for (district_id, variable, period, scenario), values in statistics.items()
+        ))
+        # Only variables with every district, period and scenario can be served
+        conn.executemany(UPSERT_VARIABLE, (
+            (var["id"], var["name"], var["description"], var["unit"], var["category"], var["color_scale"])
+            for var in INDEX_VARIABLES
+            if var["id"] in complete
+        ))
+    conn.close()
+    served = ", ".join(var["id"] for var in INDEX_VARIABLES if var["id"] in complete) or "none"
+    print(f"Ingested {len(statistics)} district values into {args.db}; variables served: {served}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest climate projections into the SQLite climate store")
+    parser.add_argument("--db", type=Path, default=config.CLIMATE_DB_PATH, help="Path to the SQLite file")
+    subparsers = parser.add_subparsers(dest="source", required=True)
+
+    netcdf = subparsers.add_parser("netcdf", help="Daily CORDEX NetCDF files (tas, tasmax, pr)")
+    netcdf.add_argument("input", type=Path, help="Directory of NetCDF files")
+    netcdf.add_argument("--workers", type=int, default=max(1, min(4, (os.cpu_count() or 2) - 1)),
+                        help="Model runs processed in parallel")
+    netcdf.add_argument("--chunk-days", type=int, default=92,
+                        help="Days read per chunk; bounds memory per worker")
+    netcdf.add_argument("--work-dir", type=Path, default=None,
+                        help="Directory for memory-mapped intermediate grids")
+    netcdf.set_defaults(handler=ingest_netcdf)
+
+    excel = subparsers.add_parser("excel", help="District-level Excel table")
+    excel.add_argument("input", type=Path, help="Excel workbook (.xlsx)")
+    excel.set_defaults(handler=ingest_excel)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Streaming reader for district-level Excel tables
+Expected columns: district_id, variable, period, scenario, value and an
+optional model column; rows from several models are averaged.
+"""
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+REQUIRED_COLUMNS = ("district_id", "variable", "period", "scenario", "value")
+
+
+def iter_excel_rows(path: Path) -> Iterator[Tuple[str, str, str, str, float]]:
+    """Yield (district_id, variable, period, scenario, value) rows without loading the workbook"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:
+        raise RuntimeError("Excel ingestion requires the openpyxl package (pip install openpyxl)") from exc
+
+    workbook = load_workbook(str(path), read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            rows = sheet.iter_rows(values_only=True)
+            header = [str(cell).strip().lower() if cell is not None else "" for cell in next(rows, ())]
+            if not all(column in header for column in REQUIRED_COLUMNS):
+                continue
+            columns = [header.index(column) for column in REQUIRED_COLUMNS]
+            for row in rows:
+                district_id, variable, period, scenario, value = (row[c] for c in columns)
+                if district_id is None or value is None:
+                    continue
+                yield str(district_id), str(variable), str(period), str(scenario), float(value)
+    finally:
+        workbook.close()
+
+
+def ensemble_statistics(path: Path) -> Dict[Tuple[str, str, str, str], Tuple[float, float, float, float]]:
+    """(mean, p10, p50, p90) over models for every (district_id, variable, period, scenario)"""
+    values: Dict[Tuple[str, str, str, str], List[float]] = defaultdict(list)
+    for district_id, variable, period, scenario, value in iter_excel_rows(path):
+        values[(district_id, variable, period, scenario)].append(value)
+
+    statistics = {}
+    for key, model_values in values.items():
+        p10, p50, p90 = np.percentile(model_values, (10, 50, 90)).tolist()
+        statistics[key] = (
+            round(sum(model_values) / len(model_values), 1),
+            round(p10, 1),
+            round(p50, 1),
+            round(p90, 1),
+        )
+    return statistics
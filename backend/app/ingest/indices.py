@@ -0,0 +1,162 @@
+"""
+Climate indices computed from daily model output
+Each accumulator consumes one year in time chunks and returns annual grids
+"""
+from typing import Dict
+
+import numpy as np
+
+from app.data.mock_data import CLIMATE_VARIABLES
+
+# Plan indices not in the mock variable list
+EXTRA_INDEX_VARIABLES = [
+    {
+        "id": "extreme_hot_days",
+        "name": "Extreme Hot Days",
+        "description": "Number of days per year with maximum temperature above 40°C",
+        "unit": "days",
+        "category": "temperature",
+        "color_scale": "hot_days",
+    },
+    {
+        "id": "cooling_degree_days",
+        "name": "Cooling Degree Days",
+        "description": "Sum of daily mean temperature above 24°C over the year",
+        "unit": "°C days",
+        "category": "temperature",
+        "color_scale": "temperature",
+    },
+    {
+        "id": "heavy_rain_days",
+        "name": "Heavy Rain Days",
+        "description": "Number of days per year with more than 20mm precipitation",
+        "unit": "days",
+        "category": "precipitation",
+        "color_scale": "precipitation",
+    },
+    {
+        "id": "max_consecutive_dry",
+        "name": "Maximum Consecutive Dry Days",
+        "description": "Longest run of days with less than 1mm precipitation in the year",
+        "unit": "days",
+        "category": "precipitation",
+        "color_scale": "dry_days",
+    },
+]
+
+INDEX_VARIABLES = CLIMATE_VARIABLES + EXTRA_INDEX_VARIABLES
+
+HOT_DAY_THRESHOLD = 35.0  # °C
+EXTREME_HOT_DAY_THRESHOLD = 40.0  # °C
+COOLING_BASE = 24.0  # °C
+DRY_DAY_THRESHOLD = 1.0  # mm
+HEAVY_RAIN_THRESHOLD = 20.0  # mm
+WET_SEASON_MONTHS = (4, 5, 6, 7, 8, 9, 10)  # April-October
+
+
+class MeanTemperatureIndices:
+    """Indices from daily mean temperature (tas, °C)"""
+    source = "tas"
+    indices = ("annual_mean_temp", "cooling_degree_days")
+
+    def __init__(self, shape):
+        self.total = np.zeros(shape)
+        self.cooling = np.zeros(shape)
+        self.days = 0
+
+    def update(self, data: np.ndarray, months: np.ndarray):
+        self.total += data.sum(axis=0)
+        self.cooling += np.maximum(data - COOLING_BASE, 0).sum(axis=0)
+        self.days += data.shape[0]
+
+    def finish_year(self) -> Dict[str, np.ndarray]:
+        result = {
+            "annual_mean_temp": self.total / max(self.days, 1),
+            "cooling_degree_days": self.cooling.copy(),
+        }
+        self.total[:] = 0
+        self.cooling[:] = 0
+        self.days = 0
+        return result
+
+
+class MaxTemperatureIndices:
+    """Indices from daily maximum temperature (tasmax, °C)"""
+    source = "tasmax"
+    indices = ("annual_max_temp", "very_hot_days", "extreme_hot_days")
+
+    def __init__(self, shape):
+        self.total = np.zeros(shape)
+        self.hot = np.zeros(shape)
+        self.extreme = np.zeros(shape)
+        self.days = 0
+
+    def update(self, data: np.ndarray, months: np.ndarray):
+        self.total += data.sum(axis=0)
+        self.hot += (data > HOT_DAY_THRESHOLD).sum(axis=0)
+        self.extreme += (data > EXTREME_HOT_DAY_THRESHOLD).sum(axis=0)
+        self.days += data.shape[0]
+
+    def finish_year(self) -> Dict[str, np.ndarray]:
+        result = {
+            "annual_max_temp": self.total / max(self.days, 1),
+            "very_hot_days": self.hot.copy(),
+            "extreme_hot_days": self.extreme.copy(),
+        }
+        for array in (self.total, self.hot, self.extreme):
+            array[:] = 0
+        self.days = 0
+        return result
+
+
+class RainfallIndices:
+    """Indices from daily precipitation (pr, mm/day)"""
+    source = "pr"
+    indices = (
+        "annual_precipitation",
+        "wet_season_precipitation",
+        "dry_days",
+        "heavy_rain_days",
+        "max_consecutive_dry",
+    )
+
+    def __init__(self, shape):
+        self.total = np.zeros(shape)
+        self.wet_season = np.zeros(shape)
+        self.dry = np.zeros(shape)
+        self.heavy = np.zeros(shape)
+        # Dry spell carried over from the previous chunk, and the longest so far
+        self.run = np.zeros(shape)
+        self.longest = np.zeros(shape)
+
+    def update(self, data: np.ndarray, months: np.ndarray):
+        in_wet_season = np.isin(months, WET_SEASON_MONTHS)
+        dry = data < DRY_DAY_THRESHOLD
+
+        self.total += data.sum(axis=0)
+        self.wet_season += data[in_wet_season].sum(axis=0)
+        self.dry += dry.sum(axis=0)
+        self.heavy += (data > HEAVY_RAIN_THRESHOLD).sum(axis=0)
+
+        # Run length at day t is t minus the index of the last wet day;
+        # days before the first wet day extend the carried-over spell
+        steps = np.arange(data.shape[0]).reshape(-1, *([1] * (data.ndim - 1)))
+        last_wet = np.maximum.accumulate(np.where(dry, -1, steps), axis=0)
+        runs = np.where(last_wet < 0, self.run + steps + 1, steps - last_wet)
+        self.longest = np.maximum(self.longest, runs.max(axis=0))
+        self.run = runs[-1].astype(float)
+
+    def finish_year(self) -> Dict[str, np.ndarray]:
+        result = {
+            "annual_precipitation": self.total.copy(),
+            "wet_season_precipitation": self.wet_season.copy(),
+            "dry_days": self.dry.copy(),
+            "heavy_rain_days": self.heavy.copy(),
+            "max_consecutive_dry": self.longest.copy(),
+        }
+        for array in (self.total, self.wet_season, self.dry, self.heavy, self.run, self.longest):
+            array[:] = 0
+        return result
+
+
+INDEX_ACCUMULATORS = (MeanTemperatureIndices, MaxTemperatureIndices, RainfallIndices)
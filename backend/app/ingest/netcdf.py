@@ -0,0 +1,122 @@
+"""
+Streaming NetCDF reader for CORDEX daily model output
+Files are read one time chunk at a time and never loaded whole
+"""
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Set, Tuple
+
+import numpy as np
+
+SOURCE_VARIABLES = ("tas", "tasmax", "pr")
+
+
+class ModelRun(NamedTuple):
+    """All daily files of one model under one experiment"""
+    model: str
+    experiment: str
+    files: Dict[str, List[Path]]  # source variable -> files in time order
+
+
+def parse_filename(path: Path) -> Tuple[str, str, str]:
+    """
+    (variable, model, experiment) from a CORDEX file name, e.g.
+    tasmax_AFR-44_ICHEC-EC-EARTH_rcp85_r1i1p1_SMHI-RCA4_v1_day_20060101-20101231.nc
+    Short names of the form tasmax_MODEL_rcp85.nc are also accepted.
+    """
+    parts = path.stem.split("_")
+    if len(parts) >= 6:
+        return parts[0], f"{parts[2]}_{parts[5]}", parts[3]
+    if len(parts) >= 3:
+        return parts[0], parts[1], parts[2]
+    raise ValueError(f"Cannot parse model and experiment from {path.name}")
+
+
+def discover_runs(input_dir: Path) -> List[ModelRun]:
+    """Group the NetCDF files in a directory into model runs"""
+    grouped: Dict[Tuple[str, str], Dict[str, List[Path]]] = defaultdict(lambda: defaultdict(list))
+    for path in sorted(input_dir.glob("*.nc")):
+        variable, model, experiment = parse_filename(path)
+        if variable in SOURCE_VARIABLES:
+            grouped[(model, experiment)][variable].append(path)
+
+    return [
+        ModelRun(model, experiment, dict(files))
+        for (model, experiment), files in sorted(grouped.items())
+    ]
+
+
+def _netcdf4():
+    try:
+        import netCDF4
+    except ImportError as exc:
+        raise RuntimeError("NetCDF ingestion requires the netCDF4 package (pip install netCDF4)") from exc
+    return netCDF4
+
+
+def _open_dataset(path: Path):
+    return _netcdf4().Dataset(str(path))
+
+
+def _to_standard_units(data: np.ndarray, variable: str, units: str) -> np.ndarray:
+    """Convert temperatures to °C and precipitation to mm/day"""
+    units = units.strip()
+    if variable in ("tas", "tasmax") and units in ("K", "kelvin"):
+        return data - 273.15
+    if variable == "pr" and units in ("kg m-2 s-1", "kg/m2/s", "kg m**-2 s**-1"):
+        return data * 86400.0
+    return data
+
+
+def read_grid(path: Path) -> Tuple[np.ndarray, np.ndarray]:
+    """2D latitude and longitude of the grid cell centres"""
+    with _open_dataset(path) as ds:
+        lat = np.asarray(ds.variables["lat"][:], dtype=float)
+        lon = np.asarray(ds.variables["lon"][:], dtype=float)
+    if lat.ndim == 1:
+        lon, lat = np.meshgrid(lon, lat)
+    return lat, lon
+
+
+def iter_year_chunks(
+    paths: List[Path],
+    variable: str,
+    chunk_days: int,
+    years_wanted: Set[int],
+) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+    """
+    Yield (year, months, data) with data of shape (days, y, x).
+
+    Chunks never span a year boundary and hold at most chunk_days days,
+    so memory use depends on the grid size, not the file length. Years
+    outside years_wanted are never read.
+    """
+    netCDF4 = _netcdf4()
+
+    for path in paths:
+        with _open_dataset(path) as ds:
+            time = ds.variables["time"]
+            dates = netCDF4.num2date(time[:], time.units, getattr(time, "calendar", "standard"))
+            years = np.array([d.year for d in dates])
+            months = np.array([d.month for d in dates])
+
+            values = ds.variables[variable]
+            values.set_auto_mask(False)
+            units = getattr(values, "units", "")
+            fill_value = getattr(values, "_FillValue", None)
+
+            # Split at year boundaries, then into chunks of at most chunk_days
+            boundaries = np.flatnonzero(np.diff(years)) + 1
+            for start, stop in zip(np.r_[0, boundaries], np.r_[boundaries, len(years)]):
+                if int(years[start]) not in years_wanted:
+                    continue
+                for chunk_start in range(start, stop, chunk_days):
+                    chunk_stop = min(chunk_start + chunk_days, stop)
+                    data = np.asarray(values[chunk_start:chunk_stop], dtype=float)
+                    if fill_value is not None:
+                        data[data == fill_value] = np.nan
+                    yield (
+                        int(years[chunk_start]),
+                        months[chunk_start:chunk_stop],
+                        _to_standard_units(data, variable, units),
+                    )
@@ -0,0 +1,190 @@
+"""
+Ingestion pipeline
+Computes climate indices per model run in a process pool, aggregates them
+to districts and writes the ensemble into the climate store
+"""
+import logging
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from app.data.district_registry import DISTRICT_REGISTRY, DistrictRegistry
+from app.database import UPSERT_CLIMATE_VALUE, UPSERT_VARIABLE, create_database
+from app.ingest.indices import INDEX_ACCUMULATORS, INDEX_VARIABLES
+from app.ingest.netcdf import ModelRun, iter_year_chunks, read_grid
+from app.services.climate_cube import PERIOD_YEARS
+from app.services.climate_service import write_districts
+from app.services.zonal_stats import ZonalWeights, get_zonal_weights
+
+logger = logging.getLogger(__name__)
+
+EXPERIMENT_PERIODS = {
+    "historical": ("baseline",),
+    "rcp45": ("2030", "2050", "2080"),
+    "rcp85": ("2030", "2050", "2080"),
+}
+INDEX_IDS = tuple(var["id"] for var in INDEX_VARIABLES)
+BAND_PERCENTILES = (10, 50, 90)
+PERIOD_IDS = tuple(PERIOD_YEARS)
+
+
+class RunResult(NamedTuple):
+    """Period-mean index grids of one model run, stored as a .npy file"""
+    model: str
+    experiment: str
+    path: Path  # shape (index, period, y, x)
+    lat: np.ndarray
+    lon: np.ndarray
+
+
+def process_run(run: ModelRun, work_dir: Path, chunk_days: int) -> RunResult:
+    """
+    Compute period means of every index for one model run.
+
+    Runs in a worker process. Only one time chunk and a few (y, x)
+    accumulators are held in memory; period sums live in a memory-mapped
+    file that the parent reads back without copying through the pool.
+    """
+    periods = EXPERIMENT_PERIODS.get(run.experiment, ())
+    years_wanted = {
+        year
+        for period in periods
+        for year in range(PERIOD_YEARS[period][0], PERIOD_YEARS[period][1] + 1)
+    }
+
+    lat, lon = read_grid(next(iter(run.files.values()))[0])
+    path = work_dir / f"{run.model}_{run.experiment}.npy"
+    sums = np.lib.format.open_memmap(
+        path, mode="w+", dtype=np.float64, shape=(len(INDEX_IDS), len(PERIOD_IDS)) + lat.shape
+    )
+    sums[:] = 0
+    years = np.zeros((len(INDEX_IDS), len(PERIOD_IDS)))
+
+    def add_year(year: int, annual: Dict[str, np.ndarray]):
+        for p, period in enumerate(PERIOD_IDS):
+            first, last = PERIOD_YEARS[period]
+            if period in periods and first <= year <= last:
+                for index_id, grid in annual.items():
+                    i = INDEX_IDS.index(index_id)
+                    sums[i, p] += grid
+                    years[i, p] += 1
+
+    for accumulator_class in INDEX_ACCUMULATORS:
+        paths = run.files.get(accumulator_class.source)
+        if not paths:
+            continue
+        accumulator = accumulator_class(lat.shape)
+        current_year = None
+        for year, months, data in iter_year_chunks(paths, accumulator_class.source, chunk_days, years_wanted):
+            if current_year is not None and year != current_year:
+                add_year(current_year, accumulator.finish_year())
+            current_year = year
+            accumulator.update(data, months)
+        if current_year is not None:
+            add_year(current_year, accumulator.finish_year())
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sums[:] = sums / years[:, :, None, None]
+    sums.flush()
+    del sums
+
+    return RunResult(run.model, run.experiment, path, lat, lon)
+
+
+def ensemble_by_experiment(
+    results: List[RunResult],
+    registry: DistrictRegistry,
+) -> Dict[str, np.ndarray]:
+    """District values of every run, stacked per experiment as (model, index, period, district)"""
+    zonal_weights: Dict[tuple, ZonalWeights] = {}
+    stacked: Dict[str, List[np.ndarray]] = {}
+
+    for result in results:
+        key = (result.lat.shape, result.lat.tobytes(), result.lon.tobytes())
+        if key not in zonal_weights:
+            zonal_weights[key] = get_zonal_weights(result.lat, result.lon, registry)
+
+        # (index, period, y, x) grids -> (index, period, district)
+        district_values = zonal_weights[key].mean(np.load(result.path, mmap_mode="r"))
+        stacked.setdefault(result.experiment, []).append(district_values)
+
+    return {experiment: np.stack(runs) for experiment, runs in stacked.items()}
+
+
+def write_ensemble(
+    db_path: Path,
+    ensembles: Dict[str, np.ndarray],
+    registry: DistrictRegistry,
+):
+    """Write the ensemble mean and percentiles of every (index, period, scenario) column into the store"""
+    positions = {}
+    for position, record in enumerate(registry.records):
+        positions.setdefault(record.id, position)
+
+    conn = create_database(db_path)
+    with conn:
+        write_districts(conn, registry)
+        written: Dict[str, int] = {}
+        for scenario, runs in ensembles.items():
+            with warnings.catch_warnings():
+                # Cells or districts without data in any model stay NaN
+                warnings.simplefilter("ignore", RuntimeWarning)
+                means = np.nanmean(runs, axis=0)
+                # Percentiles across the model axis, computed once here rather than per view
+                bands = np.round(np.nanpercentile(runs, BAND_PERCENTILES, axis=0), 1)
+            for i, var in enumerate(INDEX_VARIABLES):
+                for period in EXPERIMENT_PERIODS.get(scenario, ()):
+                    p = PERIOD_IDS.index(period)
+                    column = means[i, p]
+                    if np.isnan(column).all():
+                        continue
+                    conn.executemany(UPSERT_CLIMATE_VALUE, (
+                        (
+                            district_id, var["id"], period, scenario, round(float(column[position]), 1),
+                            *bands[:, i, p, position].tolist(), var["unit"],
+                        )
+                        for district_id, position in positions.items()
+                        if not np.isnan(column[position])
+                    ))
+                    written[var["id"]] = written.get(var["id"], 0) + 1
+
+        # Only variables with every period and scenario can be served
+        complete = sum(len(periods) for periods in EXPERIMENT_PERIODS.values())
+        conn.executemany(UPSERT_VARIABLE, (
+            (var["id"], var["name"], var["description"], var["unit"], var["category"], var["color_scale"])
+            for var in INDEX_VARIABLES
+            if written.get(var["id"]) == complete
+        ))
+    conn.close()
+
+
+def run_pipeline(
+    runs: List[ModelRun],
+    db_path: Path,
+    work_dir: Path,
+    workers: int,
+    chunk_days: int,
+    registry: DistrictRegistry = DISTRICT_REGISTRY,
+) -> Optional[Dict[str, np.ndarray]]:
+    """Process every model run in parallel and write the ensemble to the store"""
+    work_dir.mkdir(parents=True, exist_ok=True)
+    results = []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(process_run, run, work_dir, chunk_days): run for run in runs}
+        for future in as_completed(futures):
+            run = futures[future]
+            results.append(future.result())
+            logger.info("Processed %s %s", run.model, run.experiment)
+
+    if not results:
+        return None
+
+    # Sort so the model axis has a stable order regardless of completion order
+    results.sort(key=lambda r: (r.experiment, r.model))
+    ensembles = ensemble_by_experiment(results, registry)
+    write_ensemble(db_path, ensembles, registry)
+    return ensembles
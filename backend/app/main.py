@@ -2,29 +2,73 @@
 Ghana Climate Atlas - FastAPI Backend
 Serves climate projection data for Ghana districts
 """
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+
+from app import config, metrics
+from app.caching import ConditionalGetMiddleware, DatasetSnapshotMiddleware
+from app.profiling import sampling_profiler
+from app.routers import admin, climate, districts, export, jobs, tiles
+from app.services import climate_service
+from app.services.datasets import dataset_manager
+from app.services.jobs import job_manager
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the climate cube before serving the first request
+    await climate_service.initialize()
+    # The boundary collection is the largest response; build it up front
+    districts.warm_response_cache()
+    # Reports and large exports run in worker processes, off the event loop
+    job_manager.start()
+    # New versions of the climate store are swapped in without a restart
+    dataset_manager.start(warm=[districts.warm_response_cache])
+    # Stack profiles of slow requests, when enabled
+    if config.PROFILE_SLOW_REQUESTS > 0:
+        sampling_profiler.start()
+    yield
+    sampling_profiler.stop()
+    await dataset_manager.stop()
+    await job_manager.stop()
 
-from app.routers import climate, districts
 
 app = FastAPI(
     title="Ghana Climate Atlas API",
     description="API for Ghana climate projections based on KAPy/CORDEX-Africa data",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
-# CORS middleware for frontend
+# ETags and Cache-Control for data that only changes on re-ingest
+app.add_middleware(ConditionalGetMiddleware)
+
+# Each request sees one dataset snapshot from start to finish, across reloads
+app.add_middleware(DatasetSnapshotMiddleware)
+
+# Latency, size, phase and cache metrics per route, including the 304s answered above it
+app.add_middleware(metrics.MetricsMiddleware)
+
+# CORS middleware for frontend (outermost, so 304 responses carry CORS headers too)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://localhost:3000"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Dataset-Version", "X-Grid-Shape", "X-Grid-Bounds"],
 )
 
 # Include routers
 app.include_router(districts.router, prefix="/api/districts", tags=["districts"])
 app.include_router(climate.router, prefix="/api/climate", tags=["climate"])
+app.include_router(tiles.router, prefix="/api/tiles", tags=["tiles"])
+app.include_router(export.router, prefix="/api/export", tags=["export"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 
 
 @app.get("/")
@@ -38,4 +82,9 @@ async def root():
 
 @app.get("/api/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {"status": "healthy", "dataset_version": climate_service.get_dataset_version()}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,263 @@
+"""
+Request metrics
+Per-route latency and response size histograms, the time endpoints spend
+building data versus serializing it, and response cache hits and misses,
+exposed in the Prometheus text format. Slow requests are logged with
+their parameters and, when the profiler runs, profiled.
+"""
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import config
+from app.profiling import sampling_profiler
+
+logger = logging.getLogger(__name__)
+
+# Starlette adds the charset
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_label_text(self.labels, labels)} {_number(value)}"
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # Per label set: count in each bucket (the last is +Inf), sum
+        self._values: Dict[Labels, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Labels, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(labels, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            values = sorted((labels, list(counts), total[0]) for labels, (counts, total) in self._values.items())
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_label_text(self.labels, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_label_text(self.labels, labels)} {_number(total)}"
+            yield f"{self.name}_count{_label_text(self.labels, labels)} {cumulative}"
+
+
+class Gauge:
+    """Values read when the metrics are scraped"""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str], read: Callable[[], Dict[Labels, float]]):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.read = read
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} gauge"
+        for labels, value in sorted(self.read().items()):
+            yield f"{self.name}{_label_text(self.labels, labels)} {_number(value)}"
+
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by route, method and status", ("route", "method", "status"))
+LATENCY = Histogram(
+    "http_request_duration_seconds", "Time from receiving a request to sending the last byte of its response",
+    ("route", "method"), LATENCY_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Response body bytes as sent (after compression)", ("route", "method"), SIZE_BUCKETS,
+)
+PHASES = Histogram(
+    "http_request_phase_seconds",
+    "Time a request spent building response data (data) and serializing and compressing it (serialize)",
+    ("route", "phase"), LATENCY_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "response_cache_requests_total", "Response cache lookups by cache, route and result", ("cache", "route", "result"),
+)
+
+_gauges: List[Gauge] = []
+
+
+def register_gauge(name: str, documentation: str, labels: Sequence[str], read: Callable[[], Dict[Labels, float]]):
+    _gauges.append(Gauge(name, documentation, labels, read))
+
+
+def render() -> str:
+    """Every metric in the Prometheus text exposition format"""
+    lines: List[str] = []
+    for metric in (REQUESTS, LATENCY, RESPONSE_SIZE, PHASES, CACHE_LOOKUPS, *_gauges):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class RequestStats:
+    """What one request spent its time on, collected while it runs"""
+
+    __slots__ = ("phases", "cache")
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.cache: List[Tuple[str, bool]] = []
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def observe_phase(phase: str, seconds: float):
+    """Add time spent in a phase ("data" or "serialize") to the current request"""
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.phases[phase] = stats.phases.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_phase(phase, time.perf_counter() - start)
+
+
+def observe_cache(cache: str, hit: bool):
+    """Record a cache lookup; it is counted under the route once the request finishes"""
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.cache.append((cache, hit))
+    else:
+        # Lookups outside a request, e.g. warming the cache at startup or on reload
+        CACHE_LOOKUPS.inc((cache, "background", "hit" if hit else "miss"))
+
+
+def route_label(scope: Scope) -> str:
+    """
+    Path template of the route that served a request (e.g.
+    /api/climate/{variable}), so label values stay few whatever the
+    parameters. Requests answered before routing, such as 304s from the
+    conditional GET middleware, are matched here.
+    """
+    route = scope.get("route")
+    if route is None and "app" in scope:
+        for candidate in scope["app"].router.routes:
+            match, _ = candidate.matches(scope)
+            if match == Match.FULL:
+                route = candidate
+                break
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Records latency, response size, phase times and cache lookups of every
+    HTTP request under its route. Requests slower than
+    SLOW_REQUEST_SECONDS are logged with their query string, and those
+    slower than PROFILE_SLOW_REQUESTS get a stack profile when the
+    sampling profiler is running.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status = 500
+        size = 0
+
+        async def measuring_send(message: Message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, measuring_send)
+        finally:
+            end = time.perf_counter()
+            _request_stats.reset(token)
+            self._record(scope, stats, status, size, start, end)
+
+    def _record(self, scope: Scope, stats: RequestStats, status: int, size: int, start: float, end: float):
+        route = route_label(scope)
+        method = scope["method"]
+        elapsed = end - start
+        REQUESTS.inc((route, method, str(status)))
+        LATENCY.observe((route, method), elapsed)
+        RESPONSE_SIZE.observe((route, method), size)
+        for phase, seconds in stats.phases.items():
+            PHASES.observe((route, phase), seconds)
+        for cache, hit in stats.cache:
+            CACHE_LOOKUPS.inc((cache, route, "hit" if hit else "miss"))
+
+        if config.SLOW_REQUEST_SECONDS and elapsed >= config.SLOW_REQUEST_SECONDS:
+            query = scope["query_string"].decode("latin-1")
+            phases = " ".join(f"{phase}={seconds * 1000:.1f}ms" for phase, seconds in stats.phases.items())
+            logger.warning(
+                "Slow request %s %s%s: %d in %.1f ms, %d bytes %s",
+                method, scope["path"], f"?{query}" if query else "", status, elapsed * 1000, size, phases,
+            )
+        if sampling_profiler.running and elapsed >= config.PROFILE_SLOW_REQUESTS:
+            sampling_profiler.dump(f"{method} {route}", start, end)
@@ -1,7 +1,7 @@
 """
 Pydantic schemas for Ghana Climate Atlas API
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 
 
@@ -54,6 +54,16 @@ class ClimateResponse(BaseModel):
     data: List[ClimateValue]
 
 
+class ClimateProjectionResponse(BaseModel):
+    """Values for any year, interpolated between the periods"""
+    variable: str
+    variable_name: str
+    year: int
+    scenario: str
+    unit: str
+    data: List[ClimateValue]
+
+
 class ClimateComparison(BaseModel):
     """Comparison between baseline and future period"""
     district_id: str
@@ -74,9 +84,214 @@ class ClimateComparisonResponse(BaseModel):
     data: List[ClimateComparison]
 
 
+class ClimateAggregate(BaseModel):
+    """Weighted mean of a region's (or the country's) districts; min and max are of single districts"""
+    name: str
+    district_count: int
+    weight_total: Optional[float] = None  # km² or people; None when unweighted
+    value: float
+    baseline: float
+    change: float
+    change_percent: float
+    min: float
+    max: float
+
+
+class ClimateAggregateResponse(BaseModel):
+    """Response for a regional or national aggregation query"""
+    variable: str
+    variable_name: str
+    period: str
+    scenario: str
+    unit: str
+    level: str
+    weight: str
+    data: List[ClimateAggregate]
+
+
+class RankedDistrict(BaseModel):
+    """A district's value and change for one column"""
+    district_id: str
+    district_name: str
+    region: str
+    baseline: float
+    value: float
+    change: float
+    change_percent: float
+
+
+class ClimateRankingResponse(BaseModel):
+    """Districts ordered by a field, optionally within a range of it"""
+    variable: str
+    variable_name: str
+    period: str
+    scenario: str
+    unit: str
+    by: str
+    order: str
+    min: Optional[float] = None
+    max: Optional[float] = None
+    total: int  # Districts matching the range, before the limit
+    data: List[RankedDistrict]
+
+
+class BatchQuery(BaseModel):
+    """One (variable, period, scenario) column of a batch request"""
+    variable: str
+    period: str = "baseline"
+    scenario: str = "rcp45"
+
+
+class BatchRequest(BaseModel):
+    """Several climate queries answered in one response"""
+    queries: List[BatchQuery]
+
+
+class ClimateRange(BaseModel):
+    """Min/max/mean of a variable across districts"""
+    min: float
+    max: float
+    mean: float
+
+
+class Histogram(BaseModel):
+    """Equal-width histogram; counts[i] falls between edges[i] and edges[i + 1]"""
+    edges: List[float]
+    counts: List[int]
+
+
+class ClimateClasses(BaseModel):
+    """Legend classes of a variable; breaks are the class boundaries from min to max"""
+    variable: str
+    period: str
+    scenario: str
+    unit: str
+    shared: bool
+    change: bool
+    classes: int
+    min: Optional[float] = None
+    max: Optional[float] = None
+    histogram: Histogram
+    quantile: List[float]
+    jenks: List[float]
+
+
+class BatchResult(BaseModel):
+    """Columnar values of one query, in the order of BatchResponse.district_ids"""
+    variable: str
+    period: str
+    scenario: str
+    unit: str
+    values: List[float]
+    change: List[float]
+    change_percent: List[float]
+    range: ClimateRange
+
+
+class BatchResponse(BaseModel):
+    """Response for a batch climate query"""
+    district_ids: List[str]
+    district_names: List[str]
+    results: List[BatchResult]
+
+
+class LatLng(BaseModel):
+    """A point in WGS84 degrees"""
+    lat: float = Field(..., ge=-90, le=90)
+    lng: float = Field(..., ge=-180, le=180)
+
+
+class LocateRequest(BaseModel):
+    """Points to resolve to districts in one request"""
+    points: List[LatLng]
+
+
+class DistrictLocation(BaseModel):
+    """District containing a point; the district fields are null when no district does"""
+    lat: float
+    lng: float
+    district_id: Optional[str] = None
+    district_name: Optional[str] = None
+    region: Optional[str] = None
+
+
+class LocateResponse(BaseModel):
+    """Districts of a batch of points, in request order"""
+    matched: int
+    results: List[DistrictLocation]
+
+
 class DistrictClimate(BaseModel):
     """Full climate data for a single district"""
     district_id: str
     district_name: str
     region: str
     climate: Dict[str, Dict[str, float]]
+    # Ensemble percentiles across models: {variable: {"2050_rcp85": {"p10", "p50", "p90"}}}
+    bands: Dict[str, Dict[str, Dict[str, float]]] = {}
+
+
+class TimeSeriesPoint(BaseModel):
+    """Value of one district in one period, with ensemble percentiles"""
+    period: str
+    value: float
+    change: float
+    change_percent: float
+    p10: Optional[float] = None
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+
+
+class DistrictTimeSeries(BaseModel):
+    """All periods of one variable and scenario for a single district"""
+    district_id: str
+    district_name: str
+    region: str
+    variable: str
+    variable_name: str
+    scenario: str
+    unit: str
+    baseline: float
+    data: List[TimeSeriesPoint]
+
+
+class ReportJobParams(BaseModel):
+    """Parameters of a district PDF report job"""
+    district_id: str
+    variable: str
+    scenario: str = "rcp45"
+
+
+class ExportJobParams(BaseModel):
+    """Parameters of a bulk export job; the same filters as /api/export"""
+    variable: Optional[List[str]] = None
+    period: Optional[List[str]] = None
+    scenario: Optional[List[str]] = None
+    region: Optional[List[str]] = None
+    format: str = "csv"
+
+
+class JobRequest(BaseModel):
+    """A background job to run: its type (report or export) and parameters"""
+    type: str
+    params: dict = Field(default_factory=dict)
+
+
+class JobStatus(BaseModel):
+    """State of a background job; result_url is set once it has succeeded"""
+    id: str
+    type: str
+    status: str
+    params: dict
+    error: Optional[str] = None
+    created_at: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    result_url: Optional[str] = None
+
+
+class DatasetReload(BaseModel):
+    """Outcome of a dataset reload; reloaded is false when the store holds the active data"""
+    reloaded: bool
+    dataset_version: str
+    previous_version: str
@@ -0,0 +1,117 @@
+"""
+Sampling profiler for slow requests
+A background thread records the stack of every thread at a fixed
+interval into a ring buffer. When a request is slower than the threshold,
+the samples taken while it ran are written as collapsed stacks
+("frame;frame;frame count" lines), which flamegraph.pl, speedscope and
+inferno read directly. Samples cover every thread over the request's
+lifetime, including other requests sharing the event loop, since that is
+what delays a request as often as its own code.
+"""
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Deque, Optional, Tuple
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+# Seconds of samples kept; requests slower than this are profiled for their last part only
+WINDOW_SECONDS = 30.0
+# At most one profile is written per this many seconds, so a burst of slow requests stays cheap
+MIN_DUMP_INTERVAL = 1.0
+
+Sample = Tuple[float, str, Tuple[CodeType, ...]]
+
+
+def _stack(frame: Optional[FrameType]) -> Tuple[CodeType, ...]:
+    codes = []
+    while frame is not None:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    codes.reverse()
+    return tuple(codes)
+
+
+def _frame_name(code: CodeType) -> str:
+    # Semicolons separate frames in the collapsed format
+    return f"{code.co_qualname} ({Path(code.co_filename).name}:{code.co_firstlineno})".replace(";", ":")
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = config.PROFILE_INTERVAL, directory: Path = config.PROFILE_DIR):
+        self.interval = interval
+        self.directory = directory
+        self._samples: Deque[Sample] = deque(maxlen=max(1, int(WINDOW_SECONDS / max(interval, 1e-4))))
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._last_dump = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        logger.info("Profiling requests slower than %.3f s into %s", config.PROFILE_SLOW_REQUESTS, self.directory)
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+        self._samples.clear()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stopping.wait(self.interval):
+            now = time.perf_counter()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self._samples.append((now, names.get(ident, str(ident)), _stack(frame)))
+
+    def collapsed(self, start: float, end: float) -> str:
+        """Samples taken between two perf_counter times, as collapsed stacks"""
+        counts: Counter = Counter()
+        for taken, thread, stack in list(self._samples):
+            if start <= taken <= end:
+                counts[(thread, stack)] += 1
+        return "".join(
+            f"{';'.join([thread] + [_frame_name(code) for code in stack])} {count}\n"
+            for (thread, stack), count in counts.most_common()
+        )
+
+    def dump(self, label: str, start: float, end: float) -> Optional[Path]:
+        """Write the profile of a request that ran from `start` to `end`; None if rate-limited or empty"""
+        if end - self._last_dump < MIN_DUMP_INTERVAL:
+            return None
+        profile = self.collapsed(start, end)
+        if not profile:
+            return None
+        self._last_dump = end
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_")
+        path = self.directory / f"{datetime.now():%Y%m%d-%H%M%S-%f}_{slug}_{(end - start) * 1000:.0f}ms.folded"
+        try:
+            path.write_text(profile)
+        except OSError as error:
+            logger.warning("Could not write profile %s: %s", path, error)
+            return None
+        logger.info("Wrote profile of %s (%.1f ms) to %s", label, (end - start) * 1000, path)
+        return path
+
+
+sampling_profiler = SamplingProfiler()
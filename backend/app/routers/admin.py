@@ -0,0 +1,32 @@
+"""
+Admin endpoints
+Operations on the running server, authorised with the ADMIN_TOKEN shared secret
+"""
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+
+from app import config
+from app.models.schemas import DatasetReload
+from app.services.datasets import dataset_manager
+
+router = APIRouter()
+
+
+def _authorize(token: Optional[str]):
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them")
+    if token is None or not secrets.compare_digest(token.encode(), config.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@router.post("/reload", response_model=DatasetReload)
+async def reload_dataset(x_admin_token: Optional[str] = Header(None)):
+    """
+    Load the climate store into a new dataset snapshot and switch to it
+    without a restart. Requests in progress finish on the previous data;
+    nothing changes if the store holds the data already being served.
+    """
+    _authorize(x_admin_token)
+    return (await dataset_manager.reload())._asdict()
@@ -2,28 +2,71 @@
 Climate API endpoints
 Serves climate projection data for Ghana districts
 """
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional, List
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional, List, Tuple
 
 from app.models.schemas import (
     ClimateVariable,
     ClimateResponse,
     ClimateValue,
     ClimateComparisonResponse,
-    ClimateComparison,
+    BatchRequest,
+    BatchResponse,
+    ClimateClasses,
+    ClimateAggregateResponse,
+    ClimateProjectionResponse,
+    ClimateRankingResponse,
 )
-from app.data.mock_data import (
-    CLIMATE_VARIABLES,
-    REGIONS,
-    REGIONAL_BASELINES,
-    generate_district_id,
-    get_climate_value,
+from app.services.aggregation import LEVELS, WEIGHTS, get_aggregation_index
+from app.services.classification import DEFAULT_CLASSES, MAX_CLASSES
+from app.data.district_registry import DISTRICT_REGISTRY
+from app.services.climate_cube import FUTURE_SCENARIOS, RANK_FIELDS, YEAR_RANGE, ClimateCube
+from app.services.climate_service import get_climate_cube, get_dataset_version
+from app.services.raster import COLOR_SCALES, colorize, encode_png, value_range
+from app.services.response_cache import projection_cache, response_cache, surface_cache
+from app.services.surface import (
+    SURFACE_BOUNDS, SURFACE_POWERS, SURFACE_RESOLUTIONS, grid_shape, interpolate_surface, surface_bytes, surface_from_bytes,
 )
 
 router = APIRouter()
 
 VALID_PERIODS = ["baseline", "2030", "2050", "2080"]
 VALID_SCENARIOS = ["historical", "rcp45", "rcp85"]
+MAX_BATCH_QUERIES = 100
+SURFACE_FORMATS = ["png", "binary"]
+RANK_ORDERS = ["desc", "asc"]
+MAX_RANK_LIMIT = 1000
+
+
+def validate_query(cube: ClimateCube, variable: str, period: str, scenario: str) -> Tuple[dict, str]:
+    """Validate a (variable, period, scenario) query; returns the variable metadata and the resolved scenario"""
+    # Validate variable
+    var_info = cube.variable_info(variable)
+    if not var_info:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Variable '{variable}' not found. Available: {list(cube.variable_ids)}"
+        )
+
+    # Validate period
+    if period not in VALID_PERIODS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid period '{period}'. Valid periods: {VALID_PERIODS}"
+        )
+
+    # Validate scenario
+    if scenario not in VALID_SCENARIOS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid scenario '{scenario}'. Valid scenarios: {VALID_SCENARIOS}"
+        )
+
+    # Handle baseline period
+    if period == "baseline":
+        scenario = "historical"
+
+    return var_info, scenario
 
 
 @router.get("/variables", response_model=List[ClimateVariable])
@@ -31,7 +74,7 @@ async def get_climate_variables():
     """
     Get list of all available climate variables with metadata.
     """
-    return CLIMATE_VARIABLES
+    return get_climate_cube().variables
 
 
 @router.get("/variables/{variable_id}", response_model=ClimateVariable)
@@ -39,14 +82,52 @@ async def get_climate_variable(variable_id: str):
     """
     Get metadata for a specific climate variable.
     """
-    for var in CLIMATE_VARIABLES:
-        if var["id"] == variable_id:
-            return var
+    var_info = get_climate_cube().variable_info(variable_id)
+    if var_info:
+        return var_info
     raise HTTPException(status_code=404, detail=f"Variable {variable_id} not found")
 
 
+@router.post("/batch", response_model=BatchResponse)
+async def get_climate_batch(request: BatchRequest):
+    """
+    Get values, ranges and changes from baseline for several
+    (variable, period, scenario) queries in one columnar response.
+    Districts are listed once; each result's arrays follow that order.
+    """
+    if len(request.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many queries ({len(request.queries)}). Maximum: {MAX_BATCH_QUERIES}"
+        )
+
+    cube = get_climate_cube()
+    columns = {}
+    results = []
+    for query in request.queries:
+        var_info, scenario = validate_query(cube, query.variable, query.period, query.scenario)
+        key = (query.variable, query.period, scenario)
+        # Repeated queries share one column
+        if key not in columns:
+            columns[key] = cube.column(*key)
+        results.append({
+            "variable": query.variable,
+            "period": query.period,
+            "scenario": scenario,
+            "unit": var_info["unit"],
+            **columns[key],
+        })
+
+    return {
+        "district_ids": cube.district_id_list,
+        "district_names": cube.district_name_list,
+        "results": results,
+    }
+
+
 @router.get("/{variable}", response_model=ClimateResponse)
 async def get_climate_data(
+    request: Request,
     variable: str,
     period: str = Query("baseline", description="Time period: baseline, 2030, 2050, or 2080"),
     scenario: str = Query("rcp45", description="Emission scenario: historical, rcp45, or rcp85"),
@@ -58,75 +139,67 @@ async def get_climate_data(
     - **period**: Time period (baseline, 2030, 2050, 2080)
     - **scenario**: Emission scenario (historical, rcp45, rcp85)
     """
-    # Validate variable
-    var_info = None
-    for v in CLIMATE_VARIABLES:
-        if v["id"] == variable:
-            var_info = v
-            break
+    cube = get_climate_cube()
+    var_info, scenario = validate_query(cube, variable, period, scenario)
+
+    # Responses are serialized when the cube is built; only the encodings are made here
+    return response_cache.respond(
+        request,
+        ("climate", variable, period, scenario, get_dataset_version()),
+        lambda: cube.get_response(variable, period, scenario),
+    )
+
+
+@router.get("/{variable}/projection", response_model=ClimateProjectionResponse)
+async def get_climate_projection(
+    request: Request,
+    variable: str,
+    year: int = Query(..., ge=YEAR_RANGE[0], le=YEAR_RANGE[1], description="Any year from 1991 to 2100"),
+    scenario: str = Query("rcp45", description="Emission scenario: rcp45 or rcp85"),
+):
+    """
+    Get values for all districts in any year, interpolated linearly
+    between the mid-years of the periods (2005.5, 2035.5, 2055.5 and
+    2085.5). Years before the first or after the last mid-year get the
+    baseline or 2080 values.
+    """
+    cube = get_climate_cube()
+    var_info = cube.variable_info(variable)
     if not var_info:
         raise HTTPException(
             status_code=404,
-            detail=f"Variable '{variable}' not found. Available: {[v['id'] for v in CLIMATE_VARIABLES]}"
+            detail=f"Variable '{variable}' not found. Available: {list(cube.variable_ids)}"
         )
-
-    # Validate period
-    if period not in VALID_PERIODS:
+    if scenario not in FUTURE_SCENARIOS:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid period '{period}'. Valid periods: {VALID_PERIODS}"
+            detail=f"Invalid scenario '{scenario}'. Valid scenarios: {list(FUTURE_SCENARIOS)}"
         )
 
-    # Validate scenario
-    if scenario not in VALID_SCENARIOS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid scenario '{scenario}'. Valid scenarios: {VALID_SCENARIOS}"
+    def build() -> ClimateProjectionResponse:
+        values = cube.interpolate(variable, year, scenario).round(1).tolist()
+        return ClimateProjectionResponse(
+            variable=variable,
+            variable_name=var_info["name"],
+            year=year,
+            scenario=scenario,
+            unit=var_info["unit"],
+            data=[
+                ClimateValue(district_id=d_id, district_name=name, value=value)
+                for d_id, name, value in zip(cube.district_ids, cube.district_names, values)
+            ],
         )
 
-    # Handle baseline period
-    if period == "baseline":
-        scenario = "historical"
-
-    # Generate climate values for all districts
-    data = []
-    for region_name, district_list in REGIONS.items():
-        baseline_values = REGIONAL_BASELINES.get(region_name, REGIONAL_BASELINES["Greater Accra"])
-        baseline_value = baseline_values.get(variable, 0)
-
-        for district_name in district_list:
-            district_id = generate_district_id(region_name, district_name)
-
-            # Calculate projected value
-            if period == "baseline" or scenario == "historical":
-                value = baseline_value
-            else:
-                value = get_climate_value(baseline_value, variable, scenario, period)
-
-            # Add small random variation per district (±5%)
-            import hashlib
-            hash_val = int(hashlib.md5(district_id.encode()).hexdigest()[:8], 16)
-            variation = ((hash_val % 100) - 50) / 1000  # -5% to +5%
-            value = round(value * (1 + variation), 1)
-
-            data.append(ClimateValue(
-                district_id=district_id,
-                district_name=district_name,
-                value=value,
-            ))
-
-    return ClimateResponse(
-        variable=variable,
-        variable_name=var_info["name"],
-        period=period,
-        scenario=scenario if period != "baseline" else "historical",
-        unit=var_info["unit"],
-        data=data,
+    return projection_cache.respond(
+        request,
+        ("projection", variable, year, scenario, get_dataset_version()),
+        build,
     )
 
 
 @router.get("/{variable}/compare", response_model=ClimateComparisonResponse)
 async def compare_climate_data(
+    request: Request,
     variable: str,
     period: str = Query("2050", description="Future time period to compare against baseline"),
     scenario: str = Query("rcp85", description="Emission scenario: rcp45 or rcp85"),
@@ -140,11 +213,8 @@ async def compare_climate_data(
     - **scenario**: Emission scenario (rcp45, rcp85)
     """
     # Validate variable
-    var_info = None
-    for v in CLIMATE_VARIABLES:
-        if v["id"] == variable:
-            var_info = v
-            break
+    cube = get_climate_cube()
+    var_info = cube.variable_info(variable)
     if not var_info:
         raise HTTPException(
             status_code=404,
@@ -164,41 +234,68 @@ async def compare_climate_data(
             detail=f"Invalid scenario '{scenario}'. Valid scenarios: rcp45, rcp85"
         )
 
-    # Generate comparison data
-    data = []
-    for region_name, district_list in REGIONS.items():
-        baseline_values = REGIONAL_BASELINES.get(region_name, REGIONAL_BASELINES["Greater Accra"])
-        baseline_value = baseline_values.get(variable, 0)
-
-        for district_name in district_list:
-            district_id = generate_district_id(region_name, district_name)
-
-            # Add small variation
-            import hashlib
-            hash_val = int(hashlib.md5(district_id.encode()).hexdigest()[:8], 16)
-            variation = ((hash_val % 100) - 50) / 1000
-
-            baseline = round(baseline_value * (1 + variation), 1)
-            future = round(get_climate_value(baseline_value, variable, scenario, period) * (1 + variation), 1)
-            change = round(future - baseline, 1)
-            change_percent = round((change / baseline) * 100, 1) if baseline != 0 else 0
-
-            data.append(ClimateComparison(
-                district_id=district_id,
-                district_name=district_name,
-                baseline=baseline,
-                future=future,
-                change=change,
-                change_percent=change_percent,
-            ))
-
-    return ClimateComparisonResponse(
-        variable=variable,
-        variable_name=var_info["name"],
-        period=period,
-        scenario=scenario,
-        unit=var_info["unit"],
-        data=data,
+    return response_cache.respond(
+        request,
+        ("compare", variable, period, scenario, get_dataset_version()),
+        lambda: cube.get_comparison(variable, period, scenario),
+    )
+
+
+@router.get("/{variable}/aggregate", response_model=ClimateAggregateResponse)
+async def aggregate_climate_data(
+    request: Request,
+    variable: str,
+    period: str = Query("baseline", description="Time period"),
+    scenario: str = Query("rcp45", description="Emission scenario"),
+    level: str = Query("region", description="Aggregate per region or for the whole country"),
+    weight: str = Query("area", description="Weight districts by area, population, or none"),
+):
+    """
+    Get weighted mean values per region, or for the whole country, with
+    the change from baseline and the range of the districts within.
+
+    - **level**: region or national
+    - **weight**: area (km²), population, or none (each district counts once)
+    """
+    cube = get_climate_cube()
+    var_info, resolved_scenario = validate_query(cube, variable, period, scenario)
+
+    if level not in LEVELS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid level '{level}'. Valid levels: {list(LEVELS)}"
+        )
+    if weight not in WEIGHTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid weight '{weight}'. Valid weights: {list(WEIGHTS)}"
+        )
+    index = get_aggregation_index()
+    if not index.available(weight):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Population is not available for {index.missing_population} districts; use weight=area or none"
+        )
+
+    return response_cache.respond(
+        request,
+        ("aggregate", variable, period, resolved_scenario, level, weight, get_dataset_version()),
+        lambda: {
+            "variable": variable,
+            "variable_name": var_info["name"],
+            "period": period,
+            "scenario": resolved_scenario,
+            "unit": var_info["unit"],
+            "level": level,
+            "weight": weight,
+            "data": index.aggregate(
+                level,
+                weight,
+                cube.slice(variable, period, resolved_scenario),
+                cube.slice(variable, "baseline", "historical"),
+            ),
+        },
+        model=ClimateAggregateResponse,
     )
 
 
@@ -212,16 +309,253 @@ async def get_variable_range(
     Get min/max range for a variable across all districts.
     Useful for setting up color scale legends.
     """
-    # Get the full climate data
-    response = await get_climate_data(variable, period, scenario)
-
-    values = [d.value for d in response.data]
+    cube = get_climate_cube()
+    _, resolved_scenario = validate_query(cube, variable, period, scenario)
+    stats = cube.get_range(variable, period, resolved_scenario)
 
     return {
         "variable": variable,
         "period": period,
         "scenario": scenario,
-        "min": min(values),
-        "max": max(values),
-        "mean": round(sum(values) / len(values), 1),
+        **stats,
+    }
+
+
+def _validate_ranking(by: str, order: str):
+    if by not in RANK_FIELDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid field '{by}'. Valid fields: {list(RANK_FIELDS)}"
+        )
+    if order not in RANK_ORDERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid order '{order}'. Valid orders: {RANK_ORDERS}"
+        )
+
+
+def _ranked_districts(cube: ClimateCube, variable: str, period: str, scenario: str, positions) -> List[dict]:
+    """Rows of the districts at `positions`, in that order"""
+    idx = cube.index(variable, period, scenario)
+    baseline = cube.slice(variable, "baseline", "historical")
+    records = DISTRICT_REGISTRY.records
+    return [
+        {
+            "district_id": cube.district_ids[position],
+            "district_name": cube.district_names[position],
+            "region": records[position].region,
+            "baseline": base,
+            "value": value,
+            "change": change,
+            "change_percent": change_percent,
+        }
+        for position, base, value, change, change_percent in zip(
+            positions.tolist(),
+            baseline[positions].tolist(),
+            cube.values[idx][positions].tolist(),
+            cube.change[idx][positions].tolist(),
+            cube.change_percent[idx][positions].tolist(),
+        )
+    ]
+
+
+@router.get("/{variable}/rank", response_model=ClimateRankingResponse)
+async def rank_districts(
+    variable: str,
+    period: str = Query("2050", description="Time period"),
+    scenario: str = Query("rcp85", description="Emission scenario"),
+    by: str = Query("value", description="Rank by value, change or change_percent"),
+    order: str = Query("desc", description="desc for the top districts, asc for the bottom"),
+    limit: int = Query(20, ge=1, le=MAX_RANK_LIMIT, description="Number of districts"),
+):
+    """
+    Get the top (or bottom) districts of a column, e.g. the 20 with the
+    largest increase in very hot days under RCP8.5 by 2080.
+    """
+    cube = get_climate_cube()
+    var_info, resolved_scenario = validate_query(cube, variable, period, scenario)
+    _validate_ranking(by, order)
+
+    positions = cube.ranked(by, variable, period, resolved_scenario, descending=order == "desc", limit=limit)
+    return {
+        "variable": variable,
+        "variable_name": var_info["name"],
+        "period": period,
+        "scenario": resolved_scenario,
+        "unit": var_info["unit"],
+        "by": by,
+        "order": order,
+        "total": len(cube.district_ids),
+        "data": _ranked_districts(cube, variable, period, resolved_scenario, positions),
     }
+
+
+@router.get("/{variable}/filter", response_model=ClimateRankingResponse)
+async def filter_districts(
+    variable: str,
+    period: str = Query("2050", description="Time period"),
+    scenario: str = Query("rcp85", description="Emission scenario"),
+    by: str = Query("value", description="Filter on value, change or change_percent"),
+    vmin: Optional[float] = Query(None, alias="min", description="Lowest value included"),
+    vmax: Optional[float] = Query(None, alias="max", description="Highest value included"),
+    order: str = Query("asc", description="Sort the matches ascending or descending"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_RANK_LIMIT, description="Return at most this many"),
+):
+    """
+    Get the districts whose value (or change) lies within [min, max],
+    e.g. where annual precipitation drops below 900 mm (`max=900`).
+    Either bound may be omitted; `total` counts every match.
+    """
+    cube = get_climate_cube()
+    var_info, resolved_scenario = validate_query(cube, variable, period, scenario)
+    _validate_ranking(by, order)
+    if vmin is not None and vmax is not None and vmin > vmax:
+        raise HTTPException(status_code=400, detail=f"min ({vmin}) is greater than max ({vmax})")
+
+    positions = cube.in_range(by, variable, period, resolved_scenario, vmin, vmax, descending=order == "desc")
+    return {
+        "variable": variable,
+        "variable_name": var_info["name"],
+        "period": period,
+        "scenario": resolved_scenario,
+        "unit": var_info["unit"],
+        "by": by,
+        "order": order,
+        "min": vmin,
+        "max": vmax,
+        "total": len(positions),
+        "data": _ranked_districts(cube, variable, period, resolved_scenario, positions[:limit]),
+    }
+
+
+@router.get("/{variable}/classes", response_model=ClimateClasses)
+async def get_variable_classes(
+    request: Request,
+    variable: str,
+    period: str = Query("baseline", description="Time period"),
+    scenario: str = Query("rcp45", description="Emission scenario"),
+    shared: bool = Query(False, description="Class all periods of the scenario together"),
+    change: bool = Query(False, description="Class changes from baseline instead of values"),
+    classes: int = Query(DEFAULT_CLASSES, ge=2, le=MAX_CLASSES, description="Number of classes"),
+):
+    """
+    Get a histogram and quantile and Jenks natural breaks for a legend.
+
+    With `shared`, the breaks span every period of the scenario, so they
+    stay the same while moving along the timeline.
+    """
+    cube = get_climate_cube()
+    var_info, resolved_scenario = validate_query(cube, variable, period, scenario)
+    # Shared classes cover the future periods' scenario, even from the baseline
+    class_scenario = scenario if shared else resolved_scenario
+
+    return response_cache.respond(
+        request,
+        ("classes", variable, period, class_scenario, shared, change, classes, get_dataset_version()),
+        lambda: {
+            "variable": variable,
+            "period": period,
+            "scenario": class_scenario,
+            "unit": var_info["unit"],
+            "shared": shared,
+            "change": change,
+            "classes": classes,
+            **cube.get_classes(variable, period, class_scenario, shared, change, classes),
+        },
+        model=ClimateClasses,
+    )
+
+
+@router.get("/{variable}/surface")
+async def get_climate_surface(
+    request: Request,
+    variable: str,
+    period: str = Query("baseline", description="Time period"),
+    scenario: str = Query("rcp45", description="Emission scenario"),
+    change: bool = Query(False, description="Interpolate the change from baseline instead of the value"),
+    resolution: float = Query(0.05, description="Grid cell size in degrees: 0.01, 0.02, 0.05, 0.1, 0.25 or 0.5"),
+    power: float = Query(2.0, description="IDW distance power: 1, 2, 3 or 4"),
+    format: str = Query("png", description="Output format: png or binary"),
+    scale: Optional[str] = Query(None, description="PNG colour scale; defaults to the variable's"),
+    vmin: Optional[float] = Query(None, alias="min", description="PNG colour scale minimum; defaults to the grid minimum"),
+    vmax: Optional[float] = Query(None, alias="max", description="PNG colour scale maximum; defaults to the grid maximum"),
+    opacity: float = Query(0.75, ge=0, le=1, description="PNG opacity inside the country"),
+):
+    """
+    Get an inverse-distance-weighted surface of district values over Ghana.
+
+    `png` is a coloured overlay for SURFACE_BOUNDS (row 0 at the north
+    edge); `binary` is the raw grid as little-endian float32, NaN outside
+    the country, with its shape and bounds in X-Grid-* headers.
+    Surfaces not yet cached are interpolated in a worker thread; overlays
+    are coloured from the cached grid.
+    """
+    cube = get_climate_cube()
+    var_info, scenario = validate_query(cube, variable, period, scenario)
+
+    # A fixed set of grids, so the per-resolution masks stay few
+    if resolution not in SURFACE_RESOLUTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid resolution {resolution}. Valid resolutions: {list(SURFACE_RESOLUTIONS)}"
+        )
+
+    if power not in SURFACE_POWERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid power {power}. Valid powers: {list(SURFACE_POWERS)}"
+        )
+
+    if format not in SURFACE_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid format '{format}'. Valid formats: {SURFACE_FORMATS}"
+        )
+
+    scale = scale or ("diverging" if change else var_info["color_scale"])
+    if scale not in COLOR_SCALES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid scale '{scale}'. Valid scales: {list(COLOR_SCALES)}"
+        )
+
+    def build_grid() -> bytes:
+        idx = cube.index(variable, period, scenario)
+        values = cube.change[idx] if change else cube.values[idx]
+        return surface_bytes(interpolate_surface(values, resolution, power)[1])
+
+    grid_key = ("surface", variable, period, scenario, change, resolution, power, get_dataset_version())
+    rows, cols = grid_shape(resolution)
+    bounds = ",".join(str(SURFACE_BOUNDS[edge]) for edge in ("west", "south", "east", "north"))
+
+    if format == "binary":
+        return await surface_cache.respond_async(
+            request,
+            grid_key,
+            build_grid,
+            media_type="application/octet-stream",
+            headers={"X-Grid-Shape": f"{rows},{cols}", "X-Grid-Bounds": bounds},
+        )
+
+    # Every colouring of a grid shares its one interpolation
+    grid = await surface_cache.get_or_build_async(grid_key, build_grid)
+
+    def build_png() -> bytes:
+        surface = surface_from_bytes(grid.identity, resolution)
+        low, high = value_range(surface, diverging=scale == "diverging")
+        low = vmin if vmin is not None else low
+        high = vmax if vmax is not None else high
+        if scale == "diverging" and low is not None and high is not None:
+            # Centred on zero, as the frontend's diverging scale is
+            high = max(abs(low), abs(high))
+            low = -high
+        return encode_png(colorize(surface, scale, low or 0.0, high or 0.0, opacity))
+
+    return await surface_cache.respond_async(
+        request,
+        grid_key + ("png", scale, vmin, vmax, opacity),
+        build_png,
+        media_type="image/png",
+        headers={"X-Grid-Bounds": bounds},
+        compressible=False,
+    )
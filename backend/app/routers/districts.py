@@ -2,25 +2,42 @@
 Districts API endpoints
 Serves Ghana district boundaries and metadata
 """
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional, List
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Dict, Optional, List
 import json
+import logging
 from pathlib import Path
 
+from app import config
 from app.models.schemas import (
     District,
     DistrictGeoJSON,
     DistrictFeatureCollection,
     DistrictClimate,
+    DistrictTimeSeries,
+    DistrictLocation,
+    LocateRequest,
+    LocateResponse,
 )
 from app.data.mock_data import (
-    REGIONS,
-    generate_district_id,
     generate_all_districts,
+)
+from app.data.district_registry import DISTRICT_REGISTRY
+from app.data.spatial_index import get_district_index
+from app.data.topology import get_simplification_levels
+from app.services.climate_cube import FUTURE_SCENARIOS
+from app.services.geometry_formats import BINARY_MEDIA_TYPE, encode_binary, encode_topojson
+from app.services.climate_service import (
+    district_timeseries,
+    get_climate_cube,
+    get_dataset_version,
     get_district_climate_data,
 )
+from app.services.data_plane import DataPlane, PlaneContents, open_data_plane, plane_path
+from app.services.response_cache import CachedBody, encode, response_cache, serialize
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # Ghana bounding box coordinates (approximate)
 GHANA_BOUNDS = {
@@ -30,115 +47,160 @@ GHANA_BOUNDS = {
     "max_lng": 1.2,
 }
 
-# Generate simple polygon for each district (placeholder - replace with real GeoJSON)
-def calculate_centroid(coordinates: list) -> list:
-    """Calculate the centroid of a polygon from its coordinates."""
-    # For simple polygons, use the average of all vertices
-    # coordinates[0] is the outer ring
-    ring = coordinates[0]
-    # Exclude the closing point (which duplicates the first)
-    points = ring[:-1] if ring[0] == ring[-1] else ring
-
-    if not points:
-        return [0, 0]
-
-    centroid_lon = sum(p[0] for p in points) / len(points)
-    centroid_lat = sum(p[1] for p in points) / len(points)
-
-    return [centroid_lon, centroid_lat]
-
-
-def generate_district_geometry(region: str, district_index: int, total_in_region: int):
-    """Generate a simple rectangular geometry for a district (placeholder)"""
-    # This creates mock geometries - replace with real GeoJSON boundaries
-    region_centers = {
-        "Greater Accra": (5.6, -0.2),
-        "Ashanti": (6.7, -1.6),
-        "Western": (5.0, -2.0),
-        "Central": (5.5, -1.2),
-        "Eastern": (6.3, -0.5),
-        "Volta": (6.5, 0.5),
-        "Northern": (9.5, -1.0),
-        "Upper East": (10.8, -0.8),
-        "Upper West": (10.3, -2.3),
-        "Bono": (7.5, -2.3),
-        "Bono East": (7.8, -1.5),
-        "Ahafo": (7.0, -2.5),
-        "Western North": (6.2, -2.5),
-        "Oti": (7.8, 0.3),
-        "North East": (10.2, -0.2),
-        "Savannah": (9.0, -1.8),
-    }
-
-    center = region_centers.get(region, (7.5, -1.0))
-    lat, lng = center
-
-    # Create small offset based on district index
-    row = district_index // 4
-    col = district_index % 4
-    offset_lat = row * 0.3 - 0.3
-    offset_lng = col * 0.3 - 0.3
-
-    # Create a small polygon
-    size = 0.12
-    base_lat = lat + offset_lat
-    base_lng = lng + offset_lng
+GEOMETRY_FORMATS = ["geojson", "topojson", "binary"]
+GEOMETRY_MEDIA_TYPES = {
+    "geojson": "application/json",
+    "topojson": "application/json",
+    "binary": BINARY_MEDIA_TYPE,
+}
+MAX_LOCATE_POINTS = 10000
 
-    return {
-        "type": "Polygon",
-        "coordinates": [[
-            [base_lng - size, base_lat - size],
-            [base_lng + size, base_lat - size],
-            [base_lng + size, base_lat + size],
-            [base_lng - size, base_lat + size],
-            [base_lng - size, base_lat - size],
-        ]]
-    }
+# Boundary collections shared between worker processes, per registry signature
+_geometry_planes: Dict[str, DataPlane] = {}
 
 
 @router.get("", response_model=DistrictFeatureCollection)
-async def get_all_districts(region: Optional[str] = Query(None, description="Filter by region name")):
+async def get_all_districts(
+    request: Request,
+    region: Optional[str] = Query(None, description="Filter by region name"),
+    zoom: Optional[int] = Query(None, ge=0, le=22, description="Map zoom level to simplify boundaries for"),
+    tolerance: Optional[float] = Query(None, gt=0, description="Simplification tolerance in degrees"),
+    format: str = Query("geojson", description="Output format: geojson, topojson, or binary"),
+):
     """
     Get all Ghana districts as GeoJSON FeatureCollection.
     Optionally filter by region.
+
+    With **zoom** or **tolerance**, boundaries come from the nearest
+    precomputed simplification level that is no coarser than requested.
+    **format** `topojson` and `binary` store each shared border once.
     """
-    features = []
-
-    for region_name, district_list in REGIONS.items():
-        if region and region.lower() != region_name.lower():
-            continue
-
-        for idx, district_name in enumerate(district_list):
-            district_id = generate_district_id(region_name, district_name)
-            geometry = generate_district_geometry(region_name, idx, len(district_list))
-            centroid = calculate_centroid(geometry["coordinates"])
-
-            feature = {
-                "type": "Feature",
-                "properties": {
-                    "id": district_id,
-                    "name": district_name,
-                    "region": region_name,
-                    "centroid": centroid,
-                },
-                "geometry": geometry,
-            }
-            features.append(feature)
+    if format not in GEOMETRY_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid format '{format}'. Valid formats: {GEOMETRY_FORMATS}"
+        )
+
+    level = get_simplification_levels().level_for(zoom, tolerance)
+
+    def build():
+        # Every district at a level is served from the shared data plane when attached
+        shared = _shared_geometry(format, level) if not region else None
+        return shared if shared is not None else _geometry_body(format, region, level)
+
+    return response_cache.respond(
+        request,
+        _geometry_key(format, region, level),
+        build,
+        media_type=GEOMETRY_MEDIA_TYPES[format],
+    )
+
+
+def _geometry_key(format: str, region: Optional[str], level: Optional[float]) -> tuple:
+    return (format, (region or "").lower(), level, get_dataset_version())
+
+
+def _build_feature_collection(region: Optional[str], level: Optional[float]) -> dict:
+    geometries = get_simplification_levels().geometries(level)
+    features = [
+        record.to_feature(geometry)
+        for record, geometry in zip(DISTRICT_REGISTRY.records, geometries)
+        if not region or record.region.lower() == region.lower()
+    ]
 
     return {"type": "FeatureCollection", "features": features}
 
 
+def _geometry_body(format: str, region: Optional[str], level: Optional[float]) -> bytes:
+    """Serialized boundaries of a region (or every district) at a simplification level"""
+    if format == "geojson":
+        return serialize(_build_feature_collection(region, level), DistrictFeatureCollection)
+
+    topology = get_simplification_levels().topology_at(level)
+    records = DISTRICT_REGISTRY.records
+    indices = [
+        i for i, record in enumerate(records)
+        if not region or record.region.lower() == region.lower()
+    ]
+    encode_geometry = encode_topojson if format == "topojson" else encode_binary
+    return encode_geometry(topology, records, indices)
+
+
+def _geometry_blob(format: str, level: Optional[float]) -> str:
+    return f"{format}/{'full' if level is None else repr(level)}"
+
+
+def _geometry_plane_contents() -> PlaneContents:
+    """Every format of the whole country's boundaries at every level, in every encoding"""
+    levels = get_simplification_levels()
+    blobs = {}
+    for level in (None,) + levels.tolerances:
+        for format in GEOMETRY_FORMATS:
+            name = _geometry_blob(format, level)
+            body = encode(_geometry_body(format, None, level))
+            blobs[name] = body.identity
+            blobs[f"{name}.gzip"] = body.gzip
+            if body.br is not None:
+                blobs[f"{name}.br"] = body.br
+    return {}, blobs, {}
+
+
+def _shared_geometry(format: str, level: Optional[float]) -> Optional[CachedBody]:
+    plane = _geometry_planes.get(DISTRICT_REGISTRY.signature)
+    name = _geometry_blob(format, level)
+    if plane is None or not plane.has_blob(name):
+        return None
+    return CachedBody(
+        identity=plane.blob(name),
+        gzip=plane.blob(f"{name}.gzip"),
+        br=plane.blob(f"{name}.br") if plane.has_blob(f"{name}.br") else None,
+    )
+
+
+def warm_response_cache():
+    """
+    Attach the shared boundary collections, building them first if no worker
+    process has, and cache the full boundary collection before the first request
+    """
+    signature = DISTRICT_REGISTRY.signature
+    if signature not in _geometry_planes:
+        levels = get_simplification_levels()
+        try:
+            _geometry_planes[signature] = open_data_plane(
+                plane_path(config.DATA_PLANE_DIR, "geometry", f"{signature}:{levels.tolerances}"),
+                _geometry_plane_contents,
+            )
+        except OSError as exc:
+            logger.warning("Data plane unavailable (%s); simplifying boundaries in this process", exc)
+            levels.build_all()
+    response_cache.get_or_build(
+        _geometry_key("geojson", None, None),
+        lambda: _shared_geometry("geojson", None) or _geometry_body("geojson", None, None),
+    )
+
+
 @router.get("/list", response_model=List[District])
-async def list_districts(region: Optional[str] = Query(None, description="Filter by region name")):
+async def list_districts(
+    request: Request,
+    region: Optional[str] = Query(None, description="Filter by region name"),
+):
     """
     Get list of all districts (without geometry).
     """
-    districts = generate_all_districts()
+    def build():
+        districts = generate_all_districts()
+
+        if region:
+            districts = [d for d in districts if d["region"].lower() == region.lower()]
 
-    if region:
-        districts = [d for d in districts if d["region"].lower() == region.lower()]
+        return districts
 
-    return districts
+    return response_cache.respond(
+        request,
+        ("district_list", (region or "").lower(), get_dataset_version()),
+        build,
+        List[District],
+    )
 
 
 @router.get("/regions")
@@ -146,35 +208,80 @@ async def get_regions():
     """
     Get list of all Ghana regions with district counts.
     """
-    return [
-        {"name": region, "district_count": len(districts)}
-        for region, districts in REGIONS.items()
-    ]
+    counts: Dict[str, int] = {}
+    for record in DISTRICT_REGISTRY.records:
+        counts[record.region] = counts.get(record.region, 0) + 1
+    return [{"name": region, "district_count": count} for region, count in counts.items()]
+
+
+def _location(lat: float, lng: float, position: int) -> dict:
+    if position < 0:
+        return {"lat": lat, "lng": lng}
+    record = DISTRICT_REGISTRY.records[position]
+    return {
+        "lat": lat,
+        "lng": lng,
+        "district_id": record.id,
+        "district_name": record.name,
+        "region": record.region,
+    }
+
+
+@router.get("/locate", response_model=DistrictLocation)
+async def locate_district(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude in degrees"),
+    lng: float = Query(..., ge=-180, le=180, description="Longitude in degrees"),
+):
+    """
+    Get the district that contains a point.
+    """
+    position = get_district_index().locate(lat, lng)
+    if position is None:
+        raise HTTPException(status_code=404, detail=f"No district contains ({lat}, {lng})")
+
+    return _location(lat, lng, position)
+
+
+@router.post("/locate", response_model=LocateResponse)
+async def locate_districts(request: LocateRequest):
+    """
+    Resolve many points to districts at once, e.g. to geocode a registry
+    of farms. Points outside every district get null district fields.
+    """
+    if len(request.points) > MAX_LOCATE_POINTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many points ({len(request.points)}). Maximum: {MAX_LOCATE_POINTS}"
+        )
+
+    lats = [point.lat for point in request.points]
+    lngs = [point.lng for point in request.points]
+    positions = get_district_index().locate_many(lats, lngs).tolist()
+
+    return {
+        "matched": sum(position >= 0 for position in positions),
+        "results": [_location(lat, lng, position) for lat, lng, position in zip(lats, lngs, positions)],
+    }
 
 
 @router.get("/{district_id}", response_model=DistrictGeoJSON)
-async def get_district(district_id: str):
+async def get_district(
+    district_id: str,
+    zoom: Optional[int] = Query(None, ge=0, le=22, description="Map zoom level to simplify the boundary for"),
+    tolerance: Optional[float] = Query(None, gt=0, description="Simplification tolerance in degrees"),
+):
     """
     Get a single district by ID.
     """
-    for region_name, district_list in REGIONS.items():
-        for idx, district_name in enumerate(district_list):
-            d_id = generate_district_id(region_name, district_name)
-            if d_id == district_id:
-                geometry = generate_district_geometry(region_name, idx, len(district_list))
-                centroid = calculate_centroid(geometry["coordinates"])
-                return {
-                    "type": "Feature",
-                    "properties": {
-                        "id": d_id,
-                        "name": district_name,
-                        "region": region_name,
-                        "centroid": centroid,
-                    },
-                    "geometry": geometry,
-                }
-
-    raise HTTPException(status_code=404, detail=f"District {district_id} not found")
+    record = DISTRICT_REGISTRY.get(district_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"District {district_id} not found")
+
+    levels = get_simplification_levels()
+    level = levels.level_for(zoom, tolerance)
+    if level is None:
+        return record.feature
+    return record.to_feature(levels.geometries(level)[DISTRICT_REGISTRY.positions[district_id]])
 
 
 @router.get("/{district_id}/climate", response_model=DistrictClimate)
@@ -182,16 +289,51 @@ async def get_district_climate(district_id: str):
     """
     Get full climate data for a specific district.
     """
-    for region_name, district_list in REGIONS.items():
-        for district_name in district_list:
-            d_id = generate_district_id(region_name, district_name)
-            if d_id == district_id:
-                climate_data = get_district_climate_data(d_id, region_name)
-                return {
-                    "district_id": d_id,
-                    "district_name": district_name,
-                    "region": region_name,
-                    "climate": climate_data,
-                }
-
-    raise HTTPException(status_code=404, detail=f"District {district_id} not found")
+    record = DISTRICT_REGISTRY.get(district_id)
+    climate_data = get_district_climate_data(district_id) if record else None
+    if climate_data is None:
+        raise HTTPException(status_code=404, detail=f"District {district_id} not found")
+
+    return {
+        "district_id": record.id,
+        "district_name": record.name,
+        "region": record.region,
+        **climate_data,
+    }
+
+
+@router.get("/{district_id}/timeseries", response_model=DistrictTimeSeries)
+async def get_district_timeseries(
+    district_id: str,
+    variable: str = Query(..., description="Climate variable ID"),
+    scenario: str = Query("rcp45", description="Emission scenario: rcp45 or rcp85"),
+):
+    """
+    Get every period of one variable for a single district, with the
+    baseline and the ensemble percentile bands.
+    """
+    record = DISTRICT_REGISTRY.get(district_id)
+    climate_data = get_district_climate_data(district_id) if record else None
+    if climate_data is None:
+        raise HTTPException(status_code=404, detail=f"District {district_id} not found")
+
+    var_info = get_climate_cube().variable_info(variable)
+    if not var_info:
+        raise HTTPException(status_code=404, detail=f"Variable '{variable}' not found")
+
+    if scenario not in FUTURE_SCENARIOS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid scenario '{scenario}'. Valid scenarios: rcp45, rcp85"
+        )
+
+    return {
+        "district_id": record.id,
+        "district_name": record.name,
+        "region": record.region,
+        "variable": variable,
+        "variable_name": var_info["name"],
+        "scenario": scenario,
+        "unit": var_info["unit"],
+        **district_timeseries(climate_data, variable, scenario),
+    }
@@ -0,0 +1,92 @@
+"""
+Export endpoints
+Streams bulk extracts of the climate data as CSV, Parquet or Arrow IPC
+"""
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.routers.climate import VALID_PERIODS, VALID_SCENARIOS
+from app.services.climate_cube import ClimateCube
+from app.services.climate_service import get_climate_cube, get_dataset_version
+from app.services.export import (
+    EXPORT_EXTENSIONS,
+    EXPORT_FORMATS,
+    district_positions,
+    iter_batches,
+    stored_columns,
+    stream_export,
+)
+
+router = APIRouter()
+
+
+def validate_export_filters(
+    cube: ClimateCube,
+    variable: Optional[List[str]],
+    period: Optional[List[str]],
+    scenario: Optional[List[str]],
+    format: str,
+):
+    """Reject unknown formats, variables, periods and scenarios"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid format '{format}'. Valid formats: {list(EXPORT_FORMATS)}"
+        )
+
+    unknown = [v for v in variable or [] if cube.variable_info(v) is None]
+    if unknown:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Variables {unknown} not found. Available: {list(cube.variable_ids)}"
+        )
+    invalid_periods = [p for p in period or [] if p not in VALID_PERIODS]
+    if invalid_periods:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid periods {invalid_periods}. Valid periods: {VALID_PERIODS}"
+        )
+    invalid_scenarios = [s for s in scenario or [] if s not in VALID_SCENARIOS]
+    if invalid_scenarios:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid scenarios {invalid_scenarios}. Valid scenarios: {VALID_SCENARIOS}"
+        )
+
+
+@router.get("")
+async def export_climate_data(
+    variable: Optional[List[str]] = Query(None, description="Variables to export (repeatable); all if omitted"),
+    period: Optional[List[str]] = Query(None, description="Periods to export (repeatable); all if omitted"),
+    scenario: Optional[List[str]] = Query(None, description="Scenarios of future periods (repeatable); all if omitted"),
+    region: Optional[List[str]] = Query(None, description="Regions to export (repeatable); all if omitted"),
+    format: str = Query("csv", description="Output format: csv, parquet or arrow"),
+):
+    """
+    Stream climate values, changes from baseline and ensemble percentiles
+    for every selected district, variable, period and scenario, one row
+    each. The download starts straight away; rows are encoded a batch at
+    a time.
+    """
+    cube = get_climate_cube()
+    validate_export_filters(cube, variable, period, scenario, format)
+
+    # The cube is captured here, so a reload mid-download cannot mix datasets
+    batches = iter_batches(
+        cube,
+        stored_columns(variable or cube.variable_ids, period, scenario),
+        district_positions(region),
+    )
+    try:
+        body = stream_export(batches, format)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=501, detail=str(exc))
+
+    filename = f"ghana_climate_{get_dataset_version()}.{EXPORT_EXTENSIONS[format]}"
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
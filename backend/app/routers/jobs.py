@@ -0,0 +1,108 @@
+"""
+Background job endpoints
+Submit slow work (PDF reports, bulk exports), poll its status and download the result
+"""
+import json
+import sqlite3
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, ValidationError
+
+from app.data.district_registry import DISTRICT_REGISTRY
+from app.models.schemas import ExportJobParams, JobRequest, JobStatus, ReportJobParams
+from app.routers.export import validate_export_filters
+from app.services.climate_cube import FUTURE_SCENARIOS
+from app.services.climate_service import get_climate_cube
+from app.services.jobs import JOB_TYPES, job_manager
+
+router = APIRouter()
+
+JOB_PARAMS = {
+    "report": ReportJobParams,
+    "export": ExportJobParams,
+}
+
+
+def _job_status(job: sqlite3.Row) -> dict:
+    return {
+        "id": job["id"],
+        "type": job["type"],
+        "status": job["status"],
+        "params": json.loads(job["params"]),
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "result_url": f"/api/jobs/{job['id']}/result" if job["status"] == "succeeded" else None,
+    }
+
+
+def _validate_params(job_type: str, params: dict) -> dict:
+    """Parameters of a job with defaults filled in, or an HTTP error"""
+    try:
+        parsed: BaseModel = JOB_PARAMS[job_type].model_validate(params)
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors(include_url=False, include_context=False))
+
+    cube = get_climate_cube()
+    if isinstance(parsed, ReportJobParams):
+        if DISTRICT_REGISTRY.get(parsed.district_id) is None:
+            raise HTTPException(status_code=404, detail=f"District {parsed.district_id} not found")
+        if cube.variable_info(parsed.variable) is None:
+            raise HTTPException(status_code=404, detail=f"Variable '{parsed.variable}' not found")
+        if parsed.scenario not in FUTURE_SCENARIOS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid scenario '{parsed.scenario}'. Valid scenarios: rcp45, rcp85"
+            )
+    else:
+        validate_export_filters(cube, parsed.variable, parsed.period, parsed.scenario, parsed.format)
+    return parsed.model_dump()
+
+
+@router.post("", response_model=JobStatus, status_code=202)
+async def submit_job(request: JobRequest):
+    """
+    Queue a report or export job. A job with the same parameters on the
+    same dataset is shared: its current status is returned instead, and a
+    finished one can be downloaded straight away.
+    """
+    if request.type not in JOB_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid job type '{request.type}'. Valid types: {list(JOB_TYPES)}"
+        )
+    params = _validate_params(request.type, request.params)
+    return _job_status(await job_manager.submit(request.type, params))
+
+
+@router.get("/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """
+    Get the status of a job: queued, running, succeeded or failed.
+    """
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return _job_status(job)
+
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str):
+    """
+    Download the result of a succeeded job.
+    """
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if job["status"] != "succeeded":
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job {job_id} is {job['status']}" + (f": {job['error']}" if job["error"] else "")
+        )
+
+    path = job_manager.result_path(job)
+    if not path.exists():
+        raise HTTPException(status_code=410, detail=f"The result of job {job_id} is no longer available")
+    return FileResponse(path, media_type=job_manager.media_type(job), filename=f"{job['type']}_{job_id}{path.suffix}")
@@ -0,0 +1,76 @@
+"""
+Vector tile endpoints
+Serves district boundaries as Mapbox Vector Tiles with climate values attached
+"""
+from typing import Dict, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from app.routers.climate import validate_query
+from app.services.climate_cube import ClimateCube
+from app.services.climate_service import get_climate_cube, get_dataset_version
+from app.services.response_cache import tile_cache
+from app.services.vector_tiles import get_tile_source
+
+router = APIRouter()
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+MAX_ZOOM = 18
+
+
+def _climate_properties(cube: ClimateCube, variable: str, period: str, scenario: str) -> Dict[str, dict]:
+    """Per-district value, and change from baseline for future periods"""
+    idx = cube.index(variable, period, scenario)
+    columns = {"value": cube.values[idx].tolist()}
+    if period != "baseline":
+        columns["change"] = cube.change[idx].tolist()
+        columns["change_percent"] = cube.change_percent[idx].tolist()
+
+    properties: Dict[str, dict] = {}
+    for position, district_id in enumerate(cube.district_ids):
+        # The first district with an ID wins, as everywhere else
+        if district_id not in properties:
+            properties[district_id] = {name: column[position] for name, column in columns.items()}
+    return properties
+
+
+@router.get("/{z}/{x}/{y}.mvt")
+async def get_district_tile(
+    request: Request,
+    z: int,
+    x: int,
+    y: int,
+    variable: Optional[str] = Query(None, description="Climate variable ID to attach as feature properties"),
+    period: str = Query("baseline", description="Time period: baseline, 2030, 2050, or 2080"),
+    scenario: str = Query("rcp45", description="Emission scenario: historical, rcp45, or rcp85"),
+):
+    """
+    Get the district boundaries inside one XYZ tile as a Mapbox Vector Tile.
+
+    Geometries are clipped to the tile and quantized to a 4096 grid. Each
+    feature in the `districts` layer has `id`, `name` and `region`; with a
+    **variable**, also `value` and, for future periods, `change` and
+    `change_percent` for the selected period and scenario.
+    """
+    if not 0 <= z <= MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid tile {z}/{x}/{y}. Zoom must be 0-{MAX_ZOOM} and x, y within 0-(2^z - 1)"
+        )
+
+    cube = get_climate_cube()
+    if variable is not None:
+        _, scenario = validate_query(cube, variable, period, scenario)
+
+    def build() -> bytes:
+        properties = _climate_properties(cube, variable, period, scenario) if variable else None
+        return get_tile_source(z).render(z, x, y, properties)
+
+    query = (variable, period, scenario) if variable else None
+    # Projecting a zoom level's districts and clipping them runs off the event loop
+    return await tile_cache.respond_async(
+        request,
+        ("tile", z, x, y, query, get_dataset_version()),
+        build,
+        media_type=MVT_MEDIA_TYPE,
+    )
@@ -0,0 +1,123 @@
+"""
+Regional and national aggregation
+Weighted means of district values per region or for the whole country,
+through a district -> group membership index built once per registry.
+Means are one matrix product of a column with a (district x group)
+weight matrix; ranges are reduceat over districts sorted by group.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.data.district_registry import DISTRICT_REGISTRY, DistrictRegistry
+from app.data.geometry import geometry_area_km2
+
+LEVELS = ("region", "national")
+WEIGHTS = ("area", "population", "none")
+NATIONAL_NAME = "Ghana"
+
+
+class Grouping:
+    """Membership of every district in one group level"""
+
+    def __init__(self, names: List[str], membership: np.ndarray):
+        self.names = names
+        self.membership = membership
+        self.counts = np.bincount(membership, minlength=len(names))
+        # Districts sorted by group, and where each group starts in that order
+        self.order = np.argsort(membership, kind="stable")
+        self.starts = np.concatenate([[0], np.cumsum(self.counts)[:-1]])
+        self._matrices: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def weight_matrix(self, weight: str, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(district x group) matrix of normalized weights, and each group's total weight"""
+        matrix = self._matrices.get(weight)
+        if matrix is None:
+            totals = np.bincount(self.membership, weights=weights, minlength=len(self.names))
+            normalized = np.zeros((len(self.membership), len(self.names)))
+            normalized[np.arange(len(self.membership)), self.membership] = weights / totals[self.membership]
+            matrix = self._matrices[weight] = normalized, totals
+        return matrix
+
+    def ranges(self, column: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Minimum and maximum district value of each group"""
+        ordered = column[self.order]
+        return np.minimum.reduceat(ordered, self.starts), np.maximum.reduceat(ordered, self.starts)
+
+
+class AggregationIndex:
+    """District weights and group memberships of a registry, in district axis order"""
+
+    def __init__(self, registry: DistrictRegistry):
+        regions: Dict[str, int] = {}
+        membership = np.array(
+            [regions.setdefault(record.region, len(regions)) for record in registry.records], dtype=np.int64
+        )
+        self.groupings = {
+            "region": Grouping(list(regions), membership),
+            "national": Grouping([NATIONAL_NAME], np.zeros(len(registry), dtype=np.int64)),
+        }
+        populations = [record.population for record in registry.records]
+        self.weights: Dict[str, Optional[np.ndarray]] = {
+            "area": np.array([geometry_area_km2(record.geometry) for record in registry.records]),
+            "none": np.ones(len(registry)),
+            # Population weighting needs every district's population
+            "population": (
+                np.array(populations, dtype=float)
+                if all(population is not None and population > 0 for population in populations)
+                else None
+            ),
+        }
+        self.missing_population = sum(1 for population in populations if not population)
+
+    def available(self, weight: str) -> bool:
+        return self.weights[weight] is not None
+
+    def aggregate(self, level: str, weight: str, future: np.ndarray, baseline: np.ndarray) -> List[dict]:
+        """
+        Weighted mean of a column and of its baseline for every group,
+        with the change between them and each group's district range
+        """
+        grouping = self.groupings[level]
+        matrix, totals = grouping.weight_matrix(weight, self.weights[weight])
+        means = np.stack([future, baseline]) @ matrix
+        lows, highs = grouping.ranges(future)
+        change = means[0] - means[1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change_percent = np.where(means[1] != 0, change / means[1] * 100, 0.0)
+
+        return [
+            {
+                "name": name,
+                "district_count": count,
+                "weight_total": None if weight == "none" else round(total, 1),
+                "value": round(value, 2),
+                "baseline": round(base, 2),
+                "change": round(delta, 2),
+                "change_percent": round(percent, 1),
+                "min": low,
+                "max": high,
+            }
+            for name, count, total, value, base, delta, percent, low, high in zip(
+                grouping.names,
+                grouping.counts.tolist(),
+                totals.tolist(),
+                means[0].tolist(),
+                means[1].tolist(),
+                change.tolist(),
+                change_percent.tolist(),
+                lows.tolist(),
+                highs.tolist(),
+            )
+        ]
+
+
+_indexes: Dict[str, AggregationIndex] = {}
+
+
+def get_aggregation_index(registry: DistrictRegistry = DISTRICT_REGISTRY) -> AggregationIndex:
+    """Aggregation index for a registry, built on first use"""
+    index = _indexes.get(registry.signature)
+    if index is None:
+        index = _indexes[registry.signature] = AggregationIndex(registry)
+    return index
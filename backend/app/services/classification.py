@@ -0,0 +1,86 @@
+"""
+Legend classification
+Histograms, quantile breaks and Jenks natural breaks of district values,
+precomputed by the climate cube so legends never class data on request
+"""
+from typing import Dict, List
+
+import numpy as np
+
+# Default number of legend classes
+DEFAULT_CLASSES = 7
+MAX_CLASSES = 12
+# Bins of the precomputed histograms
+HISTOGRAM_BINS = 20
+
+
+def histogram(values: np.ndarray, bins: int = HISTOGRAM_BINS) -> Dict[str, List[float]]:
+    """Equal-width histogram between the minimum and maximum"""
+    counts, edges = np.histogram(values, bins=bins)
+    return {"edges": edges.tolist(), "counts": counts.tolist()}
+
+
+def quantile_breaks(values: np.ndarray, classes: int) -> List[float]:
+    """Class boundaries with (about) the same number of values in every class"""
+    return np.quantile(values, np.linspace(0, 1, classes + 1)).tolist()
+
+
+def jenks_breaks(values: np.ndarray, classes: int) -> List[float]:
+    """
+    Jenks natural breaks: the classing of the sorted values that minimises
+    the total within-class sum of squared deviations, found exactly with
+    Fisher's dynamic programme. Boundaries are the minimum followed by the
+    largest value of each class; with fewer distinct values than classes,
+    every distinct value is its own class.
+    """
+    # Equal values never need to be split, so the programme runs over the
+    # distinct values weighted by their counts
+    x, counts = np.unique(values, return_counts=True)
+    if len(x) <= classes:
+        return [float(x[0])] + x.tolist()
+
+    n = len(x)
+    # Centring keeps the prefix-sum variance formula accurate
+    centred = x - np.average(x, weights=counts)
+    s0 = np.concatenate([[0], np.cumsum(counts)])
+    s1 = np.concatenate([[0.0], np.cumsum(counts * centred)])
+    s2 = np.concatenate([[0.0], np.cumsum(counts * centred * centred)])
+    i = np.arange(n)[:, None]
+    j = np.arange(n)[None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # ssd[i, j]: squared deviations of the class x[i..j]
+        ssd = s2[j + 1] - s2[i] - (s1[j + 1] - s1[i]) ** 2 / (s0[j + 1] - s0[i])
+    ssd = np.where(i <= j, ssd, np.inf)
+
+    cost = ssd[0]
+    starts = []
+    for _ in range(1, classes):
+        # The last class starts at i >= 1; the classes before it cover x[:i]
+        total = np.concatenate([[np.inf], cost[:-1]])[:, None] + ssd
+        total[0] = np.inf
+        start = total.argmin(axis=0)
+        cost = total[start, np.arange(n)]
+        starts.append(start)
+
+    uppers = []
+    end = n - 1
+    for start in reversed(starts):
+        uppers.append(float(x[end]))
+        end = int(start[end]) - 1
+    uppers.append(float(x[end]))
+    return [float(x[0])] + uppers[::-1]
+
+
+def classify(values: np.ndarray, classes: int = DEFAULT_CLASSES) -> dict:
+    """Range, histogram and both break sets of some values; NaNs are ignored"""
+    values = np.asarray(values, dtype=float).ravel()
+    values = values[~np.isnan(values)]
+    if not values.size:
+        return {"min": None, "max": None, "histogram": {"edges": [], "counts": []}, "quantile": [], "jenks": []}
+    return {
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "histogram": histogram(values),
+        "quantile": quantile_breaks(values, classes),
+        "jenks": jenks_breaks(values, classes),
+    }
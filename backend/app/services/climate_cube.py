@@ -0,0 +1,475 @@
+"""
+Precomputed climate data cube
+Holds every climate value in a NumPy array indexed by
+(variable, period, scenario, district) so endpoints only slice arrays
+"""
+import hashlib
+import json
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from app.models.schemas import (
+    ClimateComparison,
+    ClimateComparisonResponse,
+    ClimateResponse,
+    ClimateValue,
+)
+from app.data.district_registry import DISTRICT_REGISTRY
+from app.services.classification import DEFAULT_CLASSES, classify
+from app.services.data_plane import DataPlane, PlaneContents
+from app.data.mock_data import (
+    CLIMATE_VARIABLES,
+    REGIONAL_BASELINES,
+    get_climate_value,
+    get_ensemble_percentiles,
+)
+
+PERIODS = ("baseline", "2030", "2050", "2080")
+# Year ranges of each period (Implementation Plan, Phase 1.2)
+PERIOD_YEARS = {
+    "baseline": (1991, 2020),
+    "2030": (2021, 2050),
+    "2050": (2041, 2070),
+    "2080": (2071, 2100),
+}
+# Projections are interpolated between the periods' mid-years, and held flat outside them
+PERIOD_MIDPOINTS = np.array([(first + last) / 2 for first, last in PERIOD_YEARS.values()])
+YEAR_RANGE = (PERIOD_YEARS["baseline"][0], PERIOD_YEARS["2080"][1])
+SCENARIOS = ("historical", "rcp45", "rcp85")
+FUTURE_PERIODS = ("2030", "2050", "2080")
+FUTURE_SCENARIOS = ("rcp45", "rcp85")
+PERCENTILES = ("p10", "p50", "p90")
+# Fields districts can be ranked and filtered by
+RANK_FIELDS = ("value", "change", "change_percent")
+
+# A serialized response, owned or mapped from a data plane
+Body = Union[bytes, memoryview]
+
+
+def district_variation(district_id: str) -> float:
+    """Small deterministic per-district variation (-5% to +5%)"""
+    hash_val = int(hashlib.md5(district_id.encode()).hexdigest()[:8], 16)
+    return ((hash_val % 100) - 50) / 1000
+
+
+def cube_version(variables: List[dict], district_ids: List[str], values: np.ndarray, bands: np.ndarray) -> str:
+    """Content hash of a cube; a reload with different data gets a different version"""
+    digest = hashlib.sha1()
+    digest.update(json.dumps([variables, list(district_ids)]).encode())
+    digest.update(np.ascontiguousarray(values).tobytes())
+    digest.update(np.ascontiguousarray(bands).tobytes())
+    return digest.hexdigest()
+
+
+def _blob_name(kind: str, key: Tuple[str, str, str]) -> str:
+    return "/".join((kind,) + key)
+
+
+class ClimateCube:
+    """
+    Immutable climate values for all districts.
+
+    `values` has shape (variable, period, scenario, district). The
+    historical scenario and the baseline period both hold baseline
+    values. `change` and `change_percent` are derived from `values`
+    relative to the baseline. `bands` holds the 10th/50th/90th ensemble
+    percentiles as float32 with a leading percentile axis; NaN where the
+    store has none. `slopes` and `intercepts` (variable, segment,
+    scenario, district) are the straight lines between consecutive
+    period mid-years, so any year is one multiply-add over the districts.
+    Every column of values, changes and percentage changes also has its
+    district positions in ascending order and the sorted column, so
+    rankings are slices and range filters binary searches.
+    """
+
+    def __init__(
+        self,
+        variables: List[dict],
+        district_ids: List[str],
+        district_names: List[str],
+        values: np.ndarray,
+        bands: Optional[np.ndarray] = None,
+    ):
+        self._set_axes(variables, district_ids, district_names)
+        if bands is None:
+            bands = np.full((len(PERCENTILES),) + values.shape, np.nan, dtype=np.float32)
+        change, change_percent = _derive_changes(values)
+        self._set_arrays(values, bands, change, change_percent)
+        self.version = cube_version(variables, district_ids, values, bands)
+        # Set when the arrays and responses are mapped from a shared data plane
+        self.data_plane: Optional[DataPlane] = None
+
+        self._responses: Dict[Tuple[str, str, str], Body] = {}
+        self._comparisons: Dict[Tuple[str, str, str], Body] = {}
+        self._ranges: Dict[Tuple[str, str, str], Dict[str, float]] = {}
+        self._columns: Dict[Tuple[str, str, str], dict] = {}
+        self._classes: Dict[tuple, dict] = {}
+        self._build_responses()
+        self._build_classes()
+
+    @classmethod
+    def from_data_plane(cls, plane: DataPlane) -> "ClimateCube":
+        """Cube over the arrays and serialized responses of a plane, which are neither copied nor recomputed"""
+        meta = plane.meta
+        cube = cls.__new__(cls)
+        cube._set_axes(meta["variables"], meta["district_ids"], meta["district_names"])
+        arrays = plane.arrays
+        cube._set_arrays(arrays["values"], arrays["bands"], arrays["change"], arrays["change_percent"])
+        cube.version = meta["version"]
+        cube.data_plane = plane
+
+        cube._responses = {key: plane.blob(_blob_name("response", key)) for key in cube._response_keys()}
+        cube._comparisons = {key: plane.blob(_blob_name("comparison", key)) for key in cube._comparison_keys()}
+        cube._ranges = {tuple(key): value for key, value in meta["ranges"]}
+        cube._columns = {}
+        cube._classes = {tuple(key): value for key, value in meta["classes"]}
+        return cube
+
+    def data_plane_contents(self) -> PlaneContents:
+        """Arrays, serialized responses and metadata to write to a data plane"""
+        arrays = {
+            "values": self.values,
+            "bands": self.bands,
+            "change": self.change,
+            "change_percent": self.change_percent,
+        }
+        blobs = {_blob_name("response", key): bytes(body) for key, body in self._responses.items()}
+        blobs.update({_blob_name("comparison", key): bytes(body) for key, body in self._comparisons.items()})
+        meta = {
+            "version": self.version,
+            "variables": self.variables,
+            "district_ids": self.district_id_list,
+            "district_names": self.district_name_list,
+            "ranges": [[list(key), value] for key, value in self._ranges.items()],
+            "classes": [[list(key), value] for key, value in self._classes.items()],
+        }
+        return arrays, blobs, meta
+
+    def _set_axes(self, variables: List[dict], district_ids: List[str], district_names: List[str]):
+        self.variables = variables
+        self.variable_ids = tuple(v["id"] for v in variables)
+        self.periods = PERIODS
+        self.scenarios = SCENARIOS
+        self.district_ids = tuple(district_ids)
+        self.district_names = tuple(district_names)
+        self.district_id_list = list(district_ids)
+        self.district_name_list = list(district_names)
+
+        self._variable_index = {v: i for i, v in enumerate(self.variable_ids)}
+        self._period_index = {p: i for i, p in enumerate(PERIODS)}
+        self._scenario_index = {s: i for i, s in enumerate(SCENARIOS)}
+        self._district_index: Dict[str, int] = {}
+        for position, district_id in enumerate(self.district_ids):
+            self._district_index.setdefault(district_id, position)
+
+    def _set_arrays(self, values: np.ndarray, bands: np.ndarray, change: np.ndarray, change_percent: np.ndarray):
+        for array in (values, bands, change, change_percent):
+            array.flags.writeable = False
+        self.values = values
+        self.bands = bands
+        self.change = change
+        self.change_percent = change_percent
+        self.slopes, self.intercepts = _interpolation_coefficients(values)
+        self._sorted = {
+            field: _sort_index(array)
+            for field, array in zip(RANK_FIELDS, (values, change, change_percent))
+        }
+
+    def _response_keys(self) -> List[Tuple[str, str, str]]:
+        return [(v, p, s) for v in self.variable_ids for p in PERIODS for s in SCENARIOS]
+
+    def _comparison_keys(self) -> List[Tuple[str, str, str]]:
+        return [(v, p, s) for v in self.variable_ids for p in FUTURE_PERIODS for s in FUTURE_SCENARIOS]
+
+    def variable_info(self, variable: str) -> Optional[dict]:
+        """Metadata for a variable, or None if unknown"""
+        idx = self._variable_index.get(variable)
+        return self.variables[idx] if idx is not None else None
+
+    def index(self, variable: str, period: str, scenario: str) -> Tuple[int, int, int]:
+        """Array index of a (variable, period, scenario) column"""
+        return (
+            self._variable_index[variable],
+            self._period_index[period],
+            self._scenario_index[scenario],
+        )
+
+    def slice(self, variable: str, period: str, scenario: str) -> np.ndarray:
+        """Values for all districts (read-only view)"""
+        return self.values[self.index(variable, period, scenario)]
+
+    def interpolate(self, variable: str, year: float, scenario: str) -> np.ndarray:
+        """Values for all districts in any year, linear between period mid-years and flat outside them"""
+        year = min(max(year, PERIOD_MIDPOINTS[0]), PERIOD_MIDPOINTS[-1])
+        segment = min(int(np.searchsorted(PERIOD_MIDPOINTS, year, side="right")) - 1, len(PERIOD_MIDPOINTS) - 2)
+        v = self._variable_index[variable]
+        s = self._scenario_index[scenario]
+        return self.intercepts[v, segment, s] + self.slopes[v, segment, s] * year
+
+    def ranked(
+        self,
+        field: str,
+        variable: str,
+        period: str,
+        scenario: str,
+        descending: bool = True,
+        limit: Optional[int] = None,
+    ) -> np.ndarray:
+        """District positions of a column ordered by a field, highest first unless ascending"""
+        order, _ = self._sorted[field]
+        positions = order[self.index(variable, period, scenario)]
+        return (positions[::-1] if descending else positions)[:limit]
+
+    def in_range(
+        self,
+        field: str,
+        variable: str,
+        period: str,
+        scenario: str,
+        low: Optional[float] = None,
+        high: Optional[float] = None,
+        descending: bool = False,
+    ) -> np.ndarray:
+        """District positions of a column whose field is within [low, high], ordered by it"""
+        order, ordered = self._sorted[field]
+        idx = self.index(variable, period, scenario)
+        column = ordered[idx]
+        start = 0 if low is None else int(np.searchsorted(column, low, side="left"))
+        stop = len(column) if high is None else int(np.searchsorted(column, high, side="right"))
+        positions = order[idx][start:max(start, stop)]
+        return positions[::-1] if descending else positions
+
+    def district_position(self, district_id: str) -> Optional[int]:
+        """Index of a district on the district axis"""
+        return self._district_index.get(district_id)
+
+    def district_climate(self, position: int) -> Tuple[Dict[str, Dict[str, float]], Dict[str, Dict[str, Dict[str, float]]]]:
+        """
+        All values of one district keyed like the implementation plan
+        ({variable: {"baseline": ..., "2030_rcp45": ...}}), and the
+        ensemble percentiles under the same keys.
+        """
+        climate = {}
+        bands = {}
+        columns = [("baseline", "baseline", "historical")] + [
+            (f"{period}_{scenario}", period, scenario)
+            for scenario in FUTURE_SCENARIOS
+            for period in FUTURE_PERIODS
+        ]
+        for var_id in self.variable_ids:
+            climate[var_id] = {}
+            var_bands = {}
+            for key, period, scenario in columns:
+                v, p, s = self.index(var_id, period, scenario)
+                climate[var_id][key] = float(self.values[v, p, s, position])
+                band = self.bands[:, v, p, s, position]
+                if not np.isnan(band).any():
+                    var_bands[key] = {name: round(float(x), 1) for name, x in zip(PERCENTILES, band)}
+            if var_bands:
+                bands[var_id] = var_bands
+        return climate, bands
+
+    def get_response(self, variable: str, period: str, scenario: str) -> Body:
+        """Serialized all-district response for a variable, period and scenario"""
+        return self._responses[(variable, period, scenario)]
+
+    def get_comparison(self, variable: str, period: str, scenario: str) -> Body:
+        """Serialized baseline vs future comparison for a future period"""
+        return self._comparisons[(variable, period, scenario)]
+
+    def get_range(self, variable: str, period: str, scenario: str) -> Dict[str, float]:
+        """Precomputed min/max/mean across districts"""
+        return self._ranges[(variable, period, scenario)]
+
+    def get_classes(
+        self,
+        variable: str,
+        period: str,
+        scenario: str,
+        shared: bool = False,
+        change: bool = False,
+        classes: int = DEFAULT_CLASSES,
+    ) -> dict:
+        """
+        Histogram and quantile/Jenks breaks of a column's values (or changes).
+        Shared classes pool every period of the scenario, so the legend stays
+        fixed along the timeline. The default class count is precomputed;
+        others are computed on first use.
+        """
+        key = (variable, None if shared else period, scenario, change, classes)
+        result = self._classes.get(key)
+        if result is None:
+            result = self._classes[key] = classify(self._class_values(*key[:4]), classes)
+        return result
+
+    def column(self, variable: str, period: str, scenario: str) -> dict:
+        """Values, changes and range of one column as plain lists, built on first use"""
+        key = (variable, period, scenario)
+        column = self._columns.get(key)
+        if column is None:
+            idx = self.index(variable, period, scenario)
+            column = {
+                "values": self.values[idx].tolist(),
+                "change": self.change[idx].tolist(),
+                "change_percent": self.change_percent[idx].tolist(),
+                "range": self._ranges[key],
+            }
+            self._columns[key] = column
+        return column
+
+    def _class_values(self, variable: str, period: Optional[str], scenario: str, change: bool) -> np.ndarray:
+        """Values classed for a column, or for all periods of a scenario when period is None"""
+        array = self.change if change else self.values
+        v = self._variable_index[variable]
+        s = self._scenario_index[scenario]
+        if period is None:
+            return array[v, :, s]
+        return array[v, self._period_index[period], s]
+
+    def _build_classes(self):
+        # Identical columns (e.g. baseline values under every scenario) are classed once
+        classified: Dict[bytes, dict] = {}
+        for var_id in self.variable_ids:
+            for scenario in SCENARIOS:
+                for period in PERIODS + (None,):
+                    for change in (False, True):
+                        values = self._class_values(var_id, period, scenario, change)
+                        content = np.ascontiguousarray(values).tobytes()
+                        if content not in classified:
+                            classified[content] = classify(values)
+                        self._classes[(var_id, period, scenario, change, DEFAULT_CLASSES)] = classified[content]
+
+    def _build_responses(self):
+        for var in self.variables:
+            var_id = var["id"]
+            for period in PERIODS:
+                for scenario in SCENARIOS:
+                    values = self.slice(var_id, period, scenario).tolist()
+                    self._ranges[(var_id, period, scenario)] = {
+                        "min": min(values),
+                        "max": max(values),
+                        "mean": round(sum(values) / len(values), 1),
+                    }
+                    # Kept as JSON rather than models, which take several times the memory
+                    self._responses[(var_id, period, scenario)] = ClimateResponse(
+                        variable=var_id,
+                        variable_name=var["name"],
+                        period=period,
+                        scenario=scenario if period != "baseline" else "historical",
+                        unit=var["unit"],
+                        data=[
+                            ClimateValue(district_id=d_id, district_name=name, value=value)
+                            for d_id, name, value in zip(self.district_ids, self.district_names, values)
+                        ],
+                    ).model_dump_json().encode()
+
+            baseline = self.slice(var_id, "baseline", "historical").tolist()
+            for period in FUTURE_PERIODS:
+                for scenario in FUTURE_SCENARIOS:
+                    idx = self.index(var_id, period, scenario)
+                    rows = zip(
+                        self.district_ids,
+                        self.district_names,
+                        baseline,
+                        self.values[idx].tolist(),
+                        self.change[idx].tolist(),
+                        self.change_percent[idx].tolist(),
+                    )
+                    self._comparisons[(var_id, period, scenario)] = ClimateComparisonResponse(
+                        variable=var_id,
+                        variable_name=var["name"],
+                        period=period,
+                        scenario=scenario,
+                        unit=var["unit"],
+                        data=[
+                            ClimateComparison(
+                                district_id=d_id,
+                                district_name=name,
+                                baseline=base,
+                                future=future,
+                                change=change,
+                                change_percent=change_percent,
+                            )
+                            for d_id, name, base, future, change, change_percent in rows
+                        ],
+                    ).model_dump_json().encode()
+
+
+def _sort_index(array: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Ascending district order of every column, and the columns in that order"""
+    order = np.argsort(array, axis=-1, kind="stable")
+    ordered = np.take_along_axis(array, order, axis=-1)
+    order.flags.writeable = False
+    ordered.flags.writeable = False
+    return order, ordered
+
+
+def _interpolation_coefficients(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Slope and intercept (in years) of each segment between consecutive periods"""
+    slopes = np.diff(values, axis=1) / np.diff(PERIOD_MIDPOINTS)[None, :, None, None]
+    intercepts = values[:, :-1] - slopes * PERIOD_MIDPOINTS[None, :-1, None, None]
+    slopes.flags.writeable = False
+    intercepts.flags.writeable = False
+    return slopes, intercepts
+
+
+def _derive_changes(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Change and percentage change of every column relative to the baseline"""
+    change = np.zeros(values.shape)
+    change_percent = np.zeros(values.shape)
+    baseline_values = values[:, 0, 0, :]
+
+    for v in range(values.shape[0]):
+        baseline = baseline_values[v].tolist()
+        for p in range(1, values.shape[1]):
+            for s in range(values.shape[2]):
+                deltas = []
+                percents = []
+                for base, future in zip(baseline, values[v, p, s].tolist()):
+                    delta = round(future - base, 1)
+                    deltas.append(delta)
+                    percents.append(round((delta / base) * 100, 1) if base != 0 else 0)
+                change[v, p, s] = deltas
+                change_percent[v, p, s] = percents
+
+    return change, change_percent
+
+
+def mock_cube_inputs() -> Tuple[List[dict], List[str], List[str], np.ndarray, np.ndarray]:
+    """Variables, district ids and names, values and bands of the mock regional baselines"""
+    records = DISTRICT_REGISTRY.records
+    district_ids = [record.id for record in records]
+    district_names = [record.name for record in records]
+
+    shape = (len(CLIMATE_VARIABLES), len(PERIODS), len(SCENARIOS), len(records))
+    values = np.zeros(shape)
+    bands = np.zeros((len(PERCENTILES),) + shape, dtype=np.float32)
+
+    for d, record in enumerate(records):
+        variation = district_variation(record.id)
+        baseline_values = REGIONAL_BASELINES.get(record.region, REGIONAL_BASELINES["Greater Accra"])
+
+        for v, var in enumerate(CLIMATE_VARIABLES):
+            baseline_value = baseline_values.get(var["id"], 0)
+            baseline = round(baseline_value * (1 + variation), 1)
+            values[v, :, :, d] = baseline
+            bands[:, v, :, :, d] = np.array(get_ensemble_percentiles(baseline, baseline))[:, None, None]
+
+            for p, period in enumerate(PERIODS):
+                if period == "baseline":
+                    continue
+                for s, scenario in enumerate(SCENARIOS):
+                    if scenario == "historical":
+                        continue
+                    projected = get_climate_value(baseline_value, var["id"], scenario, period)
+                    future = round(projected * (1 + variation), 1)
+                    values[v, p, s, d] = future
+                    bands[:, v, p, s, d] = get_ensemble_percentiles(baseline, future)
+
+    return CLIMATE_VARIABLES, district_ids, district_names, values, bands
+
+
+def build_mock_cube() -> ClimateCube:
+    """Build the climate cube from the mock regional baselines"""
+    return ClimateCube(*mock_cube_inputs())
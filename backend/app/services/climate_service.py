@@ -0,0 +1,323 @@
+"""
+Climate data service
+Owns the active climate cube and loads it from the SQLite climate store
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional
+
+import numpy as np
+
+from app import config
+from app.code_version import CODE_VERSION
+from app.data.district_registry import DISTRICT_REGISTRY, DistrictRegistry
+from app.data.geometry import geometry_area_km2
+from app.data.mock_data import CLIMATE_VARIABLES
+from app.database import (
+    SELECT_CLIMATE_COLUMN,
+    SELECT_CLIMATE_COLUMN_WITHOUT_BANDS,
+    SELECT_CLIMATE_COLUMNS_INFO,
+    SELECT_VARIABLES,
+    UPSERT_CLIMATE_VALUE,
+    UPSERT_DISTRICT,
+    UPSERT_VARIABLE,
+    ConnectionPool,
+    create_database,
+)
+from app.services.climate_cube import (
+    FUTURE_PERIODS,
+    FUTURE_SCENARIOS,
+    PERCENTILES,
+    PERIODS,
+    SCENARIOS,
+    ClimateCube,
+    build_mock_cube,
+    cube_version,
+    mock_cube_inputs,
+)
+from app.services.data_plane import open_data_plane, plane_path
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetSnapshot(NamedTuple):
+    """An immutable climate cube and the version of the data it serves"""
+    cube: ClimateCube
+    version: str
+
+
+def _dataset_version(cube_version: str) -> str:
+    # The version covers climate values, district boundaries and the code that serializes them
+    return hashlib.sha1(f"{cube_version}:{DISTRICT_REGISTRY.signature}:{CODE_VERSION}".encode()).hexdigest()[:16]
+
+
+def make_snapshot(cube: ClimateCube) -> DatasetSnapshot:
+    """Snapshot of a cube and its dataset version"""
+    return DatasetSnapshot(cube, _dataset_version(cube.version))
+
+
+def share_cube(
+    variables: List[dict],
+    district_ids: List[str],
+    district_names: List[str],
+    values: np.ndarray,
+    bands: np.ndarray,
+    plane_dir: Path = config.DATA_PLANE_DIR,
+) -> ClimateCube:
+    """
+    Cube mapped from the data plane of its content, which the first worker
+    process to need it builds and writes; the others only attach. Falls back
+    to a cube private to this process when the plane cannot be written.
+    """
+    version = _dataset_version(cube_version(variables, district_ids, values, bands))
+    try:
+        plane = open_data_plane(
+            plane_path(plane_dir, "cube", version),
+            lambda: ClimateCube(variables, district_ids, district_names, values, bands).data_plane_contents(),
+        )
+    except OSError as exc:
+        logger.warning("Data plane unavailable (%s); building the climate cube in this process", exc)
+        return ClimateCube(variables, district_ids, district_names, values, bands)
+    return ClimateCube.from_data_plane(plane)
+
+
+_snapshot: Optional[DatasetSnapshot] = None
+# Snapshot a request started on; it keeps using it if a reload swaps in another
+_request_snapshot: ContextVar[Optional[DatasetSnapshot]] = ContextVar("request_snapshot", default=None)
+
+
+def active_snapshot() -> DatasetSnapshot:
+    """The snapshot new requests are served from (mock data until one is loaded)"""
+    global _snapshot
+    if _snapshot is None:
+        _snapshot = make_snapshot(share_cube(*mock_cube_inputs()))
+    return _snapshot
+
+
+def get_snapshot() -> DatasetSnapshot:
+    """The current request's snapshot, else the active one"""
+    pinned = _request_snapshot.get()
+    return pinned if pinned is not None else active_snapshot()
+
+
+def get_climate_cube() -> ClimateCube:
+    """Return the climate cube being served"""
+    return get_snapshot().cube
+
+
+def set_snapshot(snapshot: DatasetSnapshot):
+    """Make a snapshot the active one; requests already running keep theirs"""
+    global _snapshot
+    # A single reference assignment, so readers see either snapshot whole
+    _snapshot = snapshot
+
+
+def set_climate_cube(cube: ClimateCube) -> DatasetSnapshot:
+    """Replace the active climate cube"""
+    snapshot = make_snapshot(cube)
+    set_snapshot(snapshot)
+    return snapshot
+
+
+def get_dataset_version() -> str:
+    """Short version of the data being served (climate values and district boundaries) and of the code serving it"""
+    return get_snapshot().version
+
+
+@contextmanager
+def pinned_snapshot(snapshot: Optional[DatasetSnapshot] = None) -> Iterator[DatasetSnapshot]:
+    """Serve everything in this context (and tasks or threads started from it) from one snapshot"""
+    snapshot = snapshot or active_snapshot()
+    token = _request_snapshot.set(snapshot)
+    try:
+        yield snapshot
+    finally:
+        _request_snapshot.reset(token)
+
+
+def get_district_climate_data(district_id: str) -> Optional[dict]:
+    """Climate values and ensemble percentile bands of one district, or None if unknown"""
+    cube = get_climate_cube()
+    position = cube.district_position(district_id)
+    if position is None:
+        return None
+    climate, bands = cube.district_climate(position)
+    return {"climate": climate, "bands": bands}
+
+
+def district_timeseries(climate_data: dict, variable: str, scenario: str) -> dict:
+    """
+    Baseline and every future period of one variable under a scenario, with
+    changes and percentile bands, from get_district_climate_data output
+    """
+    values = climate_data["climate"][variable]
+    bands = climate_data["bands"].get(variable, {})
+    baseline = values["baseline"]
+
+    data = []
+    for period, key in [("baseline", "baseline")] + [(p, f"{p}_{scenario}") for p in FUTURE_PERIODS]:
+        value = values[key]
+        change = round(value - baseline, 1)
+        data.append({
+            "period": period,
+            "value": value,
+            "change": change,
+            "change_percent": round((change / baseline) * 100, 1) if baseline != 0 else 0,
+            **bands.get(key, {}),
+        })
+    return {"baseline": baseline, "data": data}
+
+
+def _stored_columns():
+    """(period, scenario) pairs stored in the climate_data table"""
+    yield "baseline", "historical"
+    for period in FUTURE_PERIODS:
+        for scenario in FUTURE_SCENARIOS:
+            yield period, scenario
+
+
+async def load_climate_cube(pool: ConnectionPool, registry: DistrictRegistry = DISTRICT_REGISTRY) -> ClimateCube:
+    """
+    Build a climate cube from the store.
+
+    Each (variable, period, scenario) column is one indexed lookup on
+    idx_climate_lookup; columns are fetched concurrently across the pool.
+    """
+    rows = await pool.fetch_all(SELECT_VARIABLES)
+    variables = [
+        {
+            "id": var_id,
+            "name": name,
+            "description": description or "",
+            "unit": unit,
+            "category": category or "",
+            "color_scale": color_scale or "",
+        }
+        for var_id, name, description, unit, category, color_scale in rows
+    ] or CLIMATE_VARIABLES
+
+    # Duplicate district IDs share one stored row
+    positions = {}
+    for position, record in enumerate(registry.records):
+        positions.setdefault(record.id, []).append(position)
+
+    shape = (len(variables), len(PERIODS), len(SCENARIOS), len(registry))
+    values = np.full(shape, np.nan)
+    bands = np.full((len(PERCENTILES),) + shape, np.nan, dtype=np.float32)
+
+    columns = {name for (name,) in await pool.fetch_all(SELECT_CLIMATE_COLUMNS_INFO)}
+    query = SELECT_CLIMATE_COLUMN if "p10" in columns else SELECT_CLIMATE_COLUMN_WITHOUT_BANDS
+
+    async def load_column(v: int, var_id: str, period: str, scenario: str):
+        column = np.full(len(registry), np.nan)
+        column_bands = np.full((len(PERCENTILES), len(registry)), np.nan)
+        for district_id, value, *percentiles in await pool.fetch_all(query, (var_id, period, scenario)):
+            for position in positions.get(district_id, ()):
+                column[position] = value
+                column_bands[:, position] = [np.nan if x is None else x for x in percentiles]
+
+        missing = int(np.isnan(column).sum())
+        if missing:
+            raise ValueError(f"climate_data is missing {missing} districts for {var_id}/{period}/{scenario}")
+
+        if period == "baseline":
+            values[v, 0, :, :] = column
+            bands[:, v, 0, :, :] = column_bands[:, None, :]
+        else:
+            values[v, PERIODS.index(period), SCENARIOS.index(scenario), :] = column
+            bands[:, v, PERIODS.index(period), SCENARIOS.index(scenario), :] = column_bands
+
+    await asyncio.gather(*(
+        load_column(v, var["id"], period, scenario)
+        for v, var in enumerate(variables)
+        for period, scenario in _stored_columns()
+    ))
+
+    # The historical scenario has no projections and repeats the baseline
+    historical = SCENARIOS.index("historical")
+    values[:, :, historical, :] = values[:, :1, historical, :]
+    bands[:, :, :, historical, :] = bands[:, :, :1, historical, :]
+
+    # Prebuilding responses takes a while; keep it off the event loop
+    return await asyncio.to_thread(
+        share_cube,
+        variables,
+        [record.id for record in registry.records],
+        [record.name for record in registry.records],
+        values,
+        bands,
+    )
+
+
+async def read_climate_cube(db_path: Path = config.CLIMATE_DB_PATH) -> Optional[ClimateCube]:
+    """Build a cube from the store, or None if there is no store"""
+    if not db_path.exists():
+        return None
+    pool = ConnectionPool(db_path)
+    await pool.open()
+    try:
+        return await load_climate_cube(pool)
+    finally:
+        await pool.close()
+
+
+async def initialize(db_path: Path = config.CLIMATE_DB_PATH):
+    """Load the active cube from the store if it exists, otherwise use mock data"""
+    cube = await read_climate_cube(db_path)
+    if cube is None:
+        logger.info("Climate store %s not found, serving mock data", db_path)
+        set_climate_cube(share_cube(*mock_cube_inputs()))
+        return
+    set_climate_cube(cube)
+    logger.info("Loaded climate data from %s", db_path)
+
+
+def write_districts(conn: sqlite3.Connection, registry: DistrictRegistry = DISTRICT_REGISTRY):
+    """Write the registry districts into the store"""
+    conn.executemany(UPSERT_DISTRICT, (
+        (
+            record.id, record.name, record.region, round(geometry_area_km2(record.geometry), 1), record.population,
+            record.centroid[1], record.centroid[0], json.dumps(record.geometry),
+        )
+        for record in registry.records
+    ))
+
+
+def write_climate_cube(db_path: Path, cube: ClimateCube, registry: DistrictRegistry = DISTRICT_REGISTRY):
+    """Write a cube, its variables and the registry districts into the store"""
+    conn = create_database(db_path)
+    with conn:
+        write_districts(conn, registry)
+        conn.executemany(UPSERT_VARIABLE, (
+            (var["id"], var["name"], var["description"], var["unit"], var["category"], var["color_scale"])
+            for var in cube.variables
+        ))
+        for var in cube.variables:
+            for period, scenario in _stored_columns():
+                v, p, s = cube.index(var["id"], period, scenario)
+                column = cube.values[v, p, s].tolist()
+                percentiles = [
+                    [None if np.isnan(x) else round(x, 1) for x in band]
+                    for band in cube.bands[:, v, p, s].astype(float).tolist()
+                ]
+                conn.executemany(UPSERT_CLIMATE_VALUE, (
+                    (district_id, var["id"], period, scenario, value, p10, p50, p90, var["unit"])
+                    for district_id, value, p10, p50, p90 in zip(cube.district_ids, column, *percentiles)
+                ))
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed the SQLite climate store with mock data")
+    parser.add_argument("--db", type=Path, default=config.CLIMATE_DB_PATH, help="Path to the SQLite file")
+    args = parser.parse_args()
+
+    write_climate_cube(args.db, build_mock_cube())
+    print(f"Wrote mock climate data to {args.db}")
@@ -0,0 +1,167 @@
+"""
+Shared data plane
+Precomputed arrays and serialized response bodies are written once to a
+file that every worker process memory-maps read-only. The pages live in
+the OS page cache, so several uvicorn workers (and the job workers) share
+one copy, and a process that starts after the file exists attaches to it
+instead of recomputing its contents.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from app.code_version import CODE_VERSION
+
+try:
+    import fcntl
+except ImportError:  # Windows; concurrent writers then duplicate work but still replace the file atomically
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Bump when the file layout changes; what planes contain follows the code version
+DATA_PLANE_FORMAT = 1
+MAGIC = b"DATAPLANE%d\n" % DATA_PLANE_FORMAT
+# Sections start on cache-line boundaries, which also aligns every dtype
+ALIGNMENT = 64
+# Planes of older versions kept per kind, for workers that have not reloaded yet
+KEEP_PLANES = 2
+
+PlaneContents = Tuple[Dict[str, np.ndarray], Dict[str, bytes], dict]
+
+
+def plane_path(directory: Path, kind: str, key: str) -> Path:
+    """
+    File of a plane kind whose contents are determined by `key`. The name
+    also covers the code version and file format, so planes written by a
+    previous deploy are never attached to, even if the key is unchanged.
+    """
+    digest = hashlib.sha1(f"{key}:{CODE_VERSION}:{DATA_PLANE_FORMAT}".encode()).hexdigest()[:16]
+    return directory / f"{kind}_{digest}.plane"
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class DataPlane:
+    """
+    A mapped plane file: named read-only arrays and byte blobs (both views
+    into the mapping, so nothing is copied) and a JSON metadata document.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a data plane of format {DATA_PLANE_FORMAT}")
+        header_length = int.from_bytes(self._map[len(MAGIC):len(MAGIC) + 8], "little")
+        start = len(MAGIC) + 8
+        header = json.loads(self._map[start:start + header_length])
+        self.meta: dict = header["meta"]
+
+        data = memoryview(self._map)[_aligned(start + header_length):]
+        self.arrays: Dict[str, np.ndarray] = {
+            name: np.frombuffer(data, dtype=np.dtype(dtype), count=int(np.prod(shape)), offset=offset).reshape(shape)
+            for name, (offset, dtype, shape) in header["arrays"].items()
+        }
+        self._blobs: Dict[str, memoryview] = {
+            name: data[offset:offset + length] for name, (offset, length) in header["blobs"].items()
+        }
+
+    def blob(self, name: str) -> memoryview:
+        return self._blobs[name]
+
+    def has_blob(self, name: str) -> bool:
+        return name in self._blobs
+
+
+def write_data_plane(path: Path, arrays: Dict[str, np.ndarray], blobs: Dict[str, bytes], meta: dict):
+    """Write a plane next to its final path and move it into place when complete"""
+    sections = []
+    layout = {"arrays": {}, "blobs": {}, "meta": meta}
+    # Offsets are relative to the data section, which follows the header
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        layout["arrays"][name] = [offset, array.dtype.str, list(array.shape)]
+        sections.append((offset, array.tobytes()))
+        offset = _aligned(offset + array.nbytes)
+    for name, blob in blobs.items():
+        layout["blobs"][name] = [offset, len(blob)]
+        sections.append((offset, blob))
+        offset = _aligned(offset + len(blob))
+
+    header = json.dumps(layout, separators=(",", ":")).encode()
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+    partial = path.with_name(f"{path.name}.{os.getpid()}.part")
+    with open(partial, "wb") as f:
+        f.write(MAGIC + len(header).to_bytes(8, "little") + header)
+        for section_offset, data in sections:
+            f.seek(data_start + section_offset)
+            f.write(data)
+        f.truncate(data_start + offset)
+    os.replace(partial, path)
+
+
+@contextmanager
+def _exclusive(path: Path) -> Iterator[None]:
+    """Hold the plane directory's lock while a plane is written, so concurrent workers build it once"""
+    if fcntl is None:
+        yield
+        return
+    with open(path.parent / ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _prune(path: Path):
+    """Remove older planes of the same kind (files named <kind>_<key>.plane)"""
+    kind = path.name.split("_", 1)[0]
+    planes = sorted(path.parent.glob(f"{kind}_*.plane"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in planes[KEEP_PLANES:]:
+        try:
+            # Processes that still map an old plane keep reading it (POSIX)
+            old.unlink()
+        except OSError:
+            pass
+
+
+def _attach(path: Path) -> Optional[DataPlane]:
+    try:
+        return DataPlane(path)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        logger.info("Replacing data plane %s, which has another format or is incomplete", path)
+        return None
+
+
+def open_data_plane(path: Path, build: Callable[[], PlaneContents]) -> DataPlane:
+    """
+    Attach to the plane at `path`, building and writing it first if no
+    process has. Raises OSError when the plane directory is not writable.
+    """
+    plane = _attach(path)
+    if plane is None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _exclusive(path):
+            # Another worker may have written it while this one waited
+            plane = _attach(path)
+            if plane is None:
+                write_data_plane(path, *build())
+                logger.info("Wrote data plane %s", path)
+                _prune(path)
+                plane = DataPlane(path)
+    return plane
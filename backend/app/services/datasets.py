@@ -0,0 +1,132 @@
+"""
+Dataset reloads
+A new version of the climate store is loaded into a fresh snapshot in the
+background while the current one keeps serving. Once its responses are
+warmed, the snapshot is swapped in with a single assignment: requests
+already running finish on the snapshot they started with, new requests
+see the new one, and cached responses of the old version are dropped.
+"""
+import asyncio
+import gc
+import logging
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional, Sequence, Tuple
+
+from app import config
+from app.services import climate_service
+from app.services.response_cache import RESPONSE_CACHES
+
+logger = logging.getLogger(__name__)
+
+
+class ReloadResult(NamedTuple):
+    reloaded: bool
+    dataset_version: str
+    previous_version: str
+
+
+def _store_signature(db_path: Path) -> Optional[Tuple]:
+    """Modification time and size of the store and its write-ahead log (None if there is no store)"""
+    signature = []
+    for path in (db_path, db_path.with_name(db_path.name + "-wal")):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            if path == db_path:
+                return None
+            signature.append(None)
+        else:
+            signature.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def _freeze_heap():
+    """
+    Move the objects alive now (the active snapshot, its prebuilt responses)
+    out of the garbage collector's reach. Otherwise the allocations of a
+    reload trigger full collections that walk the whole heap while holding
+    the GIL, stalling the event loop for tens of milliseconds. Frozen
+    objects are still freed by reference counting once unreferenced.
+    """
+    gc.freeze()
+
+
+class DatasetManager:
+    """
+    Reloads the climate store on request, or when its files change.
+
+    `warm` functions build the most expensive responses of a new snapshot
+    before it is swapped in, so the first requests after a reload are as
+    fast as the ones before it.
+    """
+
+    def __init__(
+        self,
+        db_path: Path = config.CLIMATE_DB_PATH,
+        poll_interval: float = config.DATASET_POLL_INTERVAL,
+    ):
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        self._warm: Sequence[Callable[[], None]] = ()
+        self._lock = asyncio.Lock()
+        self._watcher: Optional[asyncio.Task] = None
+
+    def start(self, warm: Sequence[Callable[[], None]] = ()):
+        self._warm = warm
+        self._lock = asyncio.Lock()
+        _freeze_heap()
+        if self.poll_interval > 0:
+            self._watcher = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+            self._watcher = None
+
+    def _prepare(self, snapshot: climate_service.DatasetSnapshot):
+        with climate_service.pinned_snapshot(snapshot):
+            for warm in self._warm:
+                warm()
+
+    async def reload(self) -> ReloadResult:
+        """Load the store into a new snapshot and swap it in if its data differs from the active one"""
+        async with self._lock:
+            previous = climate_service.active_snapshot()
+            cube = await climate_service.read_climate_cube(self.db_path)
+            if cube is None:
+                logger.warning("Climate store %s not found, keeping dataset %s", self.db_path, previous.version)
+                return ReloadResult(False, previous.version, previous.version)
+
+            snapshot = climate_service.make_snapshot(cube)
+            if snapshot.version == previous.version:
+                return ReloadResult(False, previous.version, previous.version)
+
+            await asyncio.to_thread(self._prepare, snapshot)
+            climate_service.set_snapshot(snapshot)
+            _freeze_heap()
+            evicted = sum(cache.evict_stale(snapshot.version) for cache in RESPONSE_CACHES)
+            logger.info(
+                "Reloaded climate data from %s: dataset %s -> %s (%d cached responses dropped)",
+                self.db_path, previous.version, snapshot.version, evicted,
+            )
+            return ReloadResult(True, snapshot.version, previous.version)
+
+    async def _watch(self):
+        """Reload once the store has changed and then stayed unchanged for a whole poll interval"""
+        loaded = _store_signature(self.db_path)
+        seen = loaded
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            current = await asyncio.to_thread(_store_signature, self.db_path)
+            if current is not None and current != loaded and current == seen:
+                try:
+                    await self.reload()
+                except Exception:
+                    # Typically a store caught mid-write; it is retried when it changes again
+                    logger.exception("Reloading climate data from %s failed", self.db_path)
+                loaded = current
+            seen = current
+
+
+dataset_manager = DatasetManager()
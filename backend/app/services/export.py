@@ -0,0 +1,195 @@
+"""
+Bulk export
+Streams climate values for many districts as CSV, Parquet or Arrow IPC.
+Rows are sliced from the climate cube a batch at a time and every batch
+is encoded and sent before the next is built, so memory stays bounded
+by the batch size rather than the size of the export.
+"""
+import csv
+import io
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.data.district_registry import DISTRICT_REGISTRY, DistrictRegistry
+from app.services.climate_cube import FUTURE_PERIODS, FUTURE_SCENARIOS, PERCENTILES, ClimateCube
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+EXPORT_EXTENSIONS = {"csv": "csv", "parquet": "parquet", "arrow": "arrows"}
+
+STRING_FIELDS = ("district_id", "district_name", "region", "variable", "period", "scenario", "unit")
+NUMBER_FIELDS = ("value", "change", "change_percent") + PERCENTILES
+EXPORT_FIELDS = STRING_FIELDS + NUMBER_FIELDS
+
+# Rows encoded per batch (and per Parquet row group)
+EXPORT_BATCH_ROWS = 65536
+
+
+def stored_columns(
+    variables: Sequence[str],
+    periods: Optional[Sequence[str]] = None,
+    scenarios: Optional[Sequence[str]] = None,
+) -> List[Tuple[str, str, str]]:
+    """
+    (variable, period, scenario) columns to export. The baseline is
+    stored once, under the historical scenario, and is included whenever
+    the baseline period is selected whatever the scenarios.
+    """
+    columns = []
+    for variable in variables:
+        if not periods or "baseline" in periods:
+            columns.append((variable, "baseline", "historical"))
+        for scenario in FUTURE_SCENARIOS:
+            if scenarios and scenario not in scenarios:
+                continue
+            for period in FUTURE_PERIODS:
+                if not periods or period in periods:
+                    columns.append((variable, period, scenario))
+    return columns
+
+
+def district_positions(regions: Optional[Sequence[str]], registry: DistrictRegistry = DISTRICT_REGISTRY) -> np.ndarray:
+    """Positions on the district axis of the districts in any of the regions (all if none)"""
+    if not regions:
+        return np.arange(len(registry))
+    wanted = {region.lower() for region in regions}
+    return np.array(
+        [position for position, record in enumerate(registry.records) if record.region.lower() in wanted],
+        dtype=np.int64,
+    )
+
+
+def iter_batches(
+    cube: ClimateCube,
+    columns: Sequence[Tuple[str, str, str]],
+    positions: np.ndarray,
+    registry: DistrictRegistry = DISTRICT_REGISTRY,
+    batch_rows: int = EXPORT_BATCH_ROWS,
+) -> Iterator[dict]:
+    """
+    Batches of rows as {field: array}, with whole columns per batch and
+    the selected districts in registry order within each column.
+    """
+    ids = np.array(cube.district_ids, dtype=object)[positions]
+    names = np.array(cube.district_names, dtype=object)[positions]
+    regions = np.array([record.region for record in registry.records], dtype=object)[positions]
+    units = {var["id"]: var["unit"] for var in cube.variables}
+    per_batch = max(1, batch_rows // max(len(positions), 1))
+
+    for start in range(0, len(columns), per_batch):
+        batch_columns = columns[start:start + per_batch]
+        indices = [cube.index(*column) for column in batch_columns]
+        count = len(batch_columns)
+        batch = {
+            "district_id": np.tile(ids, count),
+            "district_name": np.tile(names, count),
+            "region": np.tile(regions, count),
+        }
+        for position, field in enumerate(("variable", "period", "scenario")):
+            batch[field] = np.repeat(np.array([column[position] for column in batch_columns], dtype=object), len(ids))
+        batch["unit"] = np.repeat(np.array([units[column[0]] for column in batch_columns], dtype=object), len(ids))
+        batch["value"] = np.concatenate([cube.values[idx][positions] for idx in indices])
+        batch["change"] = np.concatenate([cube.change[idx][positions] for idx in indices])
+        batch["change_percent"] = np.concatenate([cube.change_percent[idx][positions] for idx in indices])
+        for band, name in enumerate(PERCENTILES):
+            # Bands are float32; rounding drops the float32 noise, as district_climate does
+            values = np.concatenate([cube.bands[(band,) + idx][positions] for idx in indices])
+            batch[name] = np.round(values.astype(float), 1)
+        yield batch
+
+
+def stream_csv(batches: Iterator[dict]) -> Iterator[bytes]:
+    """CSV with a header row; missing numbers are empty"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(EXPORT_FIELDS)
+    for batch in batches:
+        fields = [batch[field].tolist() for field in STRING_FIELDS]
+        for field in NUMBER_FIELDS:
+            numbers = batch[field].astype(object)
+            numbers[np.isnan(batch[field])] = ""
+            fields.append(numbers.tolist())
+        writer.writerows(zip(*fields))
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError as exc:
+        raise RuntimeError("Parquet and Arrow exports require the pyarrow package (pip install pyarrow)") from exc
+    return pyarrow
+
+
+class _ChunkSink:
+    """Write-only file whose bytes are taken out as soon as they are written"""
+
+    def __init__(self):
+        self.closed = False
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def writable(self) -> bool:
+        return True
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_arrow(batches: Iterator[dict], format: str) -> Iterator[bytes]:
+    """Parquet (one row group per batch) or an Arrow IPC stream (one record batch per batch)"""
+    pa = _pyarrow()
+    schema = pa.schema(
+        [(field, pa.string()) for field in STRING_FIELDS]
+        + [(field, pa.float64()) for field in NUMBER_FIELDS]
+    )
+    sink = _ChunkSink()
+    if format == "parquet":
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+    else:
+        writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema)
+
+    for batch in batches:
+        # from_pandas turns NaN into null
+        arrays = [pa.array(batch[field], type=schema.field(field).type, from_pandas=True) for field in EXPORT_FIELDS]
+        writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def stream_export(batches: Iterator[dict], format: str) -> Iterator[bytes]:
+    """
+    Encoded chunks of an export. Raises RuntimeError straight away (not
+    on first iteration) when the format needs a missing optional package.
+    """
+    if format == "csv":
+        return stream_csv(batches)
+    _pyarrow()
+    return stream_arrow(batches, format)
@@ -0,0 +1,175 @@
+"""
+Compact district geometry formats
+TopoJSON and a varint-packed binary encoding, both built from the shared
+arcs of the boundary topology so every border is sent once
+
+Binary layout (all integers are varints, signed ones zigzag-encoded):
+
+    b"CATB", format version byte (1)
+    digits                        coordinates are integers / 10**digits
+    translate x, y (signed)       added to every decoded coordinate
+    arc count
+      per arc: point count, then (dx, dy) pairs (signed); the first pair
+      is relative to the translation, the rest to the previous point
+    district count
+      per district: id, name, region (length-prefixed UTF-8),
+      centroid x, y (signed, relative to the translation),
+      polygon count, then per polygon its ring count followed by the arc
+      count of each ring, then the arc references of every ring in order
+      (signed; ~i means arc i reversed)
+"""
+import json
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from app.data.district_registry import DistrictRecord
+from app.data.topology import Topology
+
+BINARY_MAGIC = b"CATB"
+BINARY_VERSION = 1
+BINARY_MEDIA_TYPE = "application/vnd.climate-atlas.topology"
+
+# Quantization of full-resolution arcs (about 10 cm)
+FULL_RESOLUTION_DIGITS = 6
+
+
+def _varints(values) -> bytes:
+    """Unsigned LEB128 encoding of a sequence of non-negative integers"""
+    values = np.asarray(values, dtype=np.uint64)
+    if values.size == 0:
+        return b""
+    lengths = np.ones(values.size, dtype=np.int64)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        lengths += rest > 0
+        rest >>= np.uint64(7)
+
+    out = np.empty(int(lengths.sum()), dtype=np.uint8)
+    offsets = np.cumsum(lengths) - lengths
+    for k in range(int(lengths.max())):
+        active = lengths > k
+        low_bits = (values[active] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (lengths[active] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[offsets[active] + k] = (low_bits | more).astype(np.uint8)
+    return out.tobytes()
+
+
+def _zigzag(values) -> np.ndarray:
+    values = np.asarray(values, dtype=np.int64)
+    return ((values << 1) ^ (values >> 63)).view(np.uint64)
+
+
+def _string(value: str) -> bytes:
+    data = value.encode()
+    return _varints([len(data)]) + data
+
+
+class QuantizedSelection:
+    """
+    The arcs used by a set of districts, renumbered in order of first use
+    and quantized to integers relative to the bounding box corner.
+    """
+
+    def __init__(self, topology: Topology, indices: Sequence[int]):
+        self.digits = topology.digits if topology.digits is not None else FULL_RESOLUTION_DIGITS
+        self.scale = 10.0 ** self.digits
+
+        renumbered: Dict[int, int] = {}
+        self.geometries: List[List[List[List[int]]]] = []
+        for index in indices:
+            polygons = []
+            for polygon in topology.geometries[index]:
+                rings = []
+                for ring in polygon:
+                    refs = []
+                    for ref in ring:
+                        arc = ref if ref >= 0 else ~ref
+                        new = renumbered.setdefault(arc, len(renumbered))
+                        refs.append(new if ref >= 0 else ~new)
+                    rings.append(refs)
+                polygons.append(rings)
+            self.geometries.append(polygons)
+
+        arcs = [np.rint(topology.arcs[arc] * self.scale).astype(np.int64) for arc in renumbered]
+        self.translate = (
+            np.min([arc.min(axis=0) for arc in arcs], axis=0) if arcs else np.zeros(2, dtype=np.int64)
+        )
+        # Delta encoding; the first point is relative to the translation
+        self.deltas = [np.diff(arc, axis=0, prepend=[self.translate]) for arc in arcs]
+
+    def quantize(self, point: Sequence[float]) -> List[int]:
+        return (np.rint(np.asarray(point) * self.scale).astype(np.int64) - self.translate).tolist()
+
+
+def _topojson_geometry(polygons: List[List[List[int]]]) -> dict:
+    if len(polygons) == 1:
+        return {"type": "Polygon", "arcs": polygons[0]}
+    return {"type": "MultiPolygon", "arcs": polygons}
+
+
+def encode_topojson(topology: Topology, records: Sequence[DistrictRecord], indices: Sequence[int]) -> bytes:
+    """Quantized, delta-encoded TopoJSON with a `districts` GeometryCollection"""
+    selection = QuantizedSelection(topology, indices)
+    scale = 1 / selection.scale
+    translate = (selection.translate * scale).tolist()
+    extents = [arc.cumsum(axis=0) for arc in selection.deltas]
+    topology_json = {
+        "type": "Topology",
+        "transform": {"scale": [scale, scale], "translate": translate},
+        "objects": {
+            "districts": {
+                "type": "GeometryCollection",
+                "geometries": [
+                    {
+                        **_topojson_geometry(polygons),
+                        "id": records[index].id,
+                        "properties": {
+                            "id": records[index].id,
+                            "name": records[index].name,
+                            "region": records[index].region,
+                            "centroid": records[index].centroid,
+                        },
+                    }
+                    for index, polygons in zip(indices, selection.geometries)
+                ],
+            }
+        },
+        "arcs": [arc.tolist() for arc in selection.deltas],
+    }
+    if extents:
+        points = np.concatenate(extents) * scale + translate
+        topology_json["bbox"] = [*points.min(axis=0).tolist(), *points.max(axis=0).tolist()]
+    return json.dumps(topology_json, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def encode_binary(topology: Topology, records: Sequence[DistrictRecord], indices: Sequence[int]) -> bytes:
+    """Varint-packed arcs and district rings in the layout described above"""
+    selection = QuantizedSelection(topology, indices)
+    chunks = [
+        BINARY_MAGIC,
+        bytes([BINARY_VERSION]),
+        _varints([selection.digits]),
+        _varints(_zigzag(selection.translate)),
+        _varints([len(selection.deltas)]),
+    ]
+    for deltas in selection.deltas:
+        chunks.append(_varints([len(deltas)]))
+        chunks.append(_varints(_zigzag(deltas.ravel())))
+
+    chunks.append(_varints([len(indices)]))
+    for index, polygons in zip(indices, selection.geometries):
+        record = records[index]
+        chunks.extend([_string(record.id), _string(record.name), _string(record.region)])
+        chunks.append(_varints(_zigzag(selection.quantize(record.centroid))))
+        structure = [len(polygons)]
+        refs = []
+        for polygon in polygons:
+            structure.append(len(polygon))
+            for ring in polygon:
+                structure.append(len(ring))
+                refs.extend(ring)
+        # Ring structure then all references, each as one packed run
+        chunks.append(_varints(structure))
+        chunks.append(_varints(_zigzag(refs)))
+    return b"".join(chunks)
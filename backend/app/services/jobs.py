@@ -0,0 +1,373 @@
+"""
+Background jobs
+Slow work (PDF reports, country-wide extracts) runs in a pool of worker
+processes at a lower priority, so it never competes with map requests for
+the event loop. Jobs are recorded in SQLite, identical requests against
+the same dataset share one job and its result file, and every job type
+has its own concurrency limit. Several API processes on one host may
+share the job table; each runs the jobs it queued.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Tuple, Union
+
+from app import config
+from app.database import create_jobs_database
+from app.services import climate_service
+from app.services.climate_cube import ClimateCube
+from app.services.data_plane import DataPlane
+
+logger = logging.getLogger(__name__)
+
+# Worker processes are scheduled below the API process
+WORKER_NICENESS = 10
+# Seconds between checks for jobs of stopped servers and removals of expired jobs
+PRUNE_INTERVAL = 3600
+
+
+def _write_chunks(path: Path, chunks: Iterable[bytes]):
+    """Write a result next to its final path and move it into place when complete"""
+    partial = path.with_name(path.name + ".part")
+    with open(partial, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(partial, path)
+
+
+def _run_report(params: dict, path: Path):
+    from app.services.reports import render_district_report
+    _write_chunks(path, [render_district_report(params["district_id"], params["variable"], params["scenario"])])
+
+
+def _run_export(params: dict, path: Path):
+    from app.services.export import district_positions, iter_batches, stored_columns, stream_export
+    cube = climate_service.get_climate_cube()
+    batches = iter_batches(
+        cube,
+        stored_columns(params["variable"] or cube.variable_ids, params["period"], params["scenario"]),
+        district_positions(params["region"]),
+    )
+    _write_chunks(path, stream_export(batches, params["format"]))
+
+
+def _export_media_type(params: dict) -> str:
+    from app.services.export import EXPORT_FORMATS
+    return EXPORT_FORMATS[params["format"]]
+
+
+def _export_extension(params: dict) -> str:
+    from app.services.export import EXPORT_EXTENSIONS
+    return EXPORT_EXTENSIONS[params["format"]]
+
+
+class JobType(NamedTuple):
+    """How to run a job (in a worker process) and describe its result"""
+    run: Callable[[dict, Path], None]
+    max_concurrent: int
+    media_type: Callable[[dict], str]
+    extension: Callable[[dict], str]
+
+
+JOB_TYPES: Dict[str, JobType] = {
+    "report": JobType(_run_report, 2, lambda params: "application/pdf", lambda params: "pdf"),
+    "export": JobType(_run_export, 1, _export_media_type, _export_extension),
+}
+
+
+def _init_worker(cube_source: Union[str, tuple]):
+    """
+    Lower the worker's priority and install the dataset it works on: mapped
+    from the API's data plane (a path), or rebuilt from the cube's arrays
+    """
+    try:
+        os.nice(WORKER_NICENESS)
+    except (AttributeError, OSError):  # Not available on Windows
+        pass
+    if isinstance(cube_source, str):
+        cube = ClimateCube.from_data_plane(DataPlane(Path(cube_source)))
+    else:
+        cube = ClimateCube(*cube_source)
+    climate_service.set_climate_cube(cube)
+
+
+def run_job(job_type: str, params: dict, path: str):
+    """Entry point in the worker process"""
+    JOB_TYPES[job_type].run(params, Path(path))
+
+
+def _process_alive(pid: int) -> bool:
+    if os.name == "nt":
+        # Signalling a process on Windows terminates it; there the API runs as a single process
+        return pid == os.getpid()
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def job_cache_key(job_type: str, params: dict, dataset_version: str) -> str:
+    """Identity of a job's result: its type, parameters and the data it is computed from"""
+    canonical = json.dumps([job_type, params, dataset_version], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+class JobManager:
+    """
+    Queue of background jobs over process pools.
+
+    Every job computes from the dataset snapshot it was submitted against.
+    Each dataset version gets its own pool, started on its first job with
+    that version's climate cube; after a reload, jobs queued against the
+    previous version finish on its pool, which is shut down once it has no
+    jobs left. Job rows and result files are removed JOB_RETENTION_SECONDS
+    after the job finished.
+
+    Every job row records the manager that runs it. Unfinished jobs of a
+    manager that is gone (its process exited, or its PID now belongs to
+    another manager) are marked failed at start and on every prune pass;
+    those of other live processes sharing the table are left alone.
+    """
+
+    def __init__(
+        self,
+        db_path: Path = config.JOBS_DB_PATH,
+        result_dir: Path = config.JOBS_DIR,
+        workers: int = config.JOB_WORKERS,
+        retention: float = config.JOB_RETENTION_SECONDS,
+    ):
+        self.db_path = db_path
+        self.result_dir = result_dir
+        self.workers = workers
+        self.retention = retention
+        self._db: Optional[sqlite3.Connection] = None
+        # The connection is shared by the threads queries run on
+        self._db_lock = threading.Lock()
+        self._pools: Dict[str, ProcessPoolExecutor] = {}
+        # Jobs per dataset version that are queued or running
+        self._pending: Dict[str, int] = {}
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._pruner: Optional[asyncio.Task] = None
+        # A PID alone may be reused by a later process, e.g. PID 1 in a restarted container
+        self.owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+
+    def start(self):
+        self.result_dir.mkdir(parents=True, exist_ok=True)
+        self._db = create_jobs_database(self.db_path)
+        self.fail_orphaned()
+        self._limits = {name: asyncio.Semaphore(job_type.max_concurrent) for name, job_type in JOB_TYPES.items()}
+        self._pruner = asyncio.create_task(self._prune_periodically())
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        if self._pruner is not None:
+            tasks.append(self._pruner)
+            self._pruner = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        for pool in self._pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._pools.clear()
+        self._pending.clear()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _orphaned(self, owner: Optional[str]) -> bool:
+        """Whether the manager that owns a job can no longer finish it"""
+        if owner == self.owner:
+            return False
+        pid, _, _ = (owner or "").partition(":")
+        if not pid.isdigit() or int(pid) == os.getpid():
+            # Jobs from before owners were recorded, or of an earlier manager with this PID
+            return True
+        return not _process_alive(int(pid))
+
+    def fail_orphaned(self) -> int:
+        """Mark the unfinished jobs of managers that are gone as failed; returns how many"""
+        with self._db_lock:
+            owners = [
+                row["owner"] for row in
+                self._db.execute("SELECT DISTINCT owner FROM jobs WHERE status IN ('queued', 'running')")
+            ]
+            failed = 0
+            for owner in filter(self._orphaned, owners):
+                failed += self._db.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'Interrupted by a server restart', "
+                    "finished_at = CURRENT_TIMESTAMP WHERE status IN ('queued', 'running') AND owner IS ?",
+                    (owner,),
+                ).rowcount
+        if failed:
+            logger.info("Marked %d jobs of stopped servers as failed", failed)
+        return failed
+
+    def _execute(self, query: str, params: tuple = ()) -> Optional[sqlite3.Row]:
+        with self._db_lock:
+            return self._db.execute(query, params).fetchone()
+
+    async def _query(self, query: str, params: tuple = ()) -> Optional[sqlite3.Row]:
+        """Run a statement on a thread, so the event loop never waits for SQLite"""
+        return await asyncio.to_thread(self._execute, query, params)
+
+    def _executor(self, snapshot: climate_service.DatasetSnapshot) -> ProcessPoolExecutor:
+        """The pool of a dataset version, created with that version's cube if it has none"""
+        pool = self._pools.get(snapshot.version)
+        if pool is None:
+            cube = snapshot.cube
+            if cube.data_plane is not None:
+                cube_source = str(cube.data_plane.path)
+            else:
+                cube_source = (cube.variables, cube.district_id_list, cube.district_name_list, cube.values, cube.bands)
+            pool = self._pools[snapshot.version] = ProcessPoolExecutor(
+                max_workers=self.workers,
+                # Forking a process with running threads is unsafe
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(cube_source,),
+            )
+        return pool
+
+    def _release(self, version: str):
+        """A job of a dataset version is done; retire pools no job needs any more"""
+        remaining = self._pending.pop(version, 0) - 1
+        if remaining > 0:
+            self._pending[version] = remaining
+        active = climate_service.active_snapshot().version
+        for stale in [v for v in self._pools if v != active and v not in self._pending]:
+            # Workers of the active version stay up for the next job
+            self._pools.pop(stale).shutdown(wait=False)
+
+    async def get(self, job_id: str) -> Optional[sqlite3.Row]:
+        return await self._query("SELECT * FROM jobs WHERE id = ?", (job_id,))
+
+    def result_path(self, job: sqlite3.Row) -> Path:
+        params = json.loads(job["params"])
+        return self.result_dir / f"{job['cache_key']}.{JOB_TYPES[job['type']].extension(params)}"
+
+    def media_type(self, job: sqlite3.Row) -> str:
+        return JOB_TYPES[job["type"]].media_type(json.loads(job["params"]))
+
+    def _find_or_insert(self, job_type: str, params: dict, key: str) -> Tuple[sqlite3.Row, bool]:
+        """The job with a result for `key` (finished or not), else a new queued one; True if new"""
+        with self._db_lock:
+            existing = self._db.execute(
+                "SELECT * FROM jobs WHERE cache_key = ? AND status != 'failed' ORDER BY created_at DESC LIMIT 1",
+                (key,),
+            ).fetchone()
+            if existing is not None and (existing["status"] != "succeeded" or self.result_path(existing).exists()):
+                return existing, False
+
+            job_id = uuid.uuid4().hex
+            self._db.execute(
+                "INSERT INTO jobs (id, type, params, cache_key, status, owner) VALUES (?, ?, ?, ?, 'queued', ?)",
+                (job_id, job_type, json.dumps(params), key, self.owner),
+            )
+            return self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone(), True
+
+    async def submit(self, job_type: str, params: dict) -> sqlite3.Row:
+        """
+        Queue a job, or return the job that already has (or is computing)
+        the result for the same parameters and dataset.
+        """
+        snapshot = climate_service.get_snapshot()
+        key = job_cache_key(job_type, params, snapshot.version)
+        job, created = await asyncio.to_thread(self._find_or_insert, job_type, params, key)
+        if not created:
+            return job
+
+        job_id = job["id"]
+        self._pending[snapshot.version] = self._pending.get(snapshot.version, 0) + 1
+        task = asyncio.create_task(self._run(job, snapshot))
+        self._tasks[job_id] = task
+
+        def done(_):
+            self._tasks.pop(job_id, None)
+            self._release(snapshot.version)
+
+        task.add_done_callback(done)
+        return job
+
+    async def _run(self, job: sqlite3.Row, snapshot: climate_service.DatasetSnapshot):
+        async with self._limits[job["type"]]:
+            await self._query(
+                "UPDATE jobs SET status = 'running', started_at = CURRENT_TIMESTAMP WHERE id = ?", (job["id"],)
+            )
+            pool = self._executor(snapshot)
+            try:
+                # The pool starts its worker processes inside submit(), so that
+                # happens on a thread rather than blocking the event loop
+                future = await asyncio.to_thread(
+                    pool.submit, run_job, job["type"], json.loads(job["params"]), str(self.result_path(job)),
+                )
+                await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                if isinstance(exc, BrokenProcessPool) and self._pools.get(snapshot.version) is pool:
+                    # A worker died; the next job of this version starts a fresh pool
+                    del self._pools[snapshot.version]
+                logger.exception("Job %s (%s) failed", job["id"], job["type"])
+                await self._query(
+                    "UPDATE jobs SET status = 'failed', error = ?, finished_at = CURRENT_TIMESTAMP WHERE id = ?",
+                    (str(exc) or type(exc).__name__, job["id"]),
+                )
+            else:
+                await self._query(
+                    "UPDATE jobs SET status = 'succeeded', finished_at = CURRENT_TIMESTAMP WHERE id = ?",
+                    (job["id"],),
+                )
+
+    def prune(self) -> int:
+        """
+        Delete jobs that finished more than `retention` seconds ago and the
+        result files no remaining job refers to; returns the jobs deleted
+        """
+        with self._db_lock:
+            deleted = self._db.execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND finished_at < datetime('now', ?)",
+                (f"-{int(self.retention)} seconds",),
+            ).rowcount
+            kept = {row["cache_key"] for row in self._db.execute("SELECT DISTINCT cache_key FROM jobs")}
+
+        # Recent files may belong to a job being inserted right now
+        cutoff = time.time() - self.retention
+        files = 0
+        for path in self.result_dir.iterdir():
+            try:
+                if path.name.split(".", 1)[0] not in kept and path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    files += 1
+            except OSError:
+                pass
+        if deleted or files:
+            logger.info("Pruned %d expired jobs and %d result files", deleted, files)
+        return deleted
+
+    async def _prune_periodically(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.fail_orphaned)
+                if self.retention > 0:
+                    await asyncio.to_thread(self.prune)
+            except Exception:
+                logger.exception("Pruning expired jobs failed")
+            await asyncio.sleep(PRUNE_INTERVAL)
+
+
+job_manager = JobManager()
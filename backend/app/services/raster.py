@@ -0,0 +1,104 @@
+"""
+Raster overlays
+Colour ramps matching the frontend's d3 scales, and a minimal PNG encoder
+"""
+import struct
+import zlib
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# ColorBrewer schemes behind d3-scale-chromatic's interpolators
+SCHEMES = {
+    "YlOrRd": "ffffccffeda0fed976feb24cfd8d3cfc4e2ae31a1cbd0026800026",
+    "Blues": "f7fbffdeebf7c6dbef9ecae16baed64292c62171b508519c08306b",
+    "BrBG": "5430058c510abf812ddfc27df6e8c3f5f5f5c7eae580cdc135978f01665e003c30",
+    "RdBu": "67001fb2182bd6604df4a582fddbc7f7f7f7d1e5f092c5de4393c32166ac053061",
+}
+
+# Scale name -> (scheme, reversed); mirrors frontend/src/utils/colorScales.ts
+COLOR_SCALES: Dict[str, Tuple[str, bool]] = {
+    "temperature": ("YlOrRd", False),
+    "precipitation": ("Blues", False),
+    "hot_days": ("YlOrRd", False),
+    "dry_days": ("BrBG", True),  # More dry days = more brown
+    "diverging": ("RdBu", True),  # Decrease = blue, increase = red
+}
+
+
+def _scheme_colors(name: str) -> np.ndarray:
+    hex_colors = SCHEMES[name]
+    return np.array(
+        [[int(hex_colors[i + j:i + j + 2], 16) for j in (0, 2, 4)] for i in range(0, len(hex_colors), 6)],
+        dtype=float,
+    )
+
+
+def rgb_basis(colors: np.ndarray, t: np.ndarray) -> np.ndarray:
+    """Uniform B-spline through the colours at t in [0, 1] (d3.interpolateRgbBasis)"""
+    n = len(colors) - 1
+    t = np.clip(t, 0, 1)
+    i = np.minimum(np.floor(t * n).astype(int), n - 1)
+    v1, v2 = colors[i], colors[i + 1]
+    v0 = np.where((i > 0)[:, None], colors[np.maximum(i - 1, 0)], 2 * v1 - v2)
+    v3 = np.where((i < n - 1)[:, None], colors[np.minimum(i + 2, n)], 2 * v2 - v1)
+    t1 = ((t - i / n) * n)[:, None]
+    t2, t3 = t1 * t1, t1 * t1 * t1
+    return (
+        (1 - 3 * t1 + 3 * t2 - t3) * v0
+        + (4 - 6 * t2 + 3 * t3) * v1
+        + (1 + 3 * t1 + 3 * t2 - 3 * t3) * v2
+        + t3 * v3
+    ) / 6
+
+
+def colorize(
+    grid: np.ndarray,
+    scale: str,
+    vmin: float,
+    vmax: float,
+    opacity: float,
+) -> np.ndarray:
+    """(rows, cols, 4) uint8 RGBA image of a grid; NaN cells are transparent"""
+    scheme, reverse = COLOR_SCALES[scale]
+    values = grid.ravel().astype(float)
+    valid = ~np.isnan(values)
+    span = vmax - vmin
+    t = np.where(valid, (np.clip(values, vmin, vmax) - vmin) / span if span else 0.5, 0.0)
+    if reverse:
+        t = 1 - t
+
+    rgba = np.zeros((len(values), 4), dtype=np.uint8)
+    rgba[:, :3] = np.clip(np.round(rgb_basis(_scheme_colors(scheme), t)), 0, 255)
+    rgba[:, 3] = np.where(valid, round(opacity * 255), 0)
+    rgba[~valid, :3] = 0
+    return rgba.reshape(grid.shape + (4,))
+
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def encode_png(rgba: np.ndarray, compression: int = 6) -> bytes:
+    """8-bit RGBA PNG of a (rows, cols, 4) image, without filtering"""
+    height, width = rgba.shape[:2]
+    # Every scanline starts with filter type 0 (none)
+    scanlines = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    scanlines[:, 1:] = rgba.reshape(height, width * 4)
+    return b"".join([
+        b"\x89PNG\r\n\x1a\n",
+        _chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)),
+        _chunk(b"IDAT", zlib.compress(scanlines.tobytes(), compression)),
+        _chunk(b"IEND", b""),
+    ])
+
+
+def value_range(grid: np.ndarray, diverging: bool) -> Tuple[Optional[float], Optional[float]]:
+    """Default colour range of a grid: its min/max, or symmetric around zero for changes"""
+    finite = grid[~np.isnan(grid)]
+    if not finite.size:
+        return None, None
+    if diverging:
+        limit = float(np.abs(finite).max())
+        return -limit, limit
+    return float(finite.min()), float(finite.max())
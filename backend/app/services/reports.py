@@ -0,0 +1,192 @@
+"""
+District climate reports
+One-page PDF reports written directly with PDF drawing operators
+(standard Helvetica fonts, no external PDF library)
+"""
+import zlib
+from datetime import date
+from typing import List, Optional, Sequence, Tuple
+
+from app.data.district_registry import DISTRICT_REGISTRY
+from app.services.climate_service import district_timeseries, get_climate_cube, get_district_climate_data
+
+# A4 portrait, in points
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 56
+
+PERIOD_LABELS = {
+    "baseline": "Baseline (1991-2020)",
+    "2030": "2030s (2021-2050)",
+    "2050": "2050s (2041-2070)",
+    "2080": "2080s (2071-2100)",
+}
+SCENARIO_LABELS = {
+    "rcp45": "Low Carbon (RCP 4.5)",
+    "rcp85": "High Carbon (RCP 8.5)",
+}
+
+Color = Tuple[float, float, float]
+
+
+def _escape(text: str) -> bytes:
+    # Standard fonts use WinAnsiEncoding, which covers Latin-1 (e.g. the degree sign)
+    data = text.encode("cp1252", errors="replace")
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def _number(value: float) -> bytes:
+    return f"{value:.2f}".rstrip("0").rstrip(".").encode()
+
+
+class PdfPage:
+    """Content stream of a single page; y grows upwards from the bottom edge"""
+
+    FONTS = {False: b"/F1", True: b"/F2"}
+
+    def __init__(self):
+        self.operations: List[bytes] = []
+
+    def text(self, x: float, y: float, text: str, size: float = 10, bold: bool = False, color: Color = (0, 0, 0)):
+        self.operations.append(
+            b"BT %s rg %s %s Tf %s %s Td (%s) Tj ET"
+            % (b" ".join(map(_number, color)), self.FONTS[bold], _number(size), _number(x), _number(y), _escape(text))
+        )
+
+    def _path(self, points: Sequence[Tuple[float, float]]) -> bytes:
+        (x, y), rest = points[0], points[1:]
+        return b" ".join(
+            [b"%s %s m" % (_number(x), _number(y))] + [b"%s %s l" % (_number(x), _number(y)) for x, y in rest]
+        )
+
+    def line(self, points: Sequence[Tuple[float, float]], width: float = 1, color: Color = (0, 0, 0)):
+        self.operations.append(
+            b"%s RG %s w %s S" % (b" ".join(map(_number, color)), _number(width), self._path(points))
+        )
+
+    def polygon(self, points: Sequence[Tuple[float, float]], color: Color):
+        self.operations.append(b"%s rg %s h f" % (b" ".join(map(_number, color)), self._path(points)))
+
+    def render(self) -> bytes:
+        return b"\n".join(self.operations)
+
+
+def render_pdf(page: PdfPage) -> bytes:
+    """Single-page PDF 1.4 document with a compressed content stream"""
+    content = zlib.compress(page.render())
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+        b"/Resources << /Font << /F1 4 0 R /F2 5 0 R >> >> /Contents 6 0 R >>" % (PAGE_WIDTH, PAGE_HEIGHT),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+        b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(content), content),
+    ]
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def _format(value: Optional[float], unit: str, signed: bool = False) -> str:
+    if value is None:
+        return "N/A"
+    sign = "+" if signed and value >= 0 else ""
+    if unit == "°C":
+        return f"{sign}{value:.1f}{unit}"
+    if unit in ("mm", "days"):
+        return f"{sign}{round(value)} {unit}"
+    return f"{sign}{value:.1f} {unit}"
+
+
+def _chart(page: PdfPage, data: List[dict], unit: str, left: float, bottom: float, width: float, height: float):
+    """Median line over the 10th-90th percentile band, one point per period"""
+    lows = [point.get("p10", point["value"]) for point in data]
+    highs = [point.get("p90", point["value"]) for point in data]
+    low, high = min(lows), max(highs)
+    padding = (high - low) * 0.1 or 1.0
+    low, high = low - padding, high + padding
+
+    def position(i: int, value: float) -> Tuple[float, float]:
+        return left + width * i / (len(data) - 1), bottom + height * (value - low) / (high - low)
+
+    page.line([(left, bottom + height), (left, bottom), (left + width, bottom)], 0.75, (0.4, 0.4, 0.4))
+    band = [position(i, v) for i, v in enumerate(highs)] + [position(i, v) for i, v in reversed(list(enumerate(lows)))]
+    page.polygon(band, (0.85, 0.89, 0.95))
+    page.line([position(i, point["value"]) for i, point in enumerate(data)], 2, (0.13, 0.4, 0.67))
+
+    for i, point in enumerate(data):
+        x, y = position(i, point["value"])
+        page.text(x - 14, y + 6, _format(point["value"], unit), 8)
+        page.text(x - 14, bottom - 14, PERIOD_LABELS[point["period"]].split(" ")[0], 8, color=(0.3, 0.3, 0.3))
+    page.text(left - 4, bottom + height + 8, _format(high, unit), 7, color=(0.4, 0.4, 0.4))
+    page.text(left - 4, bottom - 26, _format(low, unit), 7, color=(0.4, 0.4, 0.4))
+
+
+def render_district_report(district_id: str, variable: str, scenario: str) -> bytes:
+    """PDF climate report of one variable for a district under a scenario"""
+    record = DISTRICT_REGISTRY.get(district_id)
+    var_info = get_climate_cube().variable_info(variable)
+    climate_data = get_district_climate_data(district_id)
+    if record is None or var_info is None or climate_data is None:
+        raise ValueError(f"No climate data for district {district_id} and variable {variable}")
+
+    unit = var_info["unit"]
+    series = district_timeseries(climate_data, variable, scenario)
+    data = series["data"]
+    baseline, future = data[0], data[-1]
+
+    page = PdfPage()
+    y = PAGE_HEIGHT - MARGIN
+    page.text(MARGIN, y, "GHANA CLIMATE ATLAS", 10, bold=True, color=(0.13, 0.4, 0.67))
+    y -= 28
+    page.text(MARGIN, y, f"Climate Report for {record.name}", 20, bold=True)
+    y -= 18
+    page.text(MARGIN, y, f"{record.region} Region", 11, color=(0.3, 0.3, 0.3))
+    page.line([(MARGIN, y - 12), (PAGE_WIDTH - MARGIN, y - 12)], 0.5, (0.7, 0.7, 0.7))
+
+    y -= 40
+    for label, value in (
+        ("Parameter", f"{var_info['name']} ({unit})"),
+        ("Scenario", SCENARIO_LABELS.get(scenario, scenario)),
+        ("Baseline (1991-2020)", _format(baseline["value"], unit)),
+        ("Projected (2071-2100)", _format(future["value"], unit)),
+        ("Expected change", f"{_format(future['change'], unit, signed=True)} ({future['change_percent']}%)"),
+    ):
+        page.text(MARGIN, y, label, 10, bold=True)
+        page.text(MARGIN + 150, y, value, 10)
+        y -= 16
+
+    y -= 24
+    page.text(MARGIN, y, "Projection by period (median, with 10th-90th percentile band)", 11, bold=True)
+    chart_top = y - 30
+    _chart(page, data, unit, MARGIN + 30, chart_top - 200, PAGE_WIDTH - 2 * MARGIN - 60, 200)
+
+    y = chart_top - 260
+    columns = (MARGIN, MARGIN + 170, MARGIN + 270, MARGIN + 370)
+    for x, heading in zip(columns, ("Period", "Median", "Range (p10-p90)", "Change")):
+        page.text(x, y, heading, 9, bold=True)
+    for point in data:
+        y -= 15
+        band = (
+            f"{_format(point['p10'], unit)} - {_format(point['p90'], unit)}"
+            if "p10" in point and "p90" in point else "N/A"
+        )
+        change = _format(point["change"], unit, signed=True) if point["period"] != "baseline" else "-"
+        for x, text in zip(columns, (PERIOD_LABELS[point["period"]], _format(point["value"], unit), band, change)):
+            page.text(x, y, text, 9)
+
+    page.text(MARGIN, MARGIN + 24, "Climate projections derived from CORDEX-Africa regional climate models", 8,
+              color=(0.4, 0.4, 0.4))
+    page.text(MARGIN, MARGIN + 12, "downscaled for Ghana using the KAPy framework.", 8, color=(0.4, 0.4, 0.4))
+    page.text(MARGIN, MARGIN - 4, f"Generated {date.today():%d %B %Y} | Ghana Climate Atlas", 8,
+              color=(0.4, 0.4, 0.4))
+    return render_pdf(page)
@@ -0,0 +1,244 @@
+"""
+Pre-serialized response cache
+Stores the final JSON body of an endpoint with its gzip and brotli
+encodings, so repeat requests skip model building, validation and
+serialization and are returned as raw bytes
+"""
+import asyncio
+import gzip
+import json
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+
+from app import config, metrics
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+
+class CachedBody(NamedTuple):
+    """One serialized response in every supported encoding"""
+    identity: bytes
+    gzip: Optional[bytes]
+    br: Optional[bytes]
+
+    @property
+    def size(self) -> int:
+        return sum(len(body) for body in self if body is not None)
+
+
+@lru_cache(maxsize=None)
+def _adapter(model: Any) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def serialize(content: Any, model: Any = None) -> bytes:
+    """JSON bytes of a model instance, or of plain data validated against `model` (a type) once"""
+    if isinstance(content, (bytes, memoryview)):
+        return content
+    if isinstance(content, BaseModel):
+        return content.model_dump_json().encode()
+    if model is not None:
+        adapter = _adapter(model)
+        return adapter.dump_json(adapter.validate_python(content))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def encode(body: bytes, compressible: bool = True) -> CachedBody:
+    if not compressible:
+        return CachedBody(identity=body, gzip=None, br=None)
+    return CachedBody(
+        identity=body,
+        gzip=gzip.compress(body, compresslevel=6),
+        br=brotli.compress(body, quality=9) if brotli is not None else None,
+    )
+
+
+def _accepted_encodings(request: Request) -> set:
+    header = request.headers.get("accept-encoding", "")
+    accepted = set()
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized responses keyed by endpoint and parameters,
+    bounded by entry count and, optionally, by the bytes of all encodings
+    """
+
+    def __init__(self, name: str, max_entries: int = config.RESPONSE_CACHE_SIZE, max_bytes: Optional[int] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        self._bytes = 0
+        # Entries are also built off the event loop, e.g. when warming a reloaded dataset
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Builds running in worker threads, shared by concurrent misses of the same key
+        self._building: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def evict_stale(self, version: str) -> int:
+        """Drop entries built for any dataset version other than `version`; returns how many"""
+        with self._lock:
+            stale = [key for key in self._entries if not (isinstance(key, tuple) and version in key)]
+            for key in stale:
+                self._bytes -= self._entries.pop(key).size
+        return len(stale)
+
+    def _lookup(self, key: Hashable) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            else:
+                self.misses += 1
+        metrics.observe_cache(self.name, entry is not None)
+        return entry
+
+    def _build(self, key: Hashable, build: Callable[[], Any], model: Any, compressible: bool) -> CachedBody:
+        with metrics.timed("data"):
+            content = build()
+        # Bodies mapped from a data plane come already encoded
+        if not isinstance(content, CachedBody):
+            with metrics.timed("serialize"):
+                content = encode(serialize(content, model), compressible)
+        entry = content
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            # The newest entry stays even if it alone is over the byte bound
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                self._bytes -= self._entries.popitem(last=False)[1].size
+        return entry
+
+    def get_or_build(
+        self,
+        key: Hashable,
+        build: Callable[[], Any],
+        model: Any = None,
+        compressible: bool = True,
+    ) -> CachedBody:
+        entry = self._lookup(key)
+        return entry if entry is not None else self._build(key, build, model, compressible)
+
+    async def get_or_build_async(
+        self,
+        key: Hashable,
+        build: Callable[[], Any],
+        model: Any = None,
+        compressible: bool = True,
+    ) -> CachedBody:
+        """get_or_build for slow builds: a miss is built in a worker thread, once however many requests wait for it"""
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry
+        building = self._building.get(key)
+        if building is None:
+            building = self._building[key] = asyncio.ensure_future(
+                asyncio.to_thread(self._build, key, build, model, compressible)
+            )
+            building.add_done_callback(lambda _: self._building.pop(key, None))
+        # A cancelled request does not cancel the build others are waiting for
+        return await asyncio.shield(building)
+
+    def respond(
+        self,
+        request: Request,
+        key: Hashable,
+        build: Callable[[], Any],
+        model: Any = None,
+        media_type: str = "application/json",
+        headers: Optional[dict] = None,
+        compressible: bool = True,
+    ) -> Response:
+        """
+        Cached body in the best encoding the client accepts. Bodies that are
+        already compressed (e.g. PNG) are stored and sent as they are.
+        """
+        entry = self.get_or_build(key, build, model, compressible)
+        return self._response(request, entry, media_type, headers)
+
+    async def respond_async(
+        self,
+        request: Request,
+        key: Hashable,
+        build: Callable[[], Any],
+        model: Any = None,
+        media_type: str = "application/json",
+        headers: Optional[dict] = None,
+        compressible: bool = True,
+    ) -> Response:
+        """respond() for builds too slow to run on the event loop"""
+        entry = await self.get_or_build_async(key, build, model, compressible)
+        return self._response(request, entry, media_type, headers)
+
+    def _response(self, request: Request, entry: CachedBody, media_type: str, headers: Optional[dict]) -> Response:
+        accepted = _accepted_encodings(request)
+        headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+
+        if entry.br is not None and "br" in accepted:
+            body = entry.br
+            headers["Content-Encoding"] = "br"
+        elif entry.gzip is not None and "gzip" in accepted:
+            body = entry.gzip
+            headers["Content-Encoding"] = "gzip"
+        else:
+            body = entry.identity
+
+        # A body mapped from a data plane is a memoryview; bytes() of bytes is the same object
+        return Response(content=bytes(body), media_type=media_type, headers=headers)
+
+
+response_cache = ResponseCache("response")
+# Tiles are small and numerous, so they get their own, larger cache
+tile_cache = ResponseCache("tile", config.TILE_CACHE_SIZE)
+# Surface grids and overlays are large and their parameters many, so they are bounded
+# by size and kept apart from the responses warmed at startup
+surface_cache = ResponseCache("surface", config.RESPONSE_CACHE_SIZE, config.SURFACE_CACHE_BYTES)
+# Any of ~1,300 years can be asked for while scrubbing the timeline, and each is cheap to rebuild
+projection_cache = ResponseCache("projection", config.PROJECTION_CACHE_SIZE)
+
+RESPONSE_CACHES = (response_cache, tile_cache, surface_cache, projection_cache)
+
+metrics.register_gauge(
+    "response_cache_entries", "Responses held by each response cache", ("cache",),
+    lambda: {(cache.name,): len(cache) for cache in RESPONSE_CACHES},
+)
+metrics.register_gauge(
+    "response_cache_bytes", "Bytes of every encoding held by each response cache", ("cache",),
+    lambda: {(cache.name,): cache.bytes for cache in RESPONSE_CACHES},
+)
@@ -0,0 +1,142 @@
+"""
+Interpolated climate surfaces
+Inverse distance weighting of district values onto a regular lat/lon grid,
+masked to the country outline; the mask is computed once per resolution
+and kept for the few most recently used ones
+"""
+import math
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Tuple
+
+import numpy as np
+
+from app.data.district_registry import DISTRICT_REGISTRY, DistrictRegistry
+from app.data.spatial_index import get_district_index
+
+# Grid extent (same as the frontend map overlay)
+SURFACE_BOUNDS = {
+    "north": 11.2,
+    "south": 4.74,
+    "east": 1.2,
+    "west": -3.3,
+}
+# A cell this close (in degrees) to a district centroid takes its value
+EXACT_DISTANCE = 0.0001
+# Cells interpolated per pass, to bound the (cells x districts) distance matrix
+CELL_CHUNK = 8192
+# Grid cell sizes (degrees) a surface can be requested at; a 0.01 grid takes ~5 MB
+SURFACE_RESOLUTIONS = (0.01, 0.02, 0.05, 0.1, 0.25, 0.5)
+# Grids (with their masks) kept in memory, least recently used first out
+MAX_GRIDS = 4
+# IDW distance powers a surface can be requested at
+SURFACE_POWERS = (1.0, 2.0, 3.0, 4.0)
+
+
+class SurfaceGrid(NamedTuple):
+    """Cell centres of a grid (row 0 is the northern edge) and the inside-country mask"""
+    rows: int
+    cols: int
+    lat: np.ndarray  # (rows * cols,)
+    lng: np.ndarray
+    mask: np.ndarray  # (rows * cols,) bool
+
+
+_grids: "OrderedDict[Tuple[str, float], SurfaceGrid]" = OrderedDict()
+# Surfaces are built in worker threads
+_grids_lock = threading.Lock()
+
+
+def grid_shape(resolution: float) -> Tuple[int, int]:
+    """(rows, cols) of the grid at a resolution in degrees"""
+    bounds = SURFACE_BOUNDS
+    rows = math.ceil((bounds["north"] - bounds["south"]) / resolution)
+    cols = math.ceil((bounds["east"] - bounds["west"]) / resolution)
+    return rows, cols
+
+
+def get_surface_grid(resolution: float, registry: DistrictRegistry = DISTRICT_REGISTRY) -> SurfaceGrid:
+    """Grid and mask for one of SURFACE_RESOLUTIONS, built on first use"""
+    if resolution not in SURFACE_RESOLUTIONS:
+        raise ValueError(f"Unsupported surface resolution {resolution}")
+    key = (registry.signature, resolution)
+    with _grids_lock:
+        grid = _grids.get(key)
+        if grid is not None:
+            _grids.move_to_end(key)
+            return grid
+
+    rows, cols = grid_shape(resolution)
+    bounds = SURFACE_BOUNDS
+    lat = bounds["north"] - np.arange(rows) * resolution - resolution / 2
+    lng = bounds["west"] + np.arange(cols) * resolution + resolution / 2
+    lat, lng = (a.ravel() for a in np.meshgrid(lat, lng, indexing="ij"))
+    # A cell is inside when its centre falls in a district
+    mask = get_district_index(registry).locate_many(lat, lng) >= 0
+    grid = SurfaceGrid(rows, cols, lat, lng, mask)
+    with _grids_lock:
+        _grids[key] = grid
+        while len(_grids) > MAX_GRIDS:
+            _grids.popitem(last=False)
+    return grid
+
+
+def idw(
+    lat: np.ndarray,
+    lng: np.ndarray,
+    point_lat: np.ndarray,
+    point_lng: np.ndarray,
+    values: np.ndarray,
+    power: float,
+) -> np.ndarray:
+    """
+    Inverse-distance-weighted estimate at every target from all points,
+    with planar distances in degrees. A target on top of a point takes the
+    value of the first such point.
+    """
+    result = np.empty(len(lat))
+    for start in range(0, len(lat), CELL_CHUNK):
+        stop = start + CELL_CHUNK
+        distances = np.hypot(lat[start:stop, None] - point_lat, lng[start:stop, None] - point_lng)
+        exact = distances < EXACT_DISTANCE
+        with np.errstate(divide="ignore"):
+            weights = np.where(exact, 0.0, distances ** -power)
+        estimates = (weights @ values) / weights.sum(axis=1)
+        on_point = exact.any(axis=1)
+        estimates[on_point] = values[exact.argmax(axis=1)[on_point]]
+        result[start:stop] = estimates
+    return result
+
+
+def interpolate_surface(
+    values: np.ndarray,
+    resolution: float,
+    power: float,
+    registry: DistrictRegistry = DISTRICT_REGISTRY,
+) -> Tuple[SurfaceGrid, np.ndarray]:
+    """
+    (rows, cols) float32 surface of per-district values (in registry order)
+    interpolated from district centroids; NaN outside the country.
+    """
+    grid = get_surface_grid(resolution, registry)
+    centroids = np.array([record.centroid for record in registry.records], dtype=float)
+    surface = np.full(grid.rows * grid.cols, np.nan, dtype=np.float32)
+    surface[grid.mask] = idw(
+        grid.lat[grid.mask],
+        grid.lng[grid.mask],
+        centroids[:, 1],
+        centroids[:, 0],
+        np.asarray(values, dtype=float),
+        power,
+    )
+    return grid, surface.reshape(grid.rows, grid.cols)
+
+
+def surface_bytes(surface: np.ndarray) -> bytes:
+    """A surface as the little-endian float32 grid the binary format serves"""
+    return surface.astype("<f4").tobytes()
+
+
+def surface_from_bytes(data: bytes, resolution: float) -> np.ndarray:
+    """Read-only (rows, cols) view of a surface_bytes grid"""
+    return np.frombuffer(data, dtype="<f4").reshape(grid_shape(resolution))
@@ -0,0 +1,278 @@
+"""
+Mapbox Vector Tiles for district boundaries
+District polygons are projected to Web Mercator once, then clipped and
+quantized per tile and encoded as MVT 2.1 protobuf without external libraries
+"""
+import math
+import struct
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.data.district_registry import DISTRICT_REGISTRY, DistrictRecord, DistrictRegistry
+from app.data.geometry import clip_ring_to_rect, open_ring, polygon_parts
+from app.data.topology import get_simplification_levels
+
+TILE_EXTENT = 4096
+# Geometry drawn this far past the tile edge (in tile units) hides seams between tiles
+TILE_BUFFER = 64
+LAYER_NAME = "districts"
+
+# Web Mercator is undefined at the poles
+MAX_LATITUDE = 85.0511287798
+
+# MVT geometry commands and feature types
+MOVE_TO = 1
+LINE_TO = 2
+CLOSE_PATH = 7
+POLYGON = 3
+
+
+# --- Protobuf wire format -------------------------------------------------
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def _field(number: int, wire_type: int) -> bytes:
+    return _varint((number << 3) | wire_type)
+
+
+def _uint_field(number: int, value: int) -> bytes:
+    return _field(number, 0) + _varint(value)
+
+
+def _bytes_field(number: int, payload: bytes) -> bytes:
+    return _field(number, 2) + _varint(len(payload)) + payload
+
+
+def _packed_field(number: int, values: List[int]) -> bytes:
+    return _bytes_field(number, b"".join(_varint(v) for v in values))
+
+
+def _encode_value(value) -> bytes:
+    """Tile Value message: strings, integers or doubles"""
+    if isinstance(value, str):
+        return _bytes_field(1, value.encode())
+    if isinstance(value, bool):
+        return _uint_field(7, int(value))
+    if isinstance(value, int):
+        return _uint_field(6, _zigzag(value))
+    return _field(3, 1) + struct.pack("<d", float(value))
+
+
+def _command(command: int, count: int) -> int:
+    return (command & 0x7) | (count << 3)
+
+
+def encode_polygon(rings: List[np.ndarray]) -> List[int]:
+    """
+    Geometry commands for a polygon or multipolygon as a list of integer
+    rings (open, in tile coordinates). The cursor carries across rings,
+    as the spec requires.
+    """
+    commands: List[int] = []
+    cx = cy = 0
+    for ring in rings:
+        dx = np.diff(ring[:, 0], prepend=cx)
+        dy = np.diff(ring[:, 1], prepend=cy)
+        params = np.column_stack([(dx << 1) ^ (dx >> 63), (dy << 1) ^ (dy >> 63)]).ravel().tolist()
+        commands.append(_command(MOVE_TO, 1))
+        commands.extend(params[:2])
+        commands.append(_command(LINE_TO, len(ring) - 1))
+        commands.extend(params[2:])
+        commands.append(_command(CLOSE_PATH, 1))
+        cx, cy = int(ring[-1, 0]), int(ring[-1, 1])
+    return commands
+
+
+class TileFeature(NamedTuple):
+    id: int
+    properties: Dict[str, object]
+    geometry: List[int]
+
+
+def encode_layer(name: str, features: List[TileFeature], extent: int = TILE_EXTENT) -> bytes:
+    """Layer message with shared, deduplicated key and value tables"""
+    keys: Dict[str, int] = {}
+    values: Dict[Tuple[type, object], int] = {}
+    encoded_features = []
+
+    for feature in features:
+        tags = []
+        for key, value in feature.properties.items():
+            if value is None:
+                continue
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault((type(value), value), len(values)))
+        encoded_features.append(_bytes_field(2, b"".join([
+            _uint_field(1, feature.id),
+            _packed_field(2, tags),
+            _uint_field(3, POLYGON),
+            _packed_field(4, feature.geometry),
+        ])))
+
+    return b"".join([
+        _uint_field(15, 2),
+        _bytes_field(1, name.encode()),
+        *encoded_features,
+        *(_bytes_field(3, key.encode()) for key in keys),
+        *(_bytes_field(4, _encode_value(value)) for _, value in values),
+        _uint_field(5, extent),
+    ])
+
+
+def encode_tile(layers: Dict[str, List[TileFeature]]) -> bytes:
+    """Tile message; layers without features are left out"""
+    return b"".join(
+        _bytes_field(3, encode_layer(name, features))
+        for name, features in layers.items()
+        if features
+    )
+
+
+# --- Projection and clipping ----------------------------------------------
+
+def project(lon: np.ndarray, lat: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Web Mercator world coordinates in [0, 1], y pointing down"""
+    lat = np.radians(np.clip(lat, -MAX_LATITUDE, MAX_LATITUDE))
+    x = (np.asarray(lon) + 180.0) / 360.0
+    y = (1.0 - np.arcsinh(np.tan(lat)) / math.pi) / 2.0
+    return x, y
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(lon_min, lat_min, lon_max, lat_max) of a tile"""
+    n = 2 ** z
+
+    def latitude(row: float) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360 - 180, latitude(y + 1), (x + 1) / n * 360 - 180, latitude(y)
+
+
+def _signed_area(ring: np.ndarray) -> float:
+    """Shoelace area in tile coordinates; positive is clockwise on screen"""
+    x, y = ring[:, 0], ring[:, 1]
+    return float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2
+
+
+def _quantize(x: np.ndarray, y: np.ndarray) -> Optional[np.ndarray]:
+    """Integer ring without repeated points, or None if it collapsed"""
+    ring = np.column_stack([np.rint(x), np.rint(y)]).astype(np.int64)
+    keep = np.any(ring != np.roll(ring, 1, axis=0), axis=1)
+    ring = ring[keep] if keep.any() else ring[:1]
+    if len(ring) < 3 or _signed_area(ring) == 0:
+        return None
+    return ring
+
+
+class ProjectedDistrict(NamedTuple):
+    record: DistrictRecord
+    # Each polygon is a list of open rings (outer ring first) in world coordinates
+    polygons: List[List[Tuple[np.ndarray, np.ndarray]]]
+    bounds: Tuple[float, float, float, float]
+
+
+class TileSource:
+    """District polygons in Web Mercator, projected once and clipped per tile"""
+
+    def __init__(self, registry: DistrictRegistry, geometries: Optional[List[dict]] = None):
+        self.registry = registry
+        self.districts: List[ProjectedDistrict] = []
+        if geometries is None:
+            geometries = [record.geometry for record in registry.records]
+        for record, geometry in zip(registry.records, geometries):
+            polygons = []
+            for polygon in polygon_parts(geometry):
+                polygons.append([project(*open_ring(ring)) for ring in polygon])
+            xs = np.concatenate([rings[0][0] for rings in polygons])
+            ys = np.concatenate([rings[0][1] for rings in polygons])
+            bounds = (float(xs.min()), float(ys.min()), float(xs.max()), float(ys.max()))
+            self.districts.append(ProjectedDistrict(record, polygons, bounds))
+
+    def tile_geometry(self, district: ProjectedDistrict, z: int, x: int, y: int) -> List[np.ndarray]:
+        """Clipped, quantized rings of a district in one tile, exterior rings clockwise"""
+        scale = 2 ** z * TILE_EXTENT
+        low, high = -TILE_BUFFER, TILE_EXTENT + TILE_BUFFER
+        rings = []
+        for polygon in district.polygons:
+            clipped = []
+            for ring_x, ring_y in polygon:
+                tx, ty = clip_ring_to_rect(
+                    ring_x * scale - x * TILE_EXTENT,
+                    ring_y * scale - y * TILE_EXTENT,
+                    low, low, high, high,
+                )
+                ring = _quantize(tx, ty) if len(tx) else None
+                if ring is None:
+                    # A polygon without its outer ring is dropped with its holes
+                    if not clipped:
+                        break
+                    continue
+                # Exterior rings have positive area, holes negative
+                exterior = not clipped
+                if (_signed_area(ring) > 0) != exterior:
+                    ring = ring[::-1]
+                clipped.append(ring)
+            rings.extend(clipped)
+        return rings
+
+    def render(
+        self,
+        z: int,
+        x: int,
+        y: int,
+        properties: Optional[Dict[str, Dict[str, object]]] = None,
+    ) -> bytes:
+        """
+        Encoded tile with every district that intersects it. `properties`
+        maps district IDs to extra feature properties such as climate values.
+        """
+        n = 2 ** z
+        margin = TILE_BUFFER / TILE_EXTENT / n
+        xmin, ymin = x / n - margin, y / n - margin
+        xmax, ymax = (x + 1) / n + margin, (y + 1) / n + margin
+
+        features = []
+        for position, district in enumerate(self.districts):
+            bx0, by0, bx1, by1 = district.bounds
+            if bx1 < xmin or bx0 > xmax or by1 < ymin or by0 > ymax:
+                continue
+            rings = self.tile_geometry(district, z, x, y)
+            if not rings:
+                continue
+            record = district.record
+            feature_properties = {"id": record.id, "name": record.name, "region": record.region}
+            if properties:
+                feature_properties.update(properties.get(record.id, {}))
+            features.append(TileFeature(position + 1, feature_properties, encode_polygon(rings)))
+
+        return encode_tile({LAYER_NAME: features})
+
+
+_sources: Dict[Tuple[str, Optional[float]], TileSource] = {}
+# Tiles are rendered in worker threads; tiles of a new zoom wait for one build of its source
+_sources_lock = threading.Lock()
+
+
+def get_tile_source(zoom: int, registry: DistrictRegistry = DISTRICT_REGISTRY) -> TileSource:
+    """Projected districts simplified for a zoom level, built on first use"""
+    with _sources_lock:
+        levels = get_simplification_levels(registry)
+        level = levels.level_for(zoom=zoom)
+        key = (registry.signature, level)
+        source = _sources.get(key)
+        if source is None:
+            source = _sources[key] = TileSource(registry, levels.geometries(level))
+        return source
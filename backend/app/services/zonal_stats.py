@@ -0,0 +1,201 @@
+"""
+Zonal statistics
+Area-weighted aggregation of gridded fields to districts through a sparse
+district x grid-cell weight matrix that is built once per grid and cached on disk
+"""
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from app import config
+from app.data.district_registry import DISTRICT_REGISTRY, DistrictRegistry
+from app.data.geometry import clip_ring, geometry_bounds, open_ring, polygon_parts, ring_area
+
+logger = logging.getLogger(__name__)
+
+
+def _cell_edges(centres: np.ndarray) -> np.ndarray:
+    """Edges between consecutive cell centres, extrapolated at both ends"""
+    middle = (centres[1:] + centres[:-1]) / 2
+    first = centres[0] - (middle[0] - centres[0])
+    last = centres[-1] + (centres[-1] - middle[-1])
+    return np.concatenate([[first], middle, [last]])
+
+
+def _overlapping(edges: np.ndarray, low: float, high: float) -> np.ndarray:
+    """Indices of cells whose [edge_i, edge_i+1] interval overlaps [low, high]"""
+    lower = np.minimum(edges[:-1], edges[1:])
+    upper = np.maximum(edges[:-1], edges[1:])
+    return np.flatnonzero((upper > low) & (lower < high))
+
+
+def _clip_band(rings, axis: int, low: float, high: float):
+    clipped = []
+    for x, y in rings:
+        x, y = clip_ring(x, y, axis, low, True)
+        x, y = clip_ring(x, y, axis, high, False)
+        clipped.append((x, y))
+    return clipped
+
+
+def _covered_areas(geometry: dict, lat_edges: np.ndarray, lon_edges: np.ndarray) -> Dict[Tuple[int, int], float]:
+    """
+    Area (in degrees²) of the geometry inside every grid cell it touches.
+
+    Each polygon is clipped once per grid row, and each row band once per
+    column, so long boundaries are not re-clipped for every cell.
+    """
+    areas: Dict[Tuple[int, int], float] = {}
+    xmin, ymin, xmax, ymax = geometry_bounds(geometry)
+
+    for polygon in polygon_parts(geometry):
+        rings = [open_ring(ring) for ring in polygon]
+        for row in _overlapping(lat_edges, ymin, ymax):
+            low, high = sorted((lat_edges[row], lat_edges[row + 1]))
+            band = _clip_band(rings, 1, low, high)
+            if ring_area(*band[0]) == 0:
+                continue
+            band_xmin = float(band[0][0].min())
+            band_xmax = float(band[0][0].max())
+            for col in _overlapping(lon_edges, band_xmin, band_xmax):
+                left, right = sorted((lon_edges[col], lon_edges[col + 1]))
+                cell = _clip_band(band, 0, left, right)
+                # Outer ring minus holes
+                area = ring_area(*cell[0]) - sum(ring_area(*hole) for hole in cell[1:])
+                if area > 0:
+                    areas[(row, col)] = areas.get((row, col), 0.0) + area
+
+    return areas
+
+
+class ZonalWeights:
+    """
+    Sparse (district x cell) matrix in CSR form.
+
+    `weights[k]` is the area of district `rows[k]` inside cell `cells[k]`,
+    scaled by cos(latitude) so cells near the poles count for less.
+    """
+
+    def __init__(self, indptr: np.ndarray, cells: np.ndarray, weights: np.ndarray, n_cells: int):
+        self.indptr = indptr
+        self.cells = cells
+        self.weights = weights
+        self.n_cells = n_cells
+        self.n_districts = len(indptr) - 1
+        self.rows = np.repeat(np.arange(self.n_districts), np.diff(indptr))
+
+    @classmethod
+    def build(cls, lat: np.ndarray, lon: np.ndarray, registry: DistrictRegistry) -> "ZonalWeights":
+        """Compute the matrix for a rectilinear grid of cell centres (2D lat/lon arrays)"""
+        lat_edges = _cell_edges(lat[:, 0])
+        lon_edges = _cell_edges(lon[0, :])
+        n_cols = lon.shape[1]
+
+        indptr = [0]
+        cells = []
+        weights = []
+        for record in registry.records:
+            areas = _covered_areas(record.geometry, lat_edges, lon_edges)
+            for (row, col), area in sorted(areas.items()):
+                cells.append(row * n_cols + col)
+                weights.append(area * np.cos(np.radians(lat[row, col])))
+            indptr.append(len(cells))
+
+        return cls(
+            np.asarray(indptr, dtype=np.int64),
+            np.asarray(cells, dtype=np.int64),
+            np.asarray(weights, dtype=float),
+            lat.size,
+        )
+
+    def _row_sums(self, entries: np.ndarray) -> np.ndarray:
+        """Sum (k, nnz) matrix entries into (k, district)"""
+        sums = np.zeros((entries.shape[0], self.n_districts))
+        nonempty = np.diff(self.indptr) > 0
+        if self.cells.size:
+            sums[:, nonempty] = np.add.reduceat(entries, self.indptr[:-1][nonempty], axis=1)
+        return sums
+
+    def mean(self, fields: np.ndarray) -> np.ndarray:
+        """
+        Area-weighted mean per district of a (..., y, x) stack of fields,
+        as one sparse product for the whole stack; NaN cells are ignored.
+        """
+        fields = np.asarray(fields, dtype=float)
+        values = fields.reshape(-1, self.n_cells)[:, self.cells]
+        valid = ~np.isnan(values)
+        weights = np.where(valid, self.weights, 0.0)
+        totals = self._row_sums(np.where(valid, values, 0.0) * weights)
+        norms = self._row_sums(weights)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = totals / norms
+        return means.reshape(fields.shape[:-2] + (self.n_districts,))
+
+    def statistics(self, field: np.ndarray, percentiles: Iterable[float] = (10, 50, 90)) -> Dict[str, np.ndarray]:
+        """Mean, min, max and area-weighted percentiles of a field per district"""
+        values = np.asarray(field, dtype=float).ravel()[self.cells]
+        weights = np.where(np.isnan(values), 0.0, self.weights)
+        percentiles = tuple(percentiles)
+        result = {"mean": self.mean(field)}
+        result["min"] = np.full(self.n_districts, np.nan)
+        result["max"] = np.full(self.n_districts, np.nan)
+        for q in percentiles:
+            result[f"p{q:g}"] = np.full(self.n_districts, np.nan)
+
+        for d in range(self.n_districts):
+            start, stop = self.indptr[d], self.indptr[d + 1]
+            w = weights[start:stop]
+            present = w > 0
+            if not present.any():
+                continue
+            v = values[start:stop][present]
+            w = w[present]
+            result["min"][d] = v.min()
+            result["max"][d] = v.max()
+
+            order = np.argsort(v)
+            v, w = v[order], w[order]
+            # Weighted percentiles: interpolate on the cumulative weight at each cell's midpoint
+            cumulative = (np.cumsum(w) - w / 2) / w.sum() * 100
+            for q in percentiles:
+                result[f"p{q:g}"][d] = np.interp(q, cumulative, v)
+
+        return result
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, indptr=self.indptr, cells=self.cells, weights=self.weights, n_cells=self.n_cells)
+
+    @classmethod
+    def load(cls, path: Path) -> "ZonalWeights":
+        with np.load(path) as data:
+            return cls(data["indptr"], data["cells"], data["weights"], int(data["n_cells"]))
+
+
+def _cache_key(lat: np.ndarray, lon: np.ndarray, registry: DistrictRegistry) -> str:
+    digest = hashlib.sha1()
+    digest.update(np.ascontiguousarray(lat, dtype=float).tobytes())
+    digest.update(np.ascontiguousarray(lon, dtype=float).tobytes())
+    digest.update(registry.signature.encode())
+    return digest.hexdigest()
+
+
+def get_zonal_weights(
+    lat: np.ndarray,
+    lon: np.ndarray,
+    registry: DistrictRegistry = DISTRICT_REGISTRY,
+    cache_dir: Optional[Path] = config.CACHE_DIR,
+) -> ZonalWeights:
+    """Weight matrix for a grid and the registry boundaries, read from the disk cache when possible"""
+    path = cache_dir / f"zonal_{_cache_key(lat, lon, registry)}.npz" if cache_dir else None
+    if path is not None and path.exists():
+        return ZonalWeights.load(path)
+
+    weights = ZonalWeights.build(lat, lon, registry)
+    if path is not None:
+        weights.save(path)
+        logger.info("Cached zonal weights for a %sx%s grid in %s", *lat.shape, path)
+    return weights
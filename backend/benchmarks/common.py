@@ -0,0 +1,84 @@
+"""
+Shared helpers for the benchmarks: percentiles, peak memory, run metadata
+and JSON result files
+"""
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = BACKEND_DIR / "benchmarks" / "results"
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Linearly interpolated percentile (q in 0-100) of already sorted values"""
+    if not sorted_values:
+        return math.nan
+    rank = (len(sorted_values) - 1) * q / 100
+    low = math.floor(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def latency_summary(seconds: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99, mean and max of some latencies, in milliseconds"""
+    ordered = sorted(seconds)
+    if not ordered:
+        return {}
+    return {
+        "p50": round(percentile(ordered, 50) * 1000, 3),
+        "p95": round(percentile(ordered, 95) * 1000, 3),
+        "p99": round(percentile(ordered, 99) * 1000, 3),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 3),
+        "max": round(ordered[-1] * 1000, 3),
+    }
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of this process so far, or None where it cannot be measured"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata() -> dict:
+    """Where and on what a run happened, so results are only compared like for like"""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def write_results(kind: str, results: dict, output: Optional[Path]) -> Path:
+    """Write a run as JSON to `output`, or to results/<kind>-<timestamp>.json"""
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f"{kind}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.write_text(json.dumps(results, indent=2) + "\n")
+    return output
@@ -0,0 +1,86 @@
+"""
+Compare two benchmark result files
+Prints every metric of a baseline and a new run (micro or load) side by
+side and exits with status 1 when any got worse by more than the
+threshold, so it can gate a change in CI.
+
+    python -m benchmarks.compare BASELINE.json NEW.json [--threshold 0.15]
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+# (metric, baseline, new, higher_is_better)
+Metric = Tuple[str, Optional[float], Optional[float], bool]
+
+
+def _micro_metrics(base: dict, new: dict) -> Iterator[Metric]:
+    # The fastest round is the least disturbed by other load on the machine
+    for name in sorted(set(base["benchmarks"]) | set(new["benchmarks"])):
+        yield (
+            f"{name} min_us",
+            base["benchmarks"].get(name, {}).get("min_us"),
+            new["benchmarks"].get(name, {}).get("min_us"),
+            False,
+        )
+
+
+def _load_metrics(base: dict, new: dict) -> Iterator[Metric]:
+    yield "throughput_rps", base["throughput_rps"], new["throughput_rps"], True
+    for q in ("p50", "p95", "p99"):
+        yield f"latency {q}_ms", base["latency_ms"].get(q), new["latency_ms"].get(q), False
+    for endpoint in sorted(set(base["endpoints"]) | set(new["endpoints"])):
+        for q in ("p50", "p95"):
+            yield (
+                f"{endpoint} {q}_ms",
+                base["endpoints"].get(endpoint, {}).get("latency_ms", {}).get(q),
+                new["endpoints"].get(endpoint, {}).get("latency_ms", {}).get(q),
+                False,
+            )
+    yield "errors", base["errors"], new["errors"], False
+
+
+def compare(base: dict, new: dict, threshold: float) -> int:
+    """Print the comparison and return the number of regressions"""
+    if base["kind"] != new["kind"]:
+        raise SystemExit(f"Cannot compare a {base['kind']} run with a {new['kind']} run")
+    if base.get("config") != new.get("config"):
+        print(f"Warning: runs used different settings: {base.get('config')} vs {new.get('config')}")
+
+    metrics = list(_micro_metrics(base, new) if base["kind"] == "micro" else _load_metrics(base, new))
+    metrics.append(("peak_rss_mb", base.get("peak_rss_mb"), new.get("peak_rss_mb"), False))
+
+    print(f"{'metric':36} {'baseline':>12} {'new':>12} {'change':>9}")
+    regressions = 0
+    for name, before, after, higher_is_better in metrics:
+        if before is None or after is None:
+            print(f"{name:36} {before if before is not None else '-':>12} {after if after is not None else '-':>12}")
+            continue
+        change = (after - before) / before if before else (0.0 if after == before else float("inf"))
+        worse = -change if higher_is_better else change
+        flag = ""
+        if worse > threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        elif worse < -threshold:
+            flag = "  improved"
+        print(f"{name:36} {before:>12} {after:>12} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark runs and flag regressions")
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.15, help="Relative change counted as a regression")
+    args = parser.parse_args()
+
+    regressions = compare(json.loads(args.baseline.read_text()), json.loads(args.new.read_text()), args.threshold)
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
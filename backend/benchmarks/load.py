@@ -0,0 +1,228 @@
+"""
+In-process load generator
+Drives the ASGI app through httpx (no server or network) with virtual
+users replaying the frontend's traffic:
+
+- scrub: dragging the timeline slider back and forth and switching
+  scenarios, which refetches the climate values, comparison, legend
+  classes and surface overlay for every step
+- click: clicking districts on the map, which locates the point and
+  opens the detail panel (district, climate and time series)
+- mixed: each session is a scrub or a click, 70/30
+
+Reports p50/p95/p99 latency, throughput and peak RSS, overall and per
+endpoint, and writes them as JSON.
+
+    python -m benchmarks.load [--scenario mixed] [--users 16] [--duration 10] [--output FILE]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.common import latency_summary, peak_rss_mb, run_metadata, write_results
+
+PERIODS = ["baseline", "2030", "2050", "2080"]
+SCENARIOS = ["rcp45", "rcp85"]
+VARIABLES = [
+    "annual_mean_temp",
+    "annual_max_temp",
+    "very_hot_days",
+    "annual_precipitation",
+    "wet_season_precipitation",
+    "dry_days",
+]
+# What a browser sends; responses are measured as sent, without decoding them
+HEADERS = {"Accept-Encoding": "gzip, deflate, br"}
+
+
+class Recorder:
+    """Latency and status of every request, by endpoint"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.bytes = 0
+        self.active = False
+
+    async def get(self, client: httpx.AsyncClient, endpoint: str, url: str, **params) -> Optional[Tuple[int, bytes]]:
+        """Status and raw (still encoded) body of a GET, or None if it failed"""
+        start = time.perf_counter()
+        try:
+            response = await client.send(client.build_request("GET", url, params=params), stream=True)
+            body = b"".join([chunk async for chunk in response.aiter_raw()])
+            await response.aclose()
+        except httpx.HTTPError:
+            if self.active:
+                self.statuses[endpoint]["error"] += 1
+            return None
+        elapsed = time.perf_counter() - start
+        if self.active:
+            self.latencies[endpoint].append(elapsed)
+            self.statuses[endpoint][str(response.status_code)] += 1
+            self.bytes += len(body)
+        return response.status_code, body
+
+
+async def scrub_session(client: httpx.AsyncClient, rng: random.Random, rec: Recorder):
+    """One variable, scrubbed along the timeline under a scenario that is sometimes switched"""
+    variable = rng.choice(VARIABLES)
+    scenario = rng.choice(SCENARIOS)
+    position = 0
+    await rec.get(client, "classes", f"/api/climate/{variable}/classes", period="baseline", scenario=scenario, shared="true")
+    for _ in range(rng.randint(4, 12)):
+        if rng.random() < 0.15:
+            scenario = "rcp85" if scenario == "rcp45" else "rcp45"
+            await rec.get(client, "classes", f"/api/climate/{variable}/classes",
+                          period="baseline", scenario=scenario, shared="true")
+        position = max(0, min(len(PERIODS) - 1, position + rng.choice([-1, 1, 1])))
+        period = PERIODS[position]
+        await rec.get(client, "climate", f"/api/climate/{variable}", period=period, scenario=scenario)
+        if period != "baseline":
+            await rec.get(client, "compare", f"/api/climate/{variable}/compare", period=period, scenario=scenario)
+        await rec.get(client, "surface", f"/api/climate/{variable}/surface", period=period, scenario=scenario)
+
+
+async def click_session(client: httpx.AsyncClient, rng: random.Random, rec: Recorder, centroids: List[list]):
+    """A few district clicks, each opening the detail panel"""
+    variable = rng.choice(VARIABLES)
+    scenario = rng.choice(SCENARIOS)
+    for _ in range(rng.randint(1, 4)):
+        lng, lat = rng.choice(centroids)
+        located = await rec.get(client, "locate", "/api/districts/locate",
+                                lat=lat + rng.uniform(-0.005, 0.005), lng=lng + rng.uniform(-0.005, 0.005))
+        if located is None or located[0] != 200:
+            continue
+        # Point lookups are not cached, so the body is plain JSON
+        district_id = json.loads(located[1])["district_id"]
+        await rec.get(client, "district", f"/api/districts/{district_id}")
+        await rec.get(client, "district_climate", f"/api/districts/{district_id}/climate")
+        await rec.get(client, "timeseries", f"/api/districts/{district_id}/timeseries",
+                      variable=variable, scenario=scenario)
+
+
+async def page_load(client: httpx.AsyncClient, rec: Recorder):
+    """What every visitor fetches first"""
+    await rec.get(client, "districts", "/api/districts", format="binary")
+    await rec.get(client, "variables", "/api/climate/variables")
+
+
+def session_picker(scenario: str, centroids: List[list]) -> Callable[..., Awaitable[None]]:
+    async def session(client: httpx.AsyncClient, rng: random.Random, rec: Recorder):
+        if scenario == "scrub" or (scenario == "mixed" and rng.random() < 0.7):
+            await scrub_session(client, rng, rec)
+        else:
+            await click_session(client, rng, rec, centroids)
+    return session
+
+
+async def virtual_user(
+    client: httpx.AsyncClient,
+    session: Callable[..., Awaitable[None]],
+    rec: Recorder,
+    seed: int,
+    deadline: float,
+):
+    rng = random.Random(seed)
+    await page_load(client, rec)
+    while time.perf_counter() < deadline:
+        await session(client, rng, rec)
+
+
+async def run(scenario: str, users: int, duration: float, warmup: float, cold: bool, seed: int) -> dict:
+    from app.data.district_registry import DISTRICT_REGISTRY
+    from app.main import app
+    from app.services.response_cache import response_cache, tile_cache
+
+    centroids = [record.centroid for record in DISTRICT_REGISTRY.records]
+    session = session_picker(scenario, centroids)
+    rec = Recorder()
+    transport = httpx.ASGITransport(app=app)
+
+    # httpx does not run the lifespan; startup (loading and warming the data) happens here
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=HEADERS) as client:
+            if warmup > 0 and not cold:
+                deadline = time.perf_counter() + warmup
+                await asyncio.gather(*(virtual_user(client, session, rec, seed + i, deadline) for i in range(users)))
+            if cold:
+                response_cache.clear()
+                tile_cache.clear()
+
+            rec.active = True
+            start = time.perf_counter()
+            deadline = start + duration
+            await asyncio.gather(*(
+                virtual_user(client, session, rec, seed + 1000 + i, deadline) for i in range(users)
+            ))
+            elapsed = time.perf_counter() - start
+
+    all_latencies = [latency for latencies in rec.latencies.values() for latency in latencies]
+    statuses = sum(rec.statuses.values(), Counter())
+    return {
+        "requests": len(all_latencies),
+        "errors": sum(count for status, count in statuses.items() if status == "error" or int(status) >= 500),
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(all_latencies) / elapsed, 1),
+        "throughput_mb_s": round(rec.bytes / elapsed / 1e6, 2),
+        "latency_ms": latency_summary(all_latencies),
+        "statuses": dict(statuses),
+        "endpoints": {
+            endpoint: {
+                "requests": len(latencies),
+                "latency_ms": latency_summary(latencies),
+                "statuses": dict(rec.statuses[endpoint]),
+            }
+            for endpoint, latencies in sorted(rec.latencies.items())
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay frontend traffic against the app in-process")
+    parser.add_argument("--scenario", choices=["scrub", "click", "mixed"], default="mixed")
+    parser.add_argument("--users", type=int, default=16, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before measuring")
+    parser.add_argument("--cold", action="store_true", help="Skip the warm-up and start with empty response caches")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the simulated users' choices")
+    parser.add_argument("--output", type=Path, help="Result file (default: benchmarks/results/load-<time>.json)")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.scenario, args.users, args.duration, args.warmup, args.cold, args.seed))
+    latency = result["latency_ms"]
+    print(
+        f"{args.scenario}: {result['requests']} requests in {result['duration_s']}s "
+        f"({result['throughput_rps']} req/s, {result['errors']} errors)"
+    )
+    print(f"latency ms  p50 {latency['p50']}  p95 {latency['p95']}  p99 {latency['p99']}  max {latency['max']}")
+    for endpoint, stats in result["endpoints"].items():
+        summary = stats["latency_ms"]
+        print(f"  {endpoint:18} {stats['requests']:>7}  p50 {summary['p50']:>8}  p95 {summary['p95']:>8}  p99 {summary['p99']:>8}")
+    print(f"peak RSS {peak_rss_mb()} MB")
+
+    path = write_results("load", {
+        "kind": "load",
+        **run_metadata(),
+        "config": {
+            "scenario": args.scenario,
+            "users": args.users,
+            "duration_s": args.duration,
+            "warmup_s": 0 if args.cold else args.warmup,
+            "cold": args.cold,
+            "seed": args.seed,
+        },
+        "peak_rss_mb": peak_rss_mb(),
+        **result,
+    }, args.output)
+    print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
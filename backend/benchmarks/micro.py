@@ -0,0 +1,144 @@
+"""
+Micro-benchmarks of data access and serialization
+Times the functions behind the hot endpoints in isolation, each after a
+warm-up call so caches built on first use are excluded.
+
+    python -m benchmarks.micro [--filter NAME] [--repeat 5] [--output FILE]
+"""
+import argparse
+import asyncio
+import math
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from benchmarks.common import peak_rss_mb, run_metadata, write_results
+
+VARIABLE = "annual_mean_temp"
+DISTRICT_ID = "GH-GRE-ACCRA"
+
+
+def _tile_at(z: int, lat: float, lng: float) -> Tuple[int, int, int]:
+    n = 2 ** z
+    x = int((lng + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return z, x, y
+
+
+def build_benchmarks() -> Dict[str, Callable[[], object]]:
+    """Named zero-argument callables over the loaded dataset"""
+    from app.caching import compute_etag
+    from app.data.district_registry import DISTRICT_REGISTRY
+    from app.data.mock_data import generate_all_districts
+    from app.data.spatial_index import get_district_index
+    from app.data.topology import get_simplification_levels
+    from app.models.schemas import District
+    from app.routers import districts
+    from app.routers.tiles import _climate_properties
+    from app.services import climate_service
+    from app.services.classification import classify
+    from app.services.response_cache import encode, response_cache, serialize
+    from app.services.surface import interpolate_surface
+    from app.services.vector_tiles import get_tile_source
+
+    asyncio.run(climate_service.initialize())
+    districts.warm_response_cache()
+    cube = climate_service.get_climate_cube()
+    version = climate_service.get_dataset_version()
+    idx = cube.index(VARIABLE, "2050", "rcp85")
+    climate_data = climate_service.get_district_climate_data(DISTRICT_ID)
+    zoom7 = get_simplification_levels().level_for(zoom=7)
+
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(4.74, 11.2, 10_000)
+    lng = rng.uniform(-3.3, 1.2, 10_000)
+    index = get_district_index(DISTRICT_REGISTRY)
+
+    z, x, y = _tile_at(7, 6.7, -1.6)
+    properties = _climate_properties(cube, VARIABLE, "2050", "rcp85")
+    cache_key = ("climate", VARIABLE, "2050", "rcp85", version)
+    response_cache.get_or_build(cache_key, lambda: cube.get_response(VARIABLE, "2050", "rcp85"))
+
+    return {
+        # Data access
+        "cube.slice": lambda: cube.slice(VARIABLE, "2050", "rcp85"),
+        "district_climate_data": lambda: climate_service.get_district_climate_data(DISTRICT_ID),
+        "district_timeseries": lambda: climate_service.district_timeseries(climate_data, VARIABLE, "rcp85"),
+        "tile_properties": lambda: _climate_properties(cube, VARIABLE, "2050", "rcp85"),
+        "classify.column": lambda: classify(cube.values[idx]),
+        "rank.top20": lambda: cube.ranked("change", VARIABLE, "2050", "rcp85", limit=20),
+        "filter.range": lambda: cube.in_range("value", VARIABLE, "2050", "rcp85", 28.0, 30.0),
+        "locate.point": lambda: index.locate(5.6, -0.19),
+        "locate.10k_points": lambda: index.locate_many(lat, lng),
+        "surface.interpolate_0.05": lambda: interpolate_surface(cube.values[idx], 0.05, 2.0),
+        "tile.render_z7": lambda: get_tile_source(z).render(z, x, y, properties),
+        "response_cache.hit": lambda: response_cache.get_or_build(cache_key, lambda: None),
+        "etag.compute": lambda: compute_etag(f"/api/climate/{VARIABLE}", b"period=2050&scenario=rcp85", version),
+        # Serialization
+        "climate_response.encode": lambda: encode(bytes(cube.get_response(VARIABLE, "2050", "rcp85"))),
+        "comparison.encode": lambda: encode(bytes(cube.get_comparison(VARIABLE, "2050", "rcp85"))),
+        "districts.geojson": lambda: districts._geometry_body("geojson", None, None),
+        "districts.geojson_z7": lambda: districts._geometry_body("geojson", None, zoom7),
+        "districts.binary_z7": lambda: districts._geometry_body("binary", None, zoom7),
+        "districts.topojson_z7": lambda: districts._geometry_body("topojson", None, zoom7),
+        "districts.list": lambda: serialize(generate_all_districts(), List[District]),
+    }
+
+
+def time_callable(func: Callable[[], object], repeat: int, min_time: float) -> dict:
+    """Per-call time in microseconds over `repeat` rounds of enough calls to last `min_time` seconds"""
+    func()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, math.ceil(min_time / elapsed)))
+
+    rounds = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        rounds.append((time.perf_counter() - start) / loops)
+    return {
+        "median_us": round(statistics.median(rounds) * 1e6, 3),
+        "min_us": round(min(rounds) * 1e6, 3),
+        "stdev_us": round(statistics.stdev(rounds) * 1e6, 3) if len(rounds) > 1 else 0.0,
+        "loops": loops,
+        "repeat": repeat,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of data access and serialization")
+    parser.add_argument("--filter", action="append", help="Only run benchmarks whose name contains this (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed rounds per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.1, help="Minimum seconds per round")
+    parser.add_argument("--output", type=Path, help="Result file (default: benchmarks/results/micro-<time>.json)")
+    args = parser.parse_args()
+
+    results = {}
+    for name, func in build_benchmarks().items():
+        if args.filter and not any(f in name for f in args.filter):
+            continue
+        results[name] = time_callable(func, args.repeat, args.min_time)
+        print(f"{name:28} {results[name]['median_us']:>12.1f} us  (min {results[name]['min_us']:.1f})")
+
+    path = write_results("micro", {
+        "kind": "micro",
+        **run_metadata(),
+        "peak_rss_mb": peak_rss_mb(),
+        "benchmarks": results,
+    }, args.output)
+    print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Regional and national aggregates checked against means, sums and ranges
+computed district by district
+"""
+import numpy as np
+import pytest
+
+from app.data.district_registry import DistrictRecord, DistrictRegistry
+from app.services.aggregation import NATIONAL_NAME, AggregationIndex
+
+
+def _square(x: float, size: float) -> dict:
+    return {"type": "Polygon", "coordinates": [[[x, 0], [x + size, 0], [x + size, size], [x, size], [x, 0]]]}
+
+
+def _registry(populations) -> DistrictRegistry:
+    # Regions interleaved in registry order, squares of different areas
+    regions = ["North", "South", "North", "East", "South", "North"]
+    sizes = [0.1, 0.2, 0.3, 0.1, 0.15, 0.25]
+    return DistrictRegistry([
+        DistrictRecord(f"D{i}", f"District {i}", region, i, _square(i, size), [i + size / 2, size / 2], population)
+        for i, (region, size, population) in enumerate(zip(regions, sizes, populations))
+    ])
+
+
+def _expected(weights, future, baseline, members):
+    w = weights[members]
+    value = float(np.sum(w * future[members]) / w.sum())
+    base = float(np.sum(w * baseline[members]) / w.sum())
+    return {
+        "district_count": len(members),
+        "value": round(value, 2),
+        "baseline": round(base, 2),
+        "change": round(value - base, 2),
+        "change_percent": round((value - base) / base * 100, 1),
+        "min": float(future[members].min()),
+        "max": float(future[members].max()),
+    }
+
+
+@pytest.mark.parametrize("weight", ["area", "population", "none"])
+def test_weighted_means_match_district_sums(weight):
+    registry = _registry([120_000, 80_000, 45_000, 300_000, 60_000, 95_000])
+    index = AggregationIndex(registry)
+    rng = np.random.default_rng(3)
+    future, baseline = rng.uniform(20, 35, 6), rng.uniform(20, 35, 6)
+    weights = index.weights[weight]
+
+    regions = index.aggregate("region", weight, future, baseline)
+    assert [row["name"] for row in regions] == ["North", "South", "East"]
+    for row in regions:
+        members = [i for i, record in enumerate(registry.records) if record.region == row["name"]]
+        expected = _expected(weights, future, baseline, members)
+        assert {key: row[key] for key in expected} == pytest.approx(expected, abs=0.011)
+        assert row["weight_total"] == (None if weight == "none" else round(float(sum(weights[members])), 1))
+
+    (national,) = index.aggregate("national", weight, future, baseline)
+    assert national["name"] == NATIONAL_NAME
+    expected = _expected(weights, future, baseline, list(range(6)))
+    assert {key: national[key] for key in expected} == pytest.approx(expected, abs=0.011)
+
+
+def test_area_weights_are_district_areas():
+    index = AggregationIndex(_registry([None] * 6))
+    areas = index.weights["area"]
+    # 0.1 degree squares at the equator are about 11.1 km across
+    assert areas[0] == pytest.approx(11.1 ** 2, rel=0.02)
+    assert areas[2] / areas[0] == pytest.approx(9, rel=0.01)
+
+
+@pytest.mark.parametrize("populations", [[None] * 6, [120_000, None, 45_000, 300_000, 60_000, 95_000], [1, 0, 1, 1, 1, 1]])
+def test_population_weighting_needs_every_district(populations):
+    index = AggregationIndex(_registry(populations))
+    assert not index.available("population")
+    assert index.available("area") and index.available("none")
+    assert index.missing_population == sum(1 for population in populations if not population)
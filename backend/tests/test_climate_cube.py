@@ -0,0 +1,96 @@
+"""
+Climate cube lookups checked against direct computations on its arrays:
+projections for any year, and district rankings and filters
+"""
+import numpy as np
+import pytest
+
+from app.services.climate_cube import PERIOD_MIDPOINTS, PERIODS, RANK_FIELDS, ClimateCube, mock_cube_inputs
+
+
+@pytest.fixture(scope="module")
+def cube() -> ClimateCube:
+    return ClimateCube(*mock_cube_inputs())
+
+
+@pytest.fixture(scope="module")
+def tied_cube() -> ClimateCube:
+    """Mock cube with coarse values, so many districts tie"""
+    variables, district_ids, district_names, values, bands = mock_cube_inputs()
+    values = np.random.default_rng(5).integers(20, 26, values.shape).astype(float)
+    return ClimateCube(variables, district_ids, district_names, values, bands)
+
+
+@pytest.mark.parametrize("scenario", ["rcp45", "rcp85"])
+def test_projection_at_period_midpoints_is_the_stored_column(cube, scenario):
+    variable = cube.variable_ids[0]
+    for period, year in zip(PERIODS, PERIOD_MIDPOINTS):
+        np.testing.assert_allclose(
+            cube.interpolate(variable, year, scenario), cube.slice(variable, period, scenario), rtol=0, atol=1e-9
+        )
+
+
+@pytest.mark.parametrize("year", [2006, 2020, 2035.5, 2040, 2055.5, 2070, 2085])
+def test_projection_is_linear_between_midpoints(cube, year):
+    variable, scenario = cube.variable_ids[1], "rcp85"
+    segment = int(np.searchsorted(PERIOD_MIDPOINTS, year, side="right")) - 1
+    segment = min(segment, len(PERIODS) - 2)
+    start, end = PERIOD_MIDPOINTS[segment], PERIOD_MIDPOINTS[segment + 1]
+    before = cube.slice(variable, PERIODS[segment], scenario)
+    after = cube.slice(variable, PERIODS[segment + 1], scenario)
+    t = (year - start) / (end - start)
+    np.testing.assert_allclose(cube.interpolate(variable, year, scenario), before + t * (after - before), rtol=0, atol=1e-9)
+
+
+def test_projection_is_flat_outside_midpoints(cube):
+    variable, scenario = cube.variable_ids[0], "rcp45"
+    np.testing.assert_allclose(
+        cube.interpolate(variable, 1991, scenario), cube.slice(variable, "baseline", scenario), rtol=0, atol=1e-9
+    )
+    np.testing.assert_allclose(
+        cube.interpolate(variable, 2100, scenario), cube.slice(variable, "2080", scenario), rtol=0, atol=1e-9
+    )
+
+
+def _column(cube: ClimateCube, field: str, idx) -> np.ndarray:
+    return {"value": cube.values, "change": cube.change, "change_percent": cube.change_percent}[field][idx]
+
+
+def _ascending(column: np.ndarray) -> list:
+    """District positions by value; ties keep district order"""
+    return sorted(range(len(column)), key=lambda position: (column[position], position))
+
+
+@pytest.mark.parametrize("field", RANK_FIELDS)
+@pytest.mark.parametrize("descending", [True, False])
+@pytest.mark.parametrize("limit", [None, 1, 10])
+def test_ranked_matches_a_sort(tied_cube, field, descending, limit):
+    variable, period, scenario = tied_cube.variable_ids[2], "2050", "rcp85"
+    column = _column(tied_cube, field, tied_cube.index(variable, period, scenario))
+    order = _ascending(column)
+    expected = (order[::-1] if descending else order)[:limit]
+    assert tied_cube.ranked(field, variable, period, scenario, descending, limit).tolist() == expected
+
+
+@pytest.mark.parametrize("field", RANK_FIELDS)
+@pytest.mark.parametrize("low, high", [(None, None), (0.25, None), (None, 0.75), (0.25, 0.75), (0.5, 0.5), (0.75, 0.25)])
+@pytest.mark.parametrize("descending", [True, False])
+def test_in_range_matches_a_filter(tied_cube, field, low, high, descending):
+    variable, period, scenario = tied_cube.variable_ids[0], "2080", "rcp45"
+    column = _column(tied_cube, field, tied_cube.index(variable, period, scenario))
+    # Bounds at values the column holds (given as quantiles), so districts tie on them
+    ordered = np.sort(column)
+    low, high = (None if q is None else float(ordered[int(q * (len(ordered) - 1))]) for q in (low, high))
+    expected = [
+        position for position in _ascending(column)
+        if (low is None or column[position] >= low) and (high is None or column[position] <= high)
+    ]
+    if descending:
+        expected.reverse()
+    assert tied_cube.in_range(field, variable, period, scenario, low, high, descending).tolist() == expected
+
+
+def test_in_range_outside_the_column_is_empty(tied_cube):
+    variable, period, scenario = tied_cube.variable_ids[0], "2080", "rcp45"
+    assert tied_cube.in_range("value", variable, period, scenario, low=100).tolist() == []
+    assert tied_cube.in_range("change", variable, period, scenario, high=-100).tolist() == []
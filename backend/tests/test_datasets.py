@@ -0,0 +1,80 @@
+"""
+Dataset reloads: snapshots swapped in whole, requests pinned to the
+snapshot they started on, and cached responses of old versions dropped
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services import climate_service
+from app.services.climate_cube import ClimateCube
+from app.services.datasets import DatasetManager
+from app.services.response_cache import RESPONSE_CACHES, response_cache, tile_cache
+
+
+@pytest.fixture
+def active():
+    """The active snapshot, restored (with empty caches) after the test"""
+    snapshot = climate_service.active_snapshot()
+    yield snapshot
+    climate_service.set_snapshot(snapshot)
+    for cache in RESPONSE_CACHES:
+        cache.clear()
+
+
+def _shifted(cube: ClimateCube, offset: float) -> ClimateCube:
+    return ClimateCube(cube.variables, cube.district_id_list, cube.district_name_list, cube.values + offset, cube.bands)
+
+
+def test_pinned_snapshot_survives_a_swap(active):
+    new = climate_service.make_snapshot(_shifted(active.cube, 1))
+    assert new.version != active.version
+
+    async def request():
+        with climate_service.pinned_snapshot() as pinned:
+            climate_service.set_snapshot(new)
+            # The request, and the threads it starts, keep the snapshot it began with
+            assert climate_service.get_snapshot() is pinned is active
+            assert await asyncio.to_thread(climate_service.get_climate_cube) is active.cube
+            assert await asyncio.to_thread(climate_service.get_dataset_version) == active.version
+        assert climate_service.get_snapshot() is new
+
+    asyncio.run(request())
+
+
+def test_reload_swaps_in_new_data_and_evicts_stale_responses(active, tmp_path):
+    db_path = tmp_path / "climate.db"
+    climate_service.write_climate_cube(db_path, _shifted(active.cube, 1))
+
+    response_cache.get_or_build(("climate", active.version), lambda: {"old": True})
+    tile_cache.get_or_build(("tile", 7, 0, 0, active.version), lambda: b"old", compressible=False)
+    warmed = []
+
+    def warm():
+        # Warming sees the new snapshot while the old one is still active
+        version = climate_service.get_dataset_version()
+        assert version != climate_service.active_snapshot().version
+        response_cache.get_or_build(("climate", version), lambda: {"old": False})
+        warmed.append(version)
+
+    async def reload():
+        manager = DatasetManager(db_path, poll_interval=0)
+        manager.start(warm=[warm])
+        try:
+            return await manager.reload(), await manager.reload()
+        finally:
+            await manager.stop()
+
+    first, second = asyncio.run(reload())
+
+    new = climate_service.active_snapshot()
+    assert first == (True, new.version, active.version)
+    assert warmed == [new.version]
+    idx = new.cube.index("annual_mean_temp", "2050", "rcp85")
+    np.testing.assert_allclose(new.cube.values[idx], active.cube.values[idx] + 1, rtol=0, atol=1e-4)
+    # Only the entries built for the new version remain
+    assert len(tile_cache) == 0
+    assert len(response_cache) == 1 and response_cache.get_or_build(("climate", new.version), dict) is not None
+    # Unchanged data is not swapped again
+    assert second == (False, new.version, new.version)
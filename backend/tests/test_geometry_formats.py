@@ -0,0 +1,168 @@
+"""
+Round trip of the compact binary district geometry format through a
+decoder that follows frontend/src/utils/compactGeometry.ts step by step
+"""
+import numpy as np
+import pytest
+
+from app.data.district_registry import DISTRICT_REGISTRY, DistrictRecord, DistrictRegistry
+from app.data.topology import Topology, get_simplification_levels
+from app.services.geometry_formats import BINARY_MAGIC, BINARY_VERSION, _varints, _zigzag, encode_binary
+
+
+class Reader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def byte(self) -> int:
+        self.pos += 1
+        return self.data[self.pos - 1]
+
+    def uint(self) -> int:
+        result, shift = 0, 0
+        while True:
+            b = self.byte()
+            result |= (b & 0x7F) << shift
+            shift += 7
+            if not b & 0x80:
+                return result
+
+    def int(self) -> int:
+        value = self.uint()
+        return value >> 1 if value % 2 == 0 else -((value + 1) >> 1)
+
+    def string(self) -> str:
+        length = self.uint()
+        self.pos += length
+        return self.data[self.pos - length:self.pos].decode()
+
+
+def decode_binary(data: bytes) -> list:
+    reader = Reader(data)
+    assert bytes(reader.byte() for _ in range(4)) == BINARY_MAGIC
+    assert reader.byte() == BINARY_VERSION
+
+    scale = 10.0 ** -reader.uint()
+    tx, ty = reader.int(), reader.int()
+    arcs = []
+    for _ in range(reader.uint()):
+        x, y, arc = tx, ty, []
+        for _ in range(reader.uint()):
+            x += reader.int()
+            y += reader.int()
+            arc.append([x * scale, y * scale])
+        arcs.append(arc)
+
+    features = []
+    for _ in range(reader.uint()):
+        district_id, name, region = reader.string(), reader.string(), reader.string()
+        centroid = [(reader.int() + tx) * scale, (reader.int() + ty) * scale]
+        structure = [[reader.uint() for _ in range(reader.uint())] for _ in range(reader.uint())]
+        polygons = []
+        for ring_sizes in structure:
+            rings = []
+            for size in ring_sizes:
+                ring = []
+                for k in range(size):
+                    ref = reader.int()
+                    arc = arcs[ref] if ref >= 0 else arcs[~ref][::-1]
+                    ring.extend(arc if k == 0 else arc[1:])
+                rings.append(ring)
+            polygons.append(rings)
+        features.append({
+            "properties": {"id": district_id, "name": name, "region": region, "centroid": centroid},
+            "geometry": (
+                {"type": "Polygon", "coordinates": polygons[0]}
+                if len(polygons) == 1 else {"type": "MultiPolygon", "coordinates": polygons}
+            ),
+        })
+    assert reader.pos == len(data)
+    return features
+
+
+def _polygons(geometry: dict) -> list:
+    return [geometry["coordinates"]] if geometry["type"] == "Polygon" else geometry["coordinates"]
+
+
+def _canonical_ring(ring) -> np.ndarray:
+    """Open ring starting at its smallest point, keeping its orientation"""
+    points = np.asarray(ring, dtype=float)
+    if np.allclose(points[0], points[-1]):
+        points = points[:-1]
+    start = min(range(len(points)), key=lambda i: tuple(points[i]))
+    return np.roll(points, -start, axis=0)
+
+
+def assert_same_geometry(decoded: dict, expected: dict, tolerance: float):
+    decoded_polygons, expected_polygons = _polygons(decoded), _polygons(expected)
+    assert len(decoded_polygons) == len(expected_polygons)
+    for decoded_rings, expected_rings in zip(decoded_polygons, expected_polygons):
+        assert len(decoded_rings) == len(expected_rings)
+        for decoded_ring, expected_ring in zip(decoded_rings, expected_rings):
+            np.testing.assert_allclose(
+                _canonical_ring(decoded_ring), _canonical_ring(expected_ring), rtol=0, atol=tolerance
+            )
+
+
+def test_varints_round_trip_extreme_values():
+    values = [0, 1, -1, 63, -64, 64, 2 ** 31, -(2 ** 31) - 1, 2 ** 53, -(2 ** 62)]
+    reader = Reader(_varints(_zigzag(values)))
+    assert [reader.int() for _ in values] == values
+    assert reader.pos == len(reader.data)
+
+
+def test_full_resolution_matches_geojson():
+    levels = get_simplification_levels()
+    records = DISTRICT_REGISTRY.records
+    features = decode_binary(encode_binary(levels.topology_at(None), records, range(len(records))))
+
+    assert len(features) == len(records)
+    for feature, record in zip(features, records):
+        properties = feature["properties"]
+        assert (properties["id"], properties["name"], properties["region"]) == (record.id, record.name, record.region)
+        np.testing.assert_allclose(properties["centroid"], record.centroid, rtol=0, atol=1e-6)
+        # Full resolution is quantized to 6 decimal places
+        assert_same_geometry(feature["geometry"], record.geometry, 1e-6)
+
+
+def _record(district_id: str, geometry: dict) -> DistrictRecord:
+    return DistrictRecord(district_id, f"District {district_id}", "Test", 0, geometry, [0.5, 0.5])
+
+
+def test_shared_borders_holes_and_multipolygons():
+    """Arcs used reversed by a neighbour, rings with holes and multi-part districts"""
+    west = {"type": "Polygon", "coordinates": [
+        [[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]],
+        [[0.25, 0.25], [0.25, 0.75], [0.75, 0.75], [0.75, 0.25], [0.25, 0.25]],
+    ]}
+    east = {"type": "Polygon", "coordinates": [[[1, 0], [2, 0], [2, 1], [1, 1], [1, 0]]]}
+    islands = {"type": "MultiPolygon", "coordinates": [
+        [[[2, 0], [3, 0], [3, 1], [2, 0]]],
+        [[[4.123456, 0.5], [5, 0.5], [5, 1.654321], [4.123456, 0.5]]],
+    ]}
+    records = [_record("W", west), _record("E", east), _record("I", islands)]
+    topology = Topology.build(DistrictRegistry(records))
+    assert any(ref < 0 for polygons in topology.geometries for rings in polygons for ring in rings for ref in ring)
+
+    features = decode_binary(encode_binary(topology, records, range(len(records))))
+
+    for feature, record in zip(features, records):
+        assert feature["geometry"]["type"] == record.geometry["type"]
+        assert_same_geometry(feature["geometry"], record.geometry, 1e-6)
+
+
+@pytest.mark.parametrize("zoom", [5, 9])
+def test_simplified_region_matches_topology(zoom):
+    levels = get_simplification_levels()
+    level = levels.level_for(zoom=zoom)
+    topology = levels.topology_at(level)
+    records = DISTRICT_REGISTRY.records
+    region = records[0].region
+    indices = [i for i, record in enumerate(records) if record.region == region]
+
+    features = decode_binary(encode_binary(topology, records, indices))
+
+    assert [feature["properties"]["id"] for feature in features] == [records[i].id for i in indices]
+    for feature, index in zip(features, indices):
+        assert_same_geometry(feature["geometry"], topology.geometry(index), 10.0 ** -topology.digits)
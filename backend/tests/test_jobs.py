@@ -0,0 +1,151 @@
+"""
+Background job bookkeeping in the SQLite job table: sharing one job per
+result, pruning expired jobs and files, and which unfinished jobs are
+failed at start when several servers share the table
+"""
+import asyncio
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+import uuid
+
+from app.database import create_jobs_database
+from app.services.jobs import JobManager, job_cache_key
+
+
+def _manager(tmp_path, **kwargs) -> JobManager:
+    return JobManager(db_path=tmp_path / "jobs.db", result_dir=tmp_path / "jobs", **kwargs)
+
+
+def _insert(db, owner, status="queued") -> str:
+    job_id = uuid.uuid4().hex
+    db.execute(
+        "INSERT INTO jobs (id, type, params, cache_key, status, owner) VALUES (?, 'report', '{}', ?, ?, ?)",
+        (job_id, job_id, status, owner),
+    )
+    return job_id
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def _statuses(db) -> dict:
+    return {row["id"]: row["status"] for row in db.execute("SELECT id, status FROM jobs")}
+
+
+def _open(tmp_path, **kwargs) -> JobManager:
+    manager = _manager(tmp_path, **kwargs)
+    manager.result_dir.mkdir()
+    manager._db = create_jobs_database(manager.db_path)
+    return manager
+
+
+def _age(path, seconds: float):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_cache_key_covers_type_parameters_and_dataset():
+    params = {"district_id": "GH0101", "variable": "annual_mean_temp", "scenario": "rcp45"}
+    key = job_cache_key("report", params, "v1")
+    assert key == job_cache_key("report", dict(reversed(list(params.items()))), "v1")
+    assert key != job_cache_key("report", params, "v2")
+    assert key != job_cache_key("export", params, "v1")
+    assert key != job_cache_key("report", {**params, "scenario": "rcp85"}, "v1")
+
+
+def test_identical_jobs_share_one_row(tmp_path):
+    manager = _open(tmp_path)
+    params = {"district_id": "GH0101", "variable": "annual_mean_temp", "scenario": "rcp45"}
+    key = job_cache_key("report", params, "v1")
+
+    job, created = manager._find_or_insert("report", params, key)
+    assert created and job["status"] == "queued" and job["owner"] == manager.owner
+    again, created = manager._find_or_insert("report", params, key)
+    assert not created and again["id"] == job["id"]
+
+    # A succeeded job is reused while its result file exists
+    manager._execute("UPDATE jobs SET status = 'succeeded' WHERE id = ?", (job["id"],))
+    manager.result_path(job).write_bytes(b"%PDF")
+    assert manager._find_or_insert("report", params, key)[0]["id"] == job["id"]
+    manager.result_path(job).unlink()
+    retry, created = manager._find_or_insert("report", params, key)
+    assert created and retry["id"] != job["id"]
+
+    # A failed job is never reused
+    manager._execute("UPDATE jobs SET status = 'failed' WHERE id = ?", (retry["id"],))
+    assert manager._find_or_insert("report", params, key)[1]
+    manager._db.close()
+
+
+def test_prune_removes_expired_jobs_and_unreferenced_files(tmp_path):
+    manager = _open(tmp_path, retention=3600)
+    db = manager._db
+    expired = _insert(db, manager.owner, "succeeded")
+    recent = _insert(db, manager.owner, "failed")
+    running = _insert(db, manager.owner, "running")
+    db.execute("UPDATE jobs SET finished_at = datetime('now', '-2 hours') WHERE id IN (?, ?)", (expired, running))
+    db.execute("UPDATE jobs SET finished_at = CURRENT_TIMESTAMP WHERE id = ?", (recent,))
+
+    files = {name: manager.result_dir / f"{name}.pdf" for name in (expired, recent, "orphan", "fresh")}
+    for path in files.values():
+        path.write_bytes(b"%PDF")
+    for name in (expired, recent, "orphan"):
+        _age(files[name], 7200)
+
+    assert manager.prune() == 1
+    assert set(_statuses(db)) == {recent, running}
+    # Files of remaining jobs, and files too new to be orphans, stay
+    assert {name for name, path in files.items() if path.exists()} == {recent, "fresh"}
+    db.close()
+
+
+def test_start_fails_only_jobs_of_stopped_servers(tmp_path):
+    db = create_jobs_database(tmp_path / "jobs.db")
+    live = _insert(db, f"{os.getppid()}:other")
+    live_running = _insert(db, f"{os.getppid()}:other", "running")
+    dead = _insert(db, f"{_dead_pid()}:gone")
+    same_pid = _insert(db, f"{os.getpid()}:earlier", "running")
+    legacy = _insert(db, None)
+    finished = _insert(db, f"{_dead_pid()}:gone", "succeeded")
+
+    async def start():
+        manager = _manager(tmp_path)
+        manager.start()
+        await manager.stop()
+
+    asyncio.run(start())
+
+    assert _statuses(db) == {
+        live: "queued",
+        live_running: "running",
+        dead: "failed",
+        same_pid: "failed",
+        legacy: "failed",
+        finished: "succeeded",
+    }
+    db.close()
+
+
+def test_owner_column_added_to_existing_table(tmp_path):
+    path = tmp_path / "jobs.db"
+    conn = sqlite3.connect(str(path))
+    conn.execute(
+        "CREATE TABLE jobs (id TEXT PRIMARY KEY, type TEXT NOT NULL, params TEXT NOT NULL, cache_key TEXT NOT NULL, "
+        "status TEXT NOT NULL, error TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, started_at TIMESTAMP, "
+        "finished_at TIMESTAMP)"
+    )
+    conn.execute("INSERT INTO jobs (id, type, params, cache_key, status) VALUES ('old', 'report', '{}', 'k', 'running')")
+    conn.commit()
+    conn.close()
+
+    manager = _manager(tmp_path)
+    manager._db = create_jobs_database(path)
+    assert manager.fail_orphaned() == 1
+    assert _statuses(manager._db) == {"old": "failed"}
+    manager._db.close()
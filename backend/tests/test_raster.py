@@ -0,0 +1,73 @@
+"""
+Round trip of the PNG encoder through a chunk-level reader following the
+PNG specification (signature, CRCs, IHDR, zlib stream, filter bytes)
+"""
+import struct
+import zlib
+
+import numpy as np
+import pytest
+
+from app.services.raster import colorize, encode_png
+from app.services.surface import grid_shape, surface_bytes, surface_from_bytes
+
+SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def read_chunks(data: bytes) -> list:
+    assert data[:8] == SIGNATURE
+    chunks, pos = [], 8
+    while pos < len(data):
+        length, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        (crc,) = struct.unpack(">I", data[pos + 8 + length:pos + 12 + length])
+        assert crc == zlib.crc32(kind + body), f"Bad CRC in {kind!r}"
+        chunks.append((kind, body))
+        pos += 12 + length
+    assert pos == len(data)
+    return chunks
+
+
+def decode_png(data: bytes) -> np.ndarray:
+    """Pixels of an 8-bit RGBA PNG whose scanlines are unfiltered"""
+    chunks = read_chunks(data)
+    kinds = [kind for kind, _ in chunks]
+    assert kinds[0] == b"IHDR" and kinds[-1] == b"IEND"
+
+    width, height, depth, color_type, compression, filtering, interlace = struct.unpack(">IIBBBBB", chunks[0][1])
+    assert (depth, color_type, compression, filtering, interlace) == (8, 6, 0, 0, 0)
+
+    raw = zlib.decompress(b"".join(body for kind, body in chunks if kind == b"IDAT"))
+    scanlines = np.frombuffer(raw, dtype=np.uint8).reshape(height, width * 4 + 1)
+    assert (scanlines[:, 0] == 0).all()
+    return scanlines[:, 1:].reshape(height, width, 4)
+
+
+@pytest.mark.parametrize("shape", [(1, 1), (7, 13), (64, 3)])
+def test_png_round_trip(shape):
+    rgba = np.random.default_rng(0).integers(0, 256, shape + (4,), dtype=np.uint8)
+    np.testing.assert_array_equal(decode_png(encode_png(rgba)), rgba)
+
+
+def test_colorized_grid_round_trip():
+    grid = np.linspace(20, 35, 6 * 9).reshape(6, 9)
+    grid[2, 3] = np.nan
+    rgba = colorize(grid, "temperature", 20, 35, opacity=0.8)
+    decoded = decode_png(encode_png(rgba, compression=9))
+
+    np.testing.assert_array_equal(decoded, rgba)
+    # Cells without data are transparent
+    assert decoded[2, 3, 3] == 0
+
+
+def test_grid_bytes_round_trip():
+    """PNGs are coloured from the cached binary grid, so it must read back exactly"""
+    rows, cols = grid_shape(0.5)
+    grid = np.random.default_rng(1).normal(25, 3, (rows, cols)).astype(np.float32)
+    grid[0, :] = np.nan
+    data = surface_bytes(grid)
+    assert len(data) == rows * cols * 4
+
+    decoded = surface_from_bytes(data, 0.5)
+    np.testing.assert_array_equal(decoded, grid)
+    np.testing.assert_array_equal(colorize(decoded, "temperature", 20, 30, 0.75), colorize(grid, "temperature", 20, 30, 0.75))
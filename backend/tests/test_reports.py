@@ -0,0 +1,86 @@
+"""
+Structure of the hand-written PDF: every xref offset points at its
+object, startxref at the table, and the content stream inflates to the
+page operations. Also parsed with PyMuPDF when it is installed.
+"""
+import re
+import zlib
+
+import pytest
+
+from app.data.district_registry import DISTRICT_REGISTRY
+from app.services.climate_service import get_climate_cube
+from app.services.reports import (
+    PAGE_HEIGHT, PAGE_WIDTH, SCENARIO_LABELS, PdfPage, render_district_report, render_pdf,
+)
+
+
+def read_pdf(data: bytes) -> dict:
+    """Objects of a PDF by number, found through its cross-reference table"""
+    assert data.startswith(b"%PDF-1.4\n")
+    assert data.endswith(b"%%EOF\n")
+    startxref = int(re.search(rb"startxref\n(\d+)\n%%EOF\n$", data).group(1))
+    assert data[startxref:startxref + 5] == b"xref\n"
+
+    count = int(re.match(rb"xref\n0 (\d+)\n", data[startxref:]).group(1))
+    table = data[startxref:].split(b"\n", 2)[2]
+    entries = [table[i * 20:(i + 1) * 20] for i in range(count)]
+    assert entries[0] == b"0000000000 65535 f \n"
+
+    trailer = table[count * 20:]
+    assert re.match(rb"trailer\n<< /Size %d /Root 1 0 R >>\n" % count, trailer)
+
+    objects = {}
+    for number, entry in enumerate(entries[1:], start=1):
+        assert entry.endswith(b" 00000 n \n")
+        offset = int(entry[:10])
+        header = b"%d 0 obj\n" % number
+        assert data[offset:offset + len(header)] == header, f"xref offset of object {number} is wrong"
+        end = data.index(b"\nendobj\n", offset)
+        objects[number] = data[offset + len(header):end]
+    return objects
+
+
+def content_stream(objects: dict) -> bytes:
+    (stream,) = [body for body in objects.values() if b"stream\n" in body]
+    length = int(re.search(rb"/Length (\d+)", stream).group(1))
+    start = stream.index(b"stream\n") + len(b"stream\n")
+    assert stream[start + length:] == b"\nendstream"
+    return zlib.decompress(stream[start:start + length])
+
+
+def test_pdf_structure_round_trip():
+    page = PdfPage()
+    page.text(56, 700, "Rainfall (mm) \\ 25°C", 12, bold=True)
+    page.line([(56, 690), (539, 690)], 0.5, (0.7, 0.7, 0.7))
+    page.polygon([(60, 100), (120, 100), (90, 150)], (0.2, 0.4, 0.6))
+
+    objects = read_pdf(render_pdf(page))
+
+    assert len(objects) == 6
+    assert b"/MediaBox [0 0 %d %d]" % (PAGE_WIDTH, PAGE_HEIGHT) in objects[3]
+    content = content_stream(objects)
+    assert content == page.render()
+    # Parentheses and backslashes escaped; the degree sign in WinAnsiEncoding
+    assert b"(Rainfall \\(mm\\) \\\\ 25\xb0C) Tj" in content
+
+
+def _report_arguments():
+    record = DISTRICT_REGISTRY.records[0]
+    return record, get_climate_cube().variable_ids[0]
+
+
+def test_district_report_structure():
+    record, variable = _report_arguments()
+    objects = read_pdf(render_district_report(record.id, variable, "rcp45"))
+    assert f"(Climate Report for {record.name}) Tj".encode("cp1252") in content_stream(objects)
+
+
+def test_district_report_parses():
+    pymupdf = pytest.importorskip("pymupdf")
+    record, variable = _report_arguments()
+    with pymupdf.open(stream=render_district_report(record.id, variable, "rcp85"), filetype="pdf") as document:
+        assert document.page_count == 1
+        text = document[0].get_text()
+    assert f"Climate Report for {record.name}" in text
+    assert SCENARIO_LABELS["rcp85"] in text
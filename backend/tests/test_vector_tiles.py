@@ -0,0 +1,197 @@
+"""
+Round trip of district vector tiles through a protobuf reader written
+from the Mapbox Vector Tile 2.1 spec (vector_tile.proto)
+"""
+import math
+import struct
+
+import numpy as np
+
+from app.services.vector_tiles import (
+    LAYER_NAME, TILE_EXTENT, TileFeature, encode_layer, encode_polygon, get_tile_source,
+)
+
+
+def read_varint(data: bytes, pos: int):
+    result, shift = 0, 0
+    while True:
+        b = data[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        shift += 7
+        if not b & 0x80:
+            return result, pos
+
+
+def read_fields(data: bytes) -> list:
+    """(field number, value) pairs of a message; length-delimited values as bytes"""
+    fields, pos = [], 0
+    while pos < len(data):
+        key, pos = read_varint(data, pos)
+        number, wire_type = key >> 3, key & 0x7
+        if wire_type == 0:
+            value, pos = read_varint(data, pos)
+        elif wire_type == 1:
+            value, pos = data[pos:pos + 8], pos + 8
+        elif wire_type == 2:
+            length, pos = read_varint(data, pos)
+            value, pos = data[pos:pos + length], pos + length
+        elif wire_type == 5:
+            value, pos = data[pos:pos + 4], pos + 4
+        else:
+            raise ValueError(f"Unexpected wire type {wire_type}")
+        fields.append((number, value))
+    assert pos == len(data)
+    return fields
+
+
+def read_packed(data: bytes) -> list:
+    values, pos = [], 0
+    while pos < len(data):
+        value, pos = read_varint(data, pos)
+        values.append(value)
+    return values
+
+
+def unzigzag(value: int) -> int:
+    return (value >> 1) ^ -(value & 1)
+
+
+def decode_value(data: bytes):
+    (number, value), = read_fields(data)
+    return {
+        1: lambda: value.decode(),
+        2: lambda: struct.unpack("<f", value)[0],
+        3: lambda: struct.unpack("<d", value)[0],
+        4: lambda: value - (1 << 64) if value >= 1 << 63 else value,
+        5: lambda: value,
+        6: lambda: unzigzag(value),
+        7: lambda: bool(value),
+    }[number]()
+
+
+def decode_rings(commands: list) -> list:
+    """Rings of a polygon geometry in tile coordinates (open, as encoded)"""
+    rings, ring, x, y, pos = [], None, 0, 0, 0
+    while pos < len(commands):
+        command, count = commands[pos] & 0x7, commands[pos] >> 3
+        pos += 1
+        if command == 7:
+            assert count == 1 and ring is not None
+            rings.append(ring)
+            ring = None
+            continue
+        assert command in (1, 2)
+        if command == 1:
+            assert count == 1 and ring is None
+            ring = []
+        for _ in range(count):
+            x += unzigzag(commands[pos])
+            y += unzigzag(commands[pos + 1])
+            pos += 2
+            ring.append((x, y))
+    assert ring is None
+    return rings
+
+
+def decode_layer(data: bytes) -> dict:
+    layer = {"features": [], "keys": [], "values": []}
+    for number, value in read_fields(data):
+        if number == 15:
+            layer["version"] = value
+        elif number == 1:
+            layer["name"] = value.decode()
+        elif number == 2:
+            layer["features"].append(read_fields(value))
+        elif number == 3:
+            layer["keys"].append(value.decode())
+        elif number == 4:
+            layer["values"].append(decode_value(value))
+        elif number == 5:
+            layer["extent"] = value
+
+    features = []
+    for fields in layer["features"]:
+        feature = dict(fields)
+        tags = read_packed(feature.get(2, b""))
+        features.append({
+            "id": feature[1],
+            "type": feature[3],
+            "properties": {layer["keys"][k]: layer["values"][v] for k, v in zip(tags[::2], tags[1::2])},
+            "rings": decode_rings(read_packed(feature[4])),
+        })
+    layer["features"] = features
+    return layer
+
+
+def decode_tile(data: bytes) -> dict:
+    layers = {}
+    for number, value in read_fields(data):
+        assert number == 3
+        layer = decode_layer(value)
+        layers[layer["name"]] = layer
+    return layers
+
+
+def _shoelace(ring: list) -> float:
+    return sum(x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1])) / 2
+
+
+def _tile_for(lon: float, lat: float, z: int):
+    n = 2 ** z
+    x = int((lon + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return x, y
+
+
+def test_layer_properties_round_trip():
+    properties = {"name": "Accra", "count": -5, "big": 2 ** 40, "ratio": 1.25, "flag": True, "missing": None}
+    # MoveTo(0, 0), LineTo(8, 0), LineTo(8, 8), ClosePath
+    square = [9, 0, 0, 18, 16, 0, 0, 16, 15]
+    layer = decode_layer(encode_layer("test", [
+        TileFeature(7, properties, square),
+        TileFeature(8, {"name": "Accra", "count": 3}, square),
+    ]))
+
+    assert (layer["version"], layer["name"], layer["extent"]) == (2, "test", TILE_EXTENT)
+    first, second = layer["features"]
+    assert first["id"] == 7 and first["type"] == 3
+    assert first["properties"] == {k: v for k, v in properties.items() if v is not None}
+    assert first["rings"] == [[(0, 0), (8, 0), (8, 8)]]
+    assert second["properties"] == {"name": "Accra", "count": 3}
+    # Keys and values are shared between features
+    assert layer["keys"].count("name") == 1 and layer["values"].count("Accra") == 1
+
+
+def test_polygon_rings_round_trip():
+    # An exterior ring, a hole and a second polygon; the cursor carries across rings
+    rings = [
+        np.array([[0, 0], [100, 0], [100, 100], [0, 100]]),
+        np.array([[20, 20], [20, 80], [80, 80], [80, 20]]),
+        np.array([[-50, 4200], [-10, 4200], [-30, 4150]]),
+    ]
+    decoded = decode_rings(encode_polygon(rings))
+    assert decoded == [[tuple(point) for point in ring.tolist()] for ring in rings]
+
+
+def test_district_tile_round_trip():
+    z = 7
+    x, y = _tile_for(-0.2, 5.6, z)
+    source = get_tile_source(z)
+    layers = decode_tile(source.render(z, x, y))
+
+    layer = layers[LAYER_NAME]
+    assert layer["extent"] == TILE_EXTENT and layer["version"] == 2
+    assert layer["features"]
+
+    for feature in layer["features"]:
+        # Feature IDs are registry positions + 1
+        district = source.districts[feature["id"] - 1]
+        record = district.record
+        assert feature["properties"] == {"id": record.id, "name": record.name, "region": record.region}
+        # The exterior ring has positive area in tile coordinates (clockwise on screen)
+        assert _shoelace(feature["rings"][0]) > 0
+        expected = source.tile_geometry(district, z, x, y)
+        assert len(feature["rings"]) == len(expected)
+        for ring, expected_ring in zip(feature["rings"], expected):
+            np.testing.assert_array_equal(np.array(ring), expected_ring)
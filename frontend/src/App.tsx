@@ -13,7 +13,7 @@ import {
   useClimateVariables,
   useClimateData,
   useClimateComparison,
-  useClimateRange,
+  useClimateClasses,
 } from "./hooks/useClimateData";
 import { useMapControls } from "./hooks/useMapControls";
 import type { ColorScaleType } from "./utils/colorScales";
@@ -69,7 +69,8 @@ function ClimateAtlas() {
   const { data: comparisonData } = useClimateComparison(variable, period, scenario);
   // Always fetch 2080 comparison for panel display (regardless of map period)
   const { data: panelComparisonData } = useClimateComparison(variable, "2080", scenario);
-  const { data: rangeData } = useClimateRange(variable, period, scenario);
+  // Legend range shared by every period of the scenario, so it holds still on the timeline
+  const { data: classesData } = useClimateClasses(variable, period, scenario);
 
   // Get current variable info
   const currentVariable = useMemo(
@@ -84,11 +85,11 @@ function ClimateAtlas() {
       const absMax = Math.max(...changes.map(Math.abs));
       return { minValue: -absMax, maxValue: absMax };
     }
-    if (rangeData) {
-      return { minValue: rangeData.min, maxValue: rangeData.max };
+    if (classesData && classesData.min !== null && classesData.max !== null) {
+      return { minValue: classesData.min, maxValue: classesData.max };
     }
     return { minValue: 0, maxValue: 100 };
-  }, [rangeData, comparisonData, showChange]);
+  }, [classesData, comparisonData, showChange]);
 
   // Get color scale type
   const colorScaleType: ColorScaleType = useMemo(() => {
@@ -154,6 +155,9 @@ function ClimateAtlas() {
 
           <GhanaMap
             districts={districts}
+            variable={variable}
+            period={period}
+            scenario={scenario}
             climateData={climateData?.data}
             comparisonData={comparisonData?.data}
             showChange={showChange}
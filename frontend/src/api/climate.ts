@@ -1,11 +1,18 @@
 // API client for Ghana Climate Atlas backend
 
 import axios from "axios";
+import { decodeCompactDistricts } from "../utils/compactGeometry";
 import type {
   DistrictFeatureCollection,
   ClimateVariable,
   ClimateResponse,
   ClimateComparisonResponse,
+  ClimateProjectionResponse,
+  ClimateRankingResponse,
+  ClimateClasses,
+  DistrictTimeSeriesResponse,
+  DistrictLocation,
+  Job,
   RegionInfo,
   Period,
   Scenario,
@@ -19,16 +26,62 @@ const api = axios.create({
 });
 
 // Districts API
-export const fetchDistricts = async (): Promise<DistrictFeatureCollection> => {
-  const response = await api.get<DistrictFeatureCollection>("/districts");
+// Boundaries are simplified for the given zoom level when one is passed
+export const fetchDistricts = async (
+  zoom?: number
+): Promise<DistrictFeatureCollection> => {
+  const response = await api.get<DistrictFeatureCollection>("/districts", {
+    params: zoom !== undefined ? { zoom } : undefined,
+  });
   return response.data;
 };
 
+// Same collection from the compact binary format (shared arcs, varint coordinates)
+export const fetchDistrictsCompact = async (
+  zoom?: number
+): Promise<DistrictFeatureCollection> => {
+  const response = await api.get<ArrayBuffer>("/districts", {
+    params: { format: "binary", ...(zoom !== undefined ? { zoom } : {}) },
+    responseType: "arraybuffer",
+  });
+  return decodeCompactDistricts(response.data);
+};
+
+// Resolve a map click or GPS position to the district containing it
+export const locateDistrict = async (
+  lat: number,
+  lng: number
+): Promise<DistrictLocation | null> => {
+  try {
+    const response = await api.get<DistrictLocation>("/districts/locate", {
+      params: { lat, lng },
+    });
+    return response.data;
+  } catch (error) {
+    if (axios.isAxiosError(error) && error.response?.status === 404) return null;
+    throw error;
+  }
+};
+
 export const fetchRegions = async (): Promise<RegionInfo[]> => {
   const response = await api.get<RegionInfo[]>("/districts/regions");
   return response.data;
 };
 
+export const fetchDistrictTimeSeries = async (
+  districtId: string,
+  variable: string,
+  scenario: Scenario
+): Promise<DistrictTimeSeriesResponse> => {
+  const response = await api.get<DistrictTimeSeriesResponse>(
+    `/districts/${districtId}/timeseries`,
+    {
+      params: { variable, scenario },
+    }
+  );
+  return response.data;
+};
+
 // Climate API
 export const fetchClimateVariables = async (): Promise<ClimateVariable[]> => {
   const response = await api.get<ClimateVariable[]>("/climate/variables");
@@ -46,6 +99,21 @@ export const fetchClimateData = async (
   return response.data;
 };
 
+// Any year from 1991 to 2100, interpolated between the periods; for a continuous timeline
+export const fetchClimateProjection = async (
+  variable: string,
+  year: number,
+  scenario: Scenario
+): Promise<ClimateProjectionResponse> => {
+  const response = await api.get<ClimateProjectionResponse>(
+    `/climate/${variable}/projection`,
+    {
+      params: { year: Math.round(year), scenario },
+    }
+  );
+  return response.data;
+};
+
 export const fetchClimateComparison = async (
   variable: string,
   period: Period,
@@ -70,3 +138,133 @@ export const fetchClimateRange = async (
   });
   return response.data;
 };
+
+// Top (desc) or bottom (asc) districts of a column, and districts within a range
+export type RankField = "value" | "change" | "change_percent";
+
+export const fetchDistrictRanking = async (
+  variable: string,
+  period: Period,
+  scenario: Scenario,
+  by: RankField = "value",
+  order: "desc" | "asc" = "desc",
+  limit: number = 20
+): Promise<ClimateRankingResponse> => {
+  const response = await api.get<ClimateRankingResponse>(`/climate/${variable}/rank`, {
+    params: { period, scenario, by, order, limit },
+  });
+  return response.data;
+};
+
+export const fetchDistrictsInRange = async (
+  variable: string,
+  period: Period,
+  scenario: Scenario,
+  by: RankField,
+  range: { min?: number; max?: number }
+): Promise<ClimateRankingResponse> => {
+  const response = await api.get<ClimateRankingResponse>(`/climate/${variable}/filter`, {
+    params: { period, scenario, by, ...range },
+  });
+  return response.data;
+};
+
+// Histogram and quantile/Jenks breaks; shared classes span every period of the scenario
+export const fetchClimateClasses = async (
+  variable: string,
+  period: Period,
+  scenario: Scenario,
+  shared: boolean = false,
+  change: boolean = false
+): Promise<ClimateClasses> => {
+  const response = await api.get<ClimateClasses>(`/climate/${variable}/classes`, {
+    params: { period, scenario, shared, change },
+  });
+  return response.data;
+};
+
+// Vector tiles: a URL template for a Leaflet/MapLibre vector tile layer,
+// so only the boundaries visible at the current zoom are downloaded
+export const districtTileUrl = (
+  variable?: string,
+  period?: Period,
+  scenario?: Scenario
+): string => {
+  const params = new URLSearchParams();
+  if (variable) params.set("variable", variable);
+  if (period) params.set("period", period);
+  if (scenario) params.set("scenario", scenario);
+  const query = params.toString();
+  return `${API_BASE}/tiles/{z}/{x}/{y}.mvt${query ? `?${query}` : ""}`;
+};
+
+// Interpolated surface: a PNG overlay rendered by the server for SURFACE_BOUNDS
+export interface SurfaceOptions {
+  change?: boolean;
+  scale?: string;
+  min?: number;
+  max?: number;
+  opacity?: number;
+  resolution?: number;
+}
+
+export const climateSurfaceUrl = (
+  variable: string,
+  period: Period,
+  scenario: Scenario,
+  options: SurfaceOptions = {}
+): string => {
+  const params = new URLSearchParams({ period, scenario });
+  Object.entries(options).forEach(([key, value]) => {
+    if (value !== undefined) params.set(key, String(value));
+  });
+  return `${API_BASE}/climate/${variable}/surface?${params.toString()}`;
+};
+
+// Bulk export streamed by the backend; every filter is optional and repeatable
+export type ExportFormat = "csv" | "parquet" | "arrow";
+
+export interface ExportFilters {
+  variable?: string[];
+  period?: Period[];
+  scenario?: Scenario[];
+  region?: string[];
+}
+
+export const climateExportUrl = (
+  filters: ExportFilters = {},
+  format: ExportFormat = "csv"
+): string => {
+  const params = new URLSearchParams({ format });
+  Object.entries(filters).forEach(([key, values]) => {
+    (values as string[] | undefined)?.forEach((value) => params.append(key, value));
+  });
+  return `${API_BASE}/export?${params.toString()}`;
+};
+
+// Background jobs: submit, poll until finished, then download the result
+export const submitJob = async (
+  type: Job["type"],
+  params: Record<string, unknown>
+): Promise<Job> => {
+  const response = await api.post<Job>("/jobs", { type, params });
+  return response.data;
+};
+
+export const fetchJob = async (jobId: string): Promise<Job> => {
+  const response = await api.get<Job>(`/jobs/${jobId}`);
+  return response.data;
+};
+
+export const jobResultUrl = (job: Job): string => `${API_BASE}/jobs/${job.id}/result`;
+
+export const waitForJob = async (job: Job, intervalMs: number = 1000): Promise<Job> => {
+  while (job.status === "queued" || job.status === "running") {
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    job = await fetchJob(job.id);
+  }
+  if (job.status === "failed") {
+    throw new Error(job.error ?? "Job failed");
+  }
+  return job;
+};
@@ -192,8 +192,10 @@ const DistrictDetailPanel: React.FC<DistrictDetailPanelProps> = ({
 
       {/* Downloads section */}
       <DownloadsSection
+        districtId={districtId}
         districtName={districtName}
         regionName={regionName}
+        variable={variable}
         variableName={variableName}
         unit={unit}
         scenario={scenario}
@@ -1,11 +1,13 @@
 // Downloads section with PDF and CSV export options
 
-import { exportToCSV, exportToPDF, exportAll } from "../../utils/exportData";
+import { exportToCSV, exportToPDF, exportAll, exportRegion } from "../../utils/exportData";
 import type { TimeSeriesPoint } from "../../hooks/useDistrictTimeSeries";
 
 interface DownloadsSectionProps {
+  districtId: string;
   districtName: string;
   regionName: string;
+  variable: string;
   variableName: string;
   unit: string;
   scenario: string;
@@ -13,16 +15,20 @@ interface DownloadsSectionProps {
 }
 
 const DownloadsSection: React.FC<DownloadsSectionProps> = ({
+  districtId,
   districtName,
   regionName,
+  variable,
   variableName,
   unit,
   scenario,
   data,
 }) => {
   const exportOptions = {
+    districtId,
     districtName,
     regionName,
+    variable,
     variableName,
     unit,
     scenario,
@@ -30,7 +36,7 @@ const DownloadsSection: React.FC<DownloadsSectionProps> = ({
   };
 
   const handleExportPDF = () => {
-    exportToPDF(exportOptions);
+    exportToPDF(exportOptions).catch((error) => console.error("Report failed", error));
   };
 
   const handleExportCSV = () => {
@@ -41,6 +47,10 @@ const DownloadsSection: React.FC<DownloadsSectionProps> = ({
     exportAll(exportOptions);
   };
 
+  const handleExportRegion = () => {
+    exportRegion(regionName);
+  };
+
   return (
     <div className="downloads-section">
       <div className="downloads-header">Downloads</div>
@@ -96,6 +106,24 @@ const DownloadsSection: React.FC<DownloadsSectionProps> = ({
         </svg>
         <span>Download all - CSV</span>
       </button>
+
+      <button className="download-item" onClick={handleExportRegion}>
+        <svg
+          viewBox="0 0 24 24"
+          fill="none"
+          stroke="currentColor"
+          strokeWidth="2"
+          strokeLinecap="round"
+          strokeLinejoin="round"
+        >
+          <rect x="3" y="3" width="18" height="18" rx="2" ry="2" />
+          <line x1="3" y1="9" x2="21" y2="9" />
+          <line x1="3" y1="15" x2="21" y2="15" />
+          <line x1="9" y1="3" x2="9" y2="21" />
+          <line x1="15" y1="3" x2="15" y2="21" />
+        </svg>
+        <span>{regionName} region data - CSV</span>
+      </button>
     </div>
   );
 };
@@ -8,16 +8,21 @@ import type {
   DistrictFeatureCollection,
   ClimateValue,
   ClimateComparison,
+  Period,
+  Scenario,
 } from "../../types/climate";
-import { getColorScale, type ColorScaleType } from "../../utils/colorScales";
+import type { ColorScaleType } from "../../utils/colorScales";
+import { climateSurfaceUrl } from "../../api/climate";
 import CityMarkers from "./CityMarkers";
 import InterpolatedLayer from "./InterpolatedLayer";
 import RegionalBoundaries from "./RegionalBoundaries";
-import type { DataPoint } from "../../utils/idwInterpolation";
 import "leaflet/dist/leaflet.css";
 
 interface GhanaMapProps {
   districts: DistrictFeatureCollection | undefined;
+  variable: string;
+  period: Period;
+  scenario: Scenario;
   climateData: ClimateValue[] | undefined;
   comparisonData: ClimateComparison[] | undefined;
   showChange: boolean;
@@ -51,6 +56,9 @@ const FitBounds = () => {
 
 const GhanaMap: React.FC<GhanaMapProps> = ({
   districts,
+  variable,
+  period,
+  scenario,
   climateData,
   comparisonData,
   showChange,
@@ -73,31 +81,20 @@ const GhanaMap: React.FC<GhanaMapProps> = ({
     return map;
   }, [climateData, comparisonData, showChange]);
 
-  // Create data points from districts + climate values for IDW interpolation
-  const dataPoints: DataPoint[] = useMemo(() => {
-    if (!districts) return [];
-
-    return districts.features
-      .map((district) => {
-        const centroid = district.properties.centroid;
-        const value = valueMap.get(district.properties.id);
-
-        if (!centroid || value === undefined) return null;
-
-        return {
-          lat: centroid[1], // latitude
-          lon: centroid[0], // longitude
-          value,
-        };
-      })
-      .filter((point): point is DataPoint => point !== null);
-  }, [districts, valueMap]);
-
-  // Get color function
-  const getColor = useMemo(() => {
-    const scaleFn = getColorScale(showChange ? "diverging" : colorScaleType);
-    return (value: number) => scaleFn(value, minValue, maxValue);
-  }, [colorScaleType, showChange, minValue, maxValue]);
+  // Interpolated surface of the same values, rendered and cached by the backend
+  const showingChange = showChange && comparisonData !== undefined;
+  const surfaceUrl = useMemo(
+    () =>
+      climateSurfaceUrl(variable, period, scenario, {
+        change: showingChange || undefined,
+        scale: showChange ? "diverging" : colorScaleType,
+        min: minValue,
+        max: maxValue,
+        opacity: 0.75,
+        resolution: 0.05,
+      }),
+    [variable, period, scenario, showingChange, showChange, colorScaleType, minValue, maxValue]
+  );
 
   // Style function for GeoJSON features - borders only, no fill (interpolated layer handles colors)
   const style = (feature: Feature | undefined): PathOptions => {
@@ -164,17 +161,7 @@ const GhanaMap: React.FC<GhanaMapProps> = ({
       />
 
       {/* IDW Interpolated climate layer */}
-      {dataPoints.length > 0 && (
-        <InterpolatedLayer
-          dataPoints={dataPoints}
-          colorScale={getColor}
-          minValue={minValue}
-          maxValue={maxValue}
-          resolution={0.05}
-          opacity={0.75}
-          idwPower={2}
-        />
-      )}
+      {(climateData || comparisonData) && <InterpolatedLayer url={surfaceUrl} />}
 
       {/* District polygons (borders only) */}
       <GeoJSON
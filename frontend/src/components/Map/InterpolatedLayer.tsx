@@ -1,138 +1,53 @@
-// Canvas overlay component for IDW-interpolated climate visualization
+// Image overlay for the IDW-interpolated climate surface rendered by the backend
 
-import { useEffect, useRef, useMemo } from "react";
+import { useEffect, useRef } from "react";
 import { useMap } from "react-leaflet";
 import L from "leaflet";
-import {
-  generateInterpolatedGrid,
-  gridToImageData,
-  GHANA_BOUNDS,
-  type DataPoint,
-  type Polygon,
-  type MultiPolygon,
-} from "../../utils/idwInterpolation";
-import ghanaRegionsRaw from "../../assets/ghana_regions.geojson";
 
-interface InterpolatedLayerProps {
-  dataPoints: DataPoint[];
-  colorScale: (value: number, min: number, max: number) => string;
-  minValue: number;
-  maxValue: number;
-  resolution?: number; // Grid resolution in degrees (default: 0.05)
-  opacity?: number;
-  idwPower?: number;
-}
-
-// Extract Ghana boundary geometries from GeoJSON
-const getGhanaBoundary = (): { type: string; coordinates: Polygon | MultiPolygon }[] => {
-  const raw = ghanaRegionsRaw as unknown as {
-    features: Array<{
-      geometry: {
-        type: string;
-        coordinates: Polygon | MultiPolygon;
-      };
-    }>;
-  };
-
-  return raw.features.map((feature) => ({
-    type: feature.geometry.type,
-    coordinates: feature.geometry.coordinates,
-  }));
+// Extent of the server-rendered surface
+export const SURFACE_BOUNDS = {
+  north: 11.2,
+  south: 4.74,
+  east: 1.2,
+  west: -3.3,
 };
 
-// Memoize Ghana boundary extraction (only computed once)
-const ghanaBoundary = getGhanaBoundary();
+interface InterpolatedLayerProps {
+  url: string; // PNG surface URL (see climateSurfaceUrl)
+}
 
-const InterpolatedLayer: React.FC<InterpolatedLayerProps> = ({
-  dataPoints,
-  colorScale,
-  minValue,
-  maxValue,
-  resolution = 0.05,
-  opacity = 0.8,
-  idwPower = 2,
-}) => {
+const InterpolatedLayer: React.FC<InterpolatedLayerProps> = ({ url }) => {
   const map = useMap();
   const imageOverlayRef = useRef<L.ImageOverlay | null>(null);
 
-  // Generate the interpolated grid with Ghana boundary mask (memoized)
-  const gridResult = useMemo(() => {
-    if (dataPoints.length === 0) return null;
-
-    return generateInterpolatedGrid(
-      GHANA_BOUNDS,
-      dataPoints,
-      resolution,
-      { power: idwPower },
-      ghanaBoundary
-    );
-  }, [dataPoints, resolution, idwPower]);
-
-  // Create the image data URL from the grid
-  const imageDataUrl = useMemo(() => {
-    if (!gridResult) return null;
-
-    // Create an offscreen canvas
-    const canvas = document.createElement("canvas");
-    canvas.width = gridResult.cols;
-    canvas.height = gridResult.rows;
-    const ctx = canvas.getContext("2d");
-
-    if (!ctx) return null;
-
-    // Generate image data from grid
-    const imageData = gridToImageData(
-      gridResult,
-      minValue,
-      maxValue,
-      colorScale,
-      opacity
-    );
-
-    // Put the image data on canvas
-    ctx.putImageData(imageData, 0, 0);
-
-    // Return as data URL
-    return canvas.toDataURL();
-  }, [gridResult, minValue, maxValue, colorScale, opacity]);
-
-  // Create/update the image overlay
+  // Create the overlay once, then only swap its image
   useEffect(() => {
-    if (!imageDataUrl) {
-      // Remove existing overlay if no data
-      if (imageOverlayRef.current) {
-        map.removeLayer(imageOverlayRef.current);
-        imageOverlayRef.current = null;
-      }
+    if (imageOverlayRef.current) {
+      imageOverlayRef.current.setUrl(url);
       return;
     }
 
     const bounds: L.LatLngBoundsExpression = [
-      [GHANA_BOUNDS.south, GHANA_BOUNDS.west],
-      [GHANA_BOUNDS.north, GHANA_BOUNDS.east],
+      [SURFACE_BOUNDS.south, SURFACE_BOUNDS.west],
+      [SURFACE_BOUNDS.north, SURFACE_BOUNDS.east],
     ];
-
-    if (imageOverlayRef.current) {
-      // Update existing overlay
-      imageOverlayRef.current.setUrl(imageDataUrl);
-    } else {
-      // Create new overlay
-      imageOverlayRef.current = L.imageOverlay(imageDataUrl, bounds, {
-        opacity: 1, // Opacity is baked into the image
-        interactive: false,
-        zIndex: 200,
-      });
-      imageOverlayRef.current.addTo(map);
-    }
-
-    // Cleanup on unmount
+    imageOverlayRef.current = L.imageOverlay(url, bounds, {
+      opacity: 1, // Opacity is baked into the image
+      interactive: false,
+      zIndex: 200,
+    });
+    imageOverlayRef.current.addTo(map);
+  }, [map, url]);
+
+  // Remove the overlay on unmount
+  useEffect(() => {
     return () => {
       if (imageOverlayRef.current) {
         map.removeLayer(imageOverlayRef.current);
         imageOverlayRef.current = null;
       }
     };
-  }, [map, imageDataUrl]);
+  }, [map]);
 
   // Ensure overlay stays below district borders
   useEffect(() => {
@@ -2,19 +2,21 @@
 
 import { useQuery } from "@tanstack/react-query";
 import {
-  fetchDistricts,
+  fetchDistrictsCompact,
   fetchClimateVariables,
   fetchClimateData,
   fetchClimateComparison,
   fetchClimateRange,
+  fetchClimateClasses,
 } from "../api/climate";
 import type { Period, Scenario } from "../types/climate";
 
-// Fetch all districts with GeoJSON geometry
-export const useDistricts = () => {
+// Fetch all districts with GeoJSON geometry, optionally simplified for a zoom level.
+// Boundaries travel in the compact binary format and are decoded to GeoJSON here.
+export const useDistricts = (zoom?: number) => {
   return useQuery({
-    queryKey: ["districts"],
-    queryFn: fetchDistricts,
+    queryKey: ["districts", zoom],
+    queryFn: () => fetchDistrictsCompact(zoom),
     staleTime: Infinity, // Districts don't change
   });
 };
@@ -55,6 +57,22 @@ export const useClimateComparison = (
 };
 
 // Fetch min/max range for a variable
+// With shared classes the query key ignores the period, so scrubbing the
+// timeline reuses one legend
+export const useClimateClasses = (
+  variable: string,
+  period: Period,
+  scenario: Scenario,
+  shared: boolean = true
+) => {
+  return useQuery({
+    queryKey: ["climate-classes", variable, shared ? "all" : period, scenario],
+    queryFn: () => fetchClimateClasses(variable, period, scenario, shared),
+    enabled: !!variable,
+    staleTime: Infinity,
+  });
+};
+
 export const useClimateRange = (
   variable: string,
   period: Period,
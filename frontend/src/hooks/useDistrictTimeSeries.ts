@@ -1,8 +1,8 @@
 // Hook to fetch time series data for a single district across all periods
 
-import { useQueries } from "@tanstack/react-query";
-import { fetchClimateData, fetchClimateComparison } from "../api/climate";
-import type { Scenario, Period } from "../types/climate";
+import { useQuery } from "@tanstack/react-query";
+import { fetchDistrictTimeSeries } from "../api/climate";
+import type { Scenario, Period, DistrictTimeSeriesPoint } from "../types/climate";
 
 export interface TimeSeriesPoint {
   period: Period;
@@ -34,129 +34,75 @@ const PERIOD_CONFIG: { period: Period; year: number; label: string }[] = [
   { period: "2080", year: 2080, label: "2080s" },
 ];
 
-// Estimate uncertainty range based on change percentage
-// This provides a visual representation of variability
-const calculateUncertaintyRange = (
-  value: number,
-  changePercent: number = 0
-): { low: number; median: number; high: number } => {
-  // Use change percent to estimate uncertainty band width
-  // Larger changes typically have more uncertainty
-  const uncertaintyFactor = Math.max(0.05, Math.abs(changePercent) * 0.01);
-  const range = value * uncertaintyFactor;
-
-  return {
-    low: value - range,
-    median: value,
-    high: value + range,
-  };
-};
+// Ensemble percentile band (10th/50th/90th) computed by the backend
+const toBand = (
+  point: DistrictTimeSeriesPoint
+): { low: number; median: number; high: number } => ({
+  low: point.p10 ?? point.value,
+  median: point.p50 ?? point.value,
+  high: point.p90 ?? point.value,
+});
 
 export const useDistrictTimeSeries = (
   districtId: string | null,
   variable: string,
   scenario: Scenario
 ): UseDistrictTimeSeriesResult => {
-  // Fetch baseline data
-  const baselineQuery = useQueries({
-    queries: [
-      {
-        queryKey: ["district-baseline", variable, districtId],
-        queryFn: () => fetchClimateData(variable, "baseline", scenario),
-        enabled: !!districtId && !!variable,
-        staleTime: 5 * 60 * 1000,
-      },
-    ],
+  // One request returns every period, the baseline and the bands
+  const query = useQuery({
+    queryKey: ["district-timeseries", districtId, variable, scenario],
+    queryFn: () => fetchDistrictTimeSeries(districtId as string, variable, scenario),
+    enabled: !!districtId && !!variable,
+    staleTime: 5 * 60 * 1000,
   });
 
-  // Fetch comparison data for future periods
-  const comparisonQueries = useQueries({
-    queries: PERIOD_CONFIG.filter((p) => p.period !== "baseline").map((p) => ({
-      queryKey: ["district-comparison", variable, p.period, scenario, districtId],
-      queryFn: () => fetchClimateComparison(variable, p.period, scenario),
-      enabled: !!districtId && !!variable,
-      staleTime: 5 * 60 * 1000,
-    })),
-  });
-
-  const isLoading =
-    baselineQuery.some((q) => q.isLoading) ||
-    comparisonQueries.some((q) => q.isLoading);
-
-  const error =
-    baselineQuery.find((q) => q.error)?.error ||
-    comparisonQueries.find((q) => q.error)?.error ||
-    null;
-
   // Build time series data
-  let data: TimeSeriesPoint[] = [];
+  const data: TimeSeriesPoint[] = [];
   let statistics: DistrictStatistics | null = null;
 
-  if (!isLoading && !error && districtId) {
-    const baselineData = baselineQuery[0]?.data;
-    const districtBaseline = baselineData?.data.find(
-      (d) => d.district_id === districtId
-    );
-
-    if (districtBaseline) {
-      // Baseline point
-      const baselineUncertainty = calculateUncertaintyRange(districtBaseline.value, 5);
-      data.push({
-        period: "baseline",
-        year: PERIOD_CONFIG[0].year,
-        value: districtBaseline.value,
-        label: PERIOD_CONFIG[0].label,
-        ...baselineUncertainty,
-      });
-
-      // Future periods from comparison data
-      let latestFutureStats: { low: number; median: number; high: number } | null = null;
-
-      PERIOD_CONFIG.slice(1).forEach((config, index) => {
-        const comparisonData = comparisonQueries[index]?.data;
-        const districtComparison = comparisonData?.data.find(
-          (d) => d.district_id === districtId
-        );
-
-        if (districtComparison) {
-          const uncertainty = calculateUncertaintyRange(
-            districtComparison.future,
-            districtComparison.change_percent
-          );
-
-          data.push({
-            period: config.period,
-            year: config.year,
-            value: districtComparison.future,
-            label: config.label,
-            ...uncertainty,
-          });
-
-          // Keep track of the latest (2080) stats for the statistics table
-          if (config.period === "2080") {
-            latestFutureStats = uncertainty;
-          }
-        }
-      });
-
-      // Build statistics object
-      if (latestFutureStats) {
-        statistics = {
-          baseline: baselineUncertainty,
-          future: latestFutureStats,
-          // Estimate grid points based on typical district size
-          // Ghana has ~261 districts, ~238,533 km², average ~914 km² per district
-          // At 0.05° resolution (~5.5km), roughly 30-40 grid points per district
-          gridPointCount: 35,
-        };
+  const response = query.data;
+  if (response && districtId) {
+    PERIOD_CONFIG.forEach((config) => {
+      const point = response.data.find((p) => p.period === config.period);
+      if (point) {
+        data.push({
+          period: config.period,
+          year: config.year,
+          value: point.value,
+          label: config.label,
+          ...toBand(point),
+        });
       }
+    });
+
+    const baselinePoint = data.find((p) => p.period === "baseline");
+    // Keep track of the latest (2080) stats for the statistics table
+    const latestPoint = data.find((p) => p.period === "2080");
+
+    if (baselinePoint && latestPoint) {
+      statistics = {
+        baseline: {
+          low: baselinePoint.low,
+          median: baselinePoint.median,
+          high: baselinePoint.high,
+        },
+        future: {
+          low: latestPoint.low,
+          median: latestPoint.median,
+          high: latestPoint.high,
+        },
+        // Estimate grid points based on typical district size
+        // Ghana has ~261 districts, ~238,533 km², average ~914 km² per district
+        // At 0.05° resolution (~5.5km), roughly 30-40 grid points per district
+        gridPointCount: 35,
+      };
     }
   }
 
   return {
     data,
     statistics,
-    isLoading,
-    error: error as Error | null,
+    isLoading: query.isLoading,
+    error: (query.error as Error | null) ?? null,
   };
 };
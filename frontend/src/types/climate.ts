@@ -14,10 +14,15 @@ export interface DistrictGeoJSON {
     region: string;
     centroid?: [number, number]; // [longitude, latitude]
   };
-  geometry: {
-    type: "Polygon";
-    coordinates: number[][][];
-  };
+  geometry:
+    | {
+        type: "Polygon";
+        coordinates: number[][][];
+      }
+    | {
+        type: "MultiPolygon";
+        coordinates: number[][][][];
+      };
 }
 
 export interface DistrictFeatureCollection {
@@ -25,6 +30,15 @@ export interface DistrictFeatureCollection {
   features: DistrictGeoJSON[];
 }
 
+// District containing a point (null fields when none does)
+export interface DistrictLocation {
+  lat: number;
+  lng: number;
+  district_id: string | null;
+  district_name: string | null;
+  region: string | null;
+}
+
 export interface ClimateVariable {
   id: string;
   name: string;
@@ -49,6 +63,39 @@ export interface ClimateResponse {
   data: ClimateValue[];
 }
 
+export interface ClimateProjectionResponse {
+  variable: string;
+  variable_name: string;
+  year: number;
+  scenario: string;
+  unit: string;
+  data: ClimateValue[];
+}
+
+export interface RankedDistrict {
+  district_id: string;
+  district_name: string;
+  region: string;
+  baseline: number;
+  value: number;
+  change: number;
+  change_percent: number;
+}
+
+export interface ClimateRankingResponse {
+  variable: string;
+  variable_name: string;
+  period: string;
+  scenario: string;
+  unit: string;
+  by: string;
+  order: string;
+  min?: number | null;
+  max?: number | null;
+  total: number;
+  data: RankedDistrict[];
+}
+
 export interface ClimateComparison {
   district_id: string;
   district_name: string;
@@ -67,11 +114,64 @@ export interface ClimateComparisonResponse {
   data: ClimateComparison[];
 }
 
+export interface DistrictTimeSeriesPoint {
+  period: Period;
+  value: number;
+  change: number;
+  change_percent: number;
+  p10?: number;
+  p50?: number;
+  p90?: number;
+}
+
+export interface DistrictTimeSeriesResponse {
+  district_id: string;
+  district_name: string;
+  region: string;
+  variable: string;
+  variable_name: string;
+  scenario: Scenario;
+  unit: string;
+  baseline: number;
+  data: DistrictTimeSeriesPoint[];
+}
+
 export interface RegionInfo {
   name: string;
   district_count: number;
 }
 
+// Legend classes precomputed by the backend; breaks run from min to max
+export interface ClimateClasses {
+  variable: string;
+  period: Period;
+  scenario: string;
+  unit: string;
+  shared: boolean;
+  change: boolean;
+  classes: number;
+  min: number | null;
+  max: number | null;
+  histogram: { edges: number[]; counts: number[] };
+  quantile: number[];
+  jenks: number[];
+}
+
+// Background job (PDF report or bulk export) run by the backend
+export type JobStatusValue = "queued" | "running" | "succeeded" | "failed";
+
+export interface Job {
+  id: string;
+  type: "report" | "export";
+  status: JobStatusValue;
+  params: Record<string, unknown>;
+  error: string | null;
+  created_at: string | null;
+  started_at: string | null;
+  finished_at: string | null;
+  result_url: string | null;
+}
+
 export type Period = "baseline" | "2030" | "2050" | "2080";
 export type Scenario = "rcp45" | "rcp85";
 
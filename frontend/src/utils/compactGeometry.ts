@@ -0,0 +1,123 @@
+// Decoder for the compact binary district geometry format
+// (GET /api/districts?format=binary): shared arcs with delta-encoded,
+// varint-packed coordinates. The layout is documented in
+// backend/app/services/geometry_formats.py.
+
+import type { DistrictFeatureCollection, DistrictGeoJSON } from "../types/climate";
+
+const MAGIC = "CATB";
+const VERSION = 1;
+
+class Reader {
+  private pos = 0;
+  private readonly bytes: Uint8Array;
+  private readonly text = new TextDecoder();
+
+  constructor(buffer: ArrayBuffer) {
+    this.bytes = new Uint8Array(buffer);
+  }
+
+  byte(): number {
+    return this.bytes[this.pos++];
+  }
+
+  uint(): number {
+    // Multiplication instead of bit shifts keeps values above 2^31 exact
+    let result = 0;
+    let factor = 1;
+    let b: number;
+    do {
+      b = this.bytes[this.pos++];
+      result += (b & 0x7f) * factor;
+      factor *= 128;
+    } while (b & 0x80);
+    return result;
+  }
+
+  int(): number {
+    const value = this.uint();
+    return value % 2 === 0 ? value / 2 : -(value + 1) / 2;
+  }
+
+  string(): string {
+    const length = this.uint();
+    const value = this.text.decode(this.bytes.subarray(this.pos, this.pos + length));
+    this.pos += length;
+    return value;
+  }
+}
+
+export const decodeCompactDistricts = (buffer: ArrayBuffer): DistrictFeatureCollection => {
+  const reader = new Reader(buffer);
+  const magic = String.fromCharCode(reader.byte(), reader.byte(), reader.byte(), reader.byte());
+  const version = reader.byte();
+  if (magic !== MAGIC || version !== VERSION) {
+    throw new Error(`Unsupported district geometry format ${magic} v${version}`);
+  }
+
+  const scale = Math.pow(10, -reader.uint());
+  const translateX = reader.int();
+  const translateY = reader.int();
+
+  // Arcs in absolute degrees
+  const arcs: number[][][] = [];
+  const arcCount = reader.uint();
+  for (let a = 0; a < arcCount; a++) {
+    const count = reader.uint();
+    const arc: number[][] = new Array(count);
+    let x = translateX;
+    let y = translateY;
+    for (let i = 0; i < count; i++) {
+      x += reader.int();
+      y += reader.int();
+      arc[i] = [x * scale, y * scale];
+    }
+    arcs.push(arc);
+  }
+
+  const features: DistrictGeoJSON[] = [];
+  const districtCount = reader.uint();
+  for (let d = 0; d < districtCount; d++) {
+    const id = reader.string();
+    const name = reader.string();
+    const region = reader.string();
+    const centroid: [number, number] = [
+      (reader.int() + translateX) * scale,
+      (reader.int() + translateY) * scale,
+    ];
+
+    // Ring structure first, then the arc references of every ring
+    const structure: number[][] = [];
+    const polygonCount = reader.uint();
+    for (let p = 0; p < polygonCount; p++) {
+      const ringCount = reader.uint();
+      const ringSizes: number[] = [];
+      for (let r = 0; r < ringCount; r++) ringSizes.push(reader.uint());
+      structure.push(ringSizes);
+    }
+
+    const polygons = structure.map((ringSizes) =>
+      ringSizes.map((size) => {
+        const ring: number[][] = [];
+        for (let k = 0; k < size; k++) {
+          const ref = reader.int();
+          // ~i (= -i - 1) is arc i reversed; consecutive arcs share an end point
+          const arc = ref >= 0 ? arcs[ref] : arcs[~ref].slice().reverse();
+          ring.push(...(k === 0 ? arc : arc.slice(1)));
+        }
+        return ring;
+      })
+    );
+
+    features.push({
+      type: "Feature",
+      properties: { id, name, region, centroid },
+      geometry:
+        polygons.length === 1
+          ? { type: "Polygon", coordinates: polygons[0] }
+          : { type: "MultiPolygon", coordinates: polygons },
+    });
+  }
+
+  return { type: "FeatureCollection", features };
+};
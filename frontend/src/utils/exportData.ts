@@ -1,11 +1,20 @@
 // Data export utilities for CSV and PDF generation
 
 import type { TimeSeriesPoint } from "../hooks/useDistrictTimeSeries";
+import {
+  climateExportUrl,
+  jobResultUrl,
+  submitJob,
+  waitForJob,
+  type ExportFormat,
+} from "../api/climate";
 
 interface ExportOptions {
+  districtId: string;
   districtName: string;
   regionName: string;
   variableName: string;
+  variable: string;
   unit: string;
   scenario: string;
   data: TimeSeriesPoint[];
@@ -60,83 +69,28 @@ export const exportToCSV = (options: ExportOptions): void => {
   URL.revokeObjectURL(url);
 };
 
-// Generate and download PDF report
-export const exportToPDF = (options: ExportOptions): void => {
-  const { districtName, regionName, variableName, unit, scenario, data } = options;
-
-  // Build simple text-based report (in lieu of a full PDF library)
-  // For a production app, you'd use a library like jsPDF
-  const scenarioLabel =
-    scenario === "rcp45" ? "Low Carbon (RCP 4.5)" : "High Carbon (RCP 8.5)";
-
-  const formatValue = (value: number) => {
-    if (unit === "°C") return `${value.toFixed(1)}${unit}`;
-    if (unit === "mm" || unit === "days") return `${Math.round(value)} ${unit}`;
-    return `${value.toFixed(1)} ${unit}`;
-  };
-
-  const baseline = data.find((d) => d.period === "baseline");
-  const future2080 = data.find((d) => d.period === "2080");
-  const change = baseline && future2080 ? future2080.median - baseline.median : 0;
-  const changePercent =
-    baseline && baseline.median !== 0
-      ? ((change / baseline.median) * 100).toFixed(1)
-      : "0";
-
-  const reportContent = `
-GHANA CLIMATE ATLAS
-Climate Report for ${districtName}
-=====================================
-
-LOCATION
---------
-District: ${districtName}
-Region: ${regionName}
-
-CLIMATE VARIABLE
-----------------
-Parameter: ${variableName}
-Scenario: ${scenarioLabel}
-
-SUMMARY
--------
-Baseline (1991-2020): ${baseline ? formatValue(baseline.median) : "N/A"}
-Projected (2071-2100): ${future2080 ? formatValue(future2080.median) : "N/A"}
-Expected Change: ${change >= 0 ? "+" : ""}${formatValue(change)} (${changePercent}%)
-
-TIME SERIES DATA
-----------------
-${data.map((d) => `${d.label} (${d.year}): ${formatValue(d.median)} [${formatValue(d.low)} - ${formatValue(d.high)}]`).join("\n")}
-
-DATA SOURCE
------------
-Climate projections derived from CORDEX-Africa regional climate models
-downscaled for Ghana using the KAPy framework.
-
-Generated: ${new Date().toLocaleDateString("en-GB", {
-    day: "numeric",
-    month: "long",
-    year: "numeric",
-  })}
-
----
-Ghana Climate Atlas | https://climate.ghana.gov.gh
-`.trim();
-
-  // Create and download as text file (would be PDF in production)
-  const blob = new Blob([reportContent], { type: "text/plain;charset=utf-8;" });
+// Download a link without leaving the page
+const downloadUrl = (url: string, filename: string = ""): void => {
   const link = document.createElement("a");
-  const url = URL.createObjectURL(blob);
   link.setAttribute("href", url);
-  link.setAttribute(
-    "download",
-    `climate_report_${districtName.toLowerCase().replace(/\s+/g, "_")}_${scenario}.txt`
-  );
+  link.setAttribute("download", filename);
   link.style.visibility = "hidden";
   document.body.appendChild(link);
   link.click();
   document.body.removeChild(link);
-  URL.revokeObjectURL(url);
+};
+
+// Render the PDF report as a background job on the backend and download it when ready.
+// Reports already rendered for the same district, variable and scenario come back at once.
+export const exportToPDF = async (options: ExportOptions): Promise<void> => {
+  const { districtId, districtName, variable, scenario } = options;
+  const job = await waitForJob(
+    await submitJob("report", { district_id: districtId, variable, scenario })
+  );
+  downloadUrl(
+    jobResultUrl(job),
+    `climate_report_${districtName.toLowerCase().replace(/\s+/g, "_")}_${scenario}.pdf`
+  );
 };
 
 // Export all data (combines both formats in a single download)
@@ -144,6 +98,12 @@ export const exportAll = (options: ExportOptions): void => {
   exportToCSV(options);
   // Small delay to prevent browser blocking multiple downloads
   setTimeout(() => {
-    exportToPDF(options);
+    exportToPDF(options).catch((error) => console.error("Report failed", error));
   }, 500);
 };
+
+// Download every variable, period and scenario for all districts of a region.
+// The file is streamed by the backend, so the browser saves it as it arrives.
+export const exportRegion = (regionName: string, format: ExportFormat = "csv"): void => {
+  downloadUrl(climateExportUrl({ region: [regionName] }, format));
+};